@@ -301,6 +301,72 @@ async def get_llm_stats(user=Depends(get_current_user)):
     except Exception as e:
         logger.error(f"LLM stats error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/admin/experiments")
+async def get_experiment_stats(user=Depends(get_current_user)):
+    """
+    Compare coach experiment arms on live traffic.
+    Requires 'admin' permission_level.
+
+    Returns per-arm percentiles (avg, P50, P90, P95, P99) for TTFT, total
+    latency, tool iterations and input/output/thinking tokens. Metrics are
+    kept in memory per worker. "caches" has hit/miss/eviction/load-latency
+    metrics of every AsyncCache, "log_writers" queue depth, written and
+    dropped entries of the background log writers, "events" the event bus
+    subscriptions and delivery counters, "bundles" pending bundle
+    generations and waits.
+    """
+    try:
+        supabase = get_admin_client()
+
+        # Verify user permission
+        profile_response = (
+            supabase.table("user_profiles")
+            .select("permission_level")
+            .eq("auth_user_uuid", user.id)
+            .single()
+            .execute()
+        )
+
+        if (
+            not profile_response.data
+            or profile_response.data.get("permission_level") != "admin"
+        ):
+            logger.warning(f"Unauthorized admin access attempt by user {user.id}")
+            raise HTTPException(
+                status_code=403, detail="Unauthorized: Admin access required"
+            )
+
+        from app.core.events import event_bus
+        from app.core.utils.log_writer import get_all_log_writer_stats
+        from app.services.cache.answer_cache import answer_cache
+        from app.services.cache.async_cache import cache_stats
+        from app.services.cache.workout_history import workout_history_cache
+        from app.services.llm.context_cache import get_context_cache
+        from app.services.llm.experiments import experiment_metrics
+        from app.services.memory.memory_index import memory_index_cache
+        from app.services.workout_analysis.bundle_registry import bundle_registry
+
+        summary = experiment_metrics.summarize()
+        context_cache = get_context_cache()
+        summary["context_cache"] = context_cache.get_stats() if context_cache else None
+        summary["answer_cache"] = answer_cache.get_stats()
+        summary["workout_history"] = workout_history_cache.get_stats()
+        summary["memory_index"] = memory_index_cache.get_stats()
+        summary["caches"] = cache_stats()
+        summary["log_writers"] = get_all_log_writer_stats()
+        summary["events"] = event_bus.get_stats()
+        summary["bundles"] = bundle_registry.get_stats()
+        return summary
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Experiment stats error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/api/admin/test/provision")
 async def provision_test_user(
     persona_config: Dict[str, Any],
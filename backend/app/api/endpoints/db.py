@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Body, Depends, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, status
+from typing import Dict, Any, Optional
 from app.core.supabase.auth import get_current_user, get_jwt_token
 import logging
 from app.core.rate_limit import rate_limit
@@ -7,10 +7,12 @@ from app.core.rate_limit import rate_limit
 from app.services.db.context_service import ContextBundleService
 from app.services.db.workout_service import WorkoutService
 from app.services.db.conversation_service import ConversationService
-from app.services.db.exercise_definition_service import ExerciseDefinitionService
 from app.services.db.user_profile_service import UserProfileService
 from app.services.db.message_service import MessageService
 from app.services.cache.glossary_terms import glossary_cache
+from app.services.cache.exercise_definitions import exercise_cache
+from app.services.cache.exercise_popularity import exercise_popularity
+from app.services.cache.reference_sync import ReferenceSync, etag_matches
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/db")
@@ -18,11 +20,24 @@ router = APIRouter(prefix="/db")
 conversation_service = ConversationService()
 context_bundle_service = ContextBundleService()
 workout_service = WorkoutService()
-exercise_definition_service = ExerciseDefinitionService()
 user_profile_service = UserProfileService()
 message_service = MessageService()
 
 
+def _reference_response(
+    sync: ReferenceSync, if_none_match: Optional[str], since: Optional[str]
+) -> Response:
+    """
+    Serve a reference list conditionally: 304 if the client's ETag is current,
+    the changes since a version if `since` is given, else the full list.
+    """
+    headers = {"ETag": sync.etag, "Cache-Control": "no-cache"} if sync.version else {}
+    if etag_matches(if_none_match, sync.version):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = sync.delta_body(since) if since else sync.full_body()
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint to verify the API is running"""
@@ -31,19 +46,54 @@ async def health_check():
 
 @router.get("/exercise-definitions")
 async def get_exercise_definitions(
-    user=Depends(get_current_user), jwt_token: str = Depends(get_jwt_token)
+    since: Optional[str] = Query(None, max_length=64),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+    jwt_token: str = Depends(get_jwt_token),
 ):
-    """Get all exercise definitions"""
+    """
+    Get all active exercise definitions (uses cache).
+
+    Send the ETag back as If-None-Match to get a 304 when nothing changed, or
+    as since=<version> to get only the added/changed/removed definitions.
+    """
     try:
-        result = await exercise_definition_service.get_all_exercise_definitions(
-            jwt_token
-        )
-        return result.get("data", []) if result.get("success") else []
+        return _reference_response(await exercise_cache.get_sync(), if_none_match, since)
     except Exception as e:
         logger.error(f"Error getting exercise definitions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/exercise-definitions/search")
+async def search_exercise_definitions(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    user=Depends(get_current_user),
+):
+    """
+    Typo-tolerant exercise name search (uses cache). Matches partial and
+    misspelled names, aliases and abbreviations ("benh pres", "rdl").
+
+    Returns:
+        {"results": [definition + match_score, ...], "total": int}, best first
+    """
+    try:
+        search_index = await exercise_cache.get_search_index()
+        popularity = await exercise_popularity.get_scores()
+        hits, total = search_index.search(q, limit, popularity)
+        entries = search_index.index.entries
+        return {
+            "results": [
+                {**entries[pos].exercise, "match_score": round(score, 3)}
+                for score, pos in hits
+            ],
+            "total": total,
+        }
+    except Exception as e:
+        logger.error(f"Error searching exercise definitions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/workouts/templates")
 async def get_templates(
     user=Depends(get_current_user), jwt_token: str = Depends(get_jwt_token)
@@ -549,12 +599,17 @@ async def complete_onboarding(
 
 @router.get("/glossary-terms")
 async def get_glossary_terms(
-    user=Depends(get_current_user), jwt_token: str = Depends(get_jwt_token)
+    since: Optional[str] = Query(None, max_length=64),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+    jwt_token: str = Depends(get_jwt_token),
 ):
-    """Get all glossary terms (uses cache)"""
+    """
+    Get all glossary terms (uses cache). Supports If-None-Match and
+    since=<version> like /exercise-definitions.
+    """
     try:
-        terms = await glossary_cache.get_all_terms()
-        return terms
+        return _reference_response(await glossary_cache.get_sync(), if_none_match, since)
     except Exception as e:
         logger.error(f"Error getting glossary terms: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
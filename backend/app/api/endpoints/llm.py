@@ -198,6 +198,14 @@ async def unified_coach(
                                         "type": "thinking",
                                         "data": thinking_data["content"]
                                     })
+                                elif chunk.startswith('{"_type": "component"'):
+                                    # Structured block closed mid-stream; its text
+                                    # was already sent (and saved) as content
+                                    component = json.loads(chunk)
+                                    await safe_send_json({
+                                        "type": component["type"],
+                                        "data": component["data"]
+                                    })
                                 elif chunk.startswith('{"_type": "tool_call"'):
                                     tool_data = json.loads(chunk)
                                     await safe_send_json({
@@ -0,0 +1,255 @@
+"""
+Domain events and the in-process event bus
+
+Writes publish what changed; caches subscribe and drop exactly what the
+change made stale, instead of writers reaching into every cache:
+
+    await event_bus.publish(WorkoutCreated(user_id=..., workout_id=...))
+
+    event_bus.subscribe(
+        (WorkoutCreated, WorkoutUpdated, WorkoutDeleted),
+        lambda event: workout_history_cache.invalidate_user(event.user_id),
+    )
+
+- events are small frozen dataclasses (ids and a few scalars, never rows)
+  that serialize with event_to_dict() / event_from_dict()
+- handlers may be sync or async; they run in subscription order and a
+  failing handler is logged and counted, never raised to the publisher
+- caches subscribe where they are defined (module bottom, next to their
+  singleton), so a cache that was never imported has nothing to invalidate
+- delivery goes through an EventBackend. InProcessBackend dispatches in
+  this worker; a multi-worker backend (Redis pub/sub, Postgres NOTIFY)
+  publishes event_to_dict(event) and calls bus.dispatch(event_from_dict(...))
+  for every message it receives, in every worker - see set_backend()
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, fields
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# EVENTS
+# =========================
+
+# Event types by name, for deserialization
+EVENT_TYPES: Dict[str, Type["Event"]] = {}
+
+
+@dataclass(frozen=True)
+class Event:
+    """Base class of domain events."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        EVENT_TYPES[cls.__name__] = cls
+
+
+@dataclass(frozen=True)
+class WorkoutCreated(Event):
+    user_id: str
+    workout_id: str
+
+
+@dataclass(frozen=True)
+class WorkoutUpdated(Event):
+    user_id: str
+    workout_id: str
+
+
+@dataclass(frozen=True)
+class WorkoutDeleted(Event):
+    user_id: str
+    workout_id: str
+
+
+@dataclass(frozen=True)
+class BundleRequested(Event):
+    """Analysis bundle generation started for the user."""
+
+    user_id: str
+    version: int
+
+
+@dataclass(frozen=True)
+class BundleReady(Event):
+    """A new analysis bundle was saved for the user."""
+
+    user_id: str
+    bundle_id: str
+    version: int = 0  # BundleRequested.version it completes
+
+
+@dataclass(frozen=True)
+class BundleFailed(Event):
+    user_id: str
+    version: int
+    bundle_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class MemoryAppended(Event):
+    """The user's ai_memory notes changed (appended, merged or rewritten)."""
+
+    user_id: str
+    bundle_id: str
+
+
+@dataclass(frozen=True)
+class ProfileUpdated(Event):
+    user_id: str
+
+
+@dataclass(frozen=True)
+class DefinitionsChanged(Event):
+    """The exercise catalog was reloaded with different content."""
+
+    version: str
+
+
+@dataclass(frozen=True)
+class MessageSaved(Event):
+    """A message was saved; subscribers read the row by id if they need it."""
+
+    conversation_id: str
+    message_id: str
+    sender: str
+
+
+WORKOUT_EVENTS = (WorkoutCreated, WorkoutUpdated, WorkoutDeleted)
+
+
+def event_to_dict(event: Event) -> Dict[str, Any]:
+    return {"type": type(event).__name__, "data": asdict(event)}
+
+
+def event_from_dict(payload: Dict[str, Any]) -> Event:
+    cls = EVENT_TYPES[payload["type"]]
+    names = {f.name for f in fields(cls)}
+    return cls(**{k: v for k, v in payload["data"].items() if k in names})
+
+
+# =========================
+# BUS
+# =========================
+
+E = TypeVar("E", bound=Event)
+Handler = Callable[[Any], Optional[Awaitable[None]]]
+
+
+class EventBackend(ABC):
+    """
+    Delivery of published events. The default delivers in-process; a
+    shared backend delivers to every worker (including this one).
+    """
+
+    def attach(self, dispatch: Callable[[Event], Awaitable[None]]) -> None:
+        """Set where received events are delivered (the bus's dispatch)."""
+        self._dispatch = dispatch
+
+    async def start(self) -> None:
+        """Connect and begin receiving (shared backends)."""
+
+    @abstractmethod
+    async def publish(self, event: Event) -> None:
+        """Deliver an event to the bus's dispatch (in every worker)."""
+
+    async def stop(self) -> None:
+        pass
+
+
+class InProcessBackend(EventBackend):
+    """Delivers events to this worker's subscribers only."""
+
+    async def publish(self, event: Event) -> None:
+        await self._dispatch(event)
+
+
+class EventBus:
+    """Typed publish/subscribe for domain events."""
+
+    def __init__(self, backend: Optional[EventBackend] = None):
+        self._handlers: Dict[Type[Event], List[Handler]] = {}
+        self._backend: EventBackend = backend or InProcessBackend()
+        self._backend.attach(self.dispatch)
+        self.stats = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    def subscribe(
+        self,
+        event_types: Union[Type[E], Tuple[Type[E], ...]],
+        handler: Callable[[E], Optional[Awaitable[None]]],
+    ) -> None:
+        """Call handler for every event of the given type(s)."""
+        if not isinstance(event_types, tuple):
+            event_types = (event_types,)
+        for event_type in event_types:
+            self._handlers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type: Type[Event], handler: Handler) -> None:
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def publish(self, event: Event) -> None:
+        """Publish an event. Never raises: invalidation must not fail a write."""
+        self.stats["published"] += 1
+        try:
+            await self._backend.publish(event)
+        except Exception as e:
+            logger.error(f"❌ Failed to publish {type(event).__name__}: {e}", exc_info=True)
+
+    async def dispatch(self, event: Event) -> None:
+        """Run this worker's handlers for an event (called by the backend)."""
+        handlers = self._handlers.get(type(event), ())
+        logger.debug(f"📣 {event} -> {len(handlers)} handlers")
+        for handler in list(handlers):
+            try:
+                result = handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+                self.stats["delivered"] += 1
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(
+                    f"❌ Event handler {getattr(handler, '__qualname__', handler)} "
+                    f"failed for {type(event).__name__}: {e}",
+                    exc_info=True,
+                )
+
+    async def set_backend(self, backend: EventBackend) -> None:
+        """Swap the delivery backend (e.g. a shared one at startup)."""
+        await self._backend.stop()
+        backend.attach(self.dispatch)
+        await backend.start()
+        self._backend = backend
+        logger.info(f"📣 Event bus using {type(backend).__name__}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self._backend).__name__,
+            "subscriptions": {
+                event_type.__name__: len(handlers)
+                for event_type, handlers in self._handlers.items()
+                if handlers
+            },
+            **self.stats,
+        }
+
+
+# Singleton instance for easy import
+event_bus = EventBus()
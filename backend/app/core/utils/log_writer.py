@@ -0,0 +1,276 @@
+"""
+Buffered background writer for reasoning logs
+
+Reasoning logs (coach turns, memory extraction) used to be appended with
+synchronous file I/O on the event loop, sometimes once per streamed chunk.
+This module moves all disk I/O onto one background thread per log:
+
+- Callers build an entry in memory (LogEntry.write is a list append) and
+  hand it over once, when the entry is closed (`with writer.entry() as f:`)
+- The writer thread batches queued entries into a single write + flush
+- Files rotate by size (path, path.1 ... path.N)
+- Each log type has a sampling rate; unsampled entries cost nothing
+- When the queue is full, entries are dropped and counted - never blocking
+
+Sampling rates: REASONING_LOG_SAMPLE_RATES="coach=0.1,memory=1.0"
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+def _sample_rates() -> Dict[str, float]:
+    rates = {}
+    for part in os.environ.get("REASONING_LOG_SAMPLE_RATES", "").split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            try:
+                rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                logger.warning(f"⚠️ Invalid reasoning log sample rate: {part!r}")
+    return rates
+
+
+class LogEntry:
+    """One logical log record (e.g. a coach turn), accumulated in memory."""
+
+    __slots__ = ("_writer", "_parts", "_closed")
+
+    def __init__(self, writer: "BufferedLogWriter"):
+        self._writer = writer
+        self._parts: List[str] = []
+        self._closed = False
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+
+    def close(self) -> None:
+        """Hand the entry to the writer thread (idempotent)."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._parts:
+            self._writer.enqueue("".join(self._parts))
+        self._parts = []
+
+
+class _NullEntry:
+    """Stand-in for sampled-out entries; writes are discarded."""
+
+    __slots__ = ()
+
+    def write(self, text: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_NULL_ENTRY = _NullEntry()
+
+
+class BufferedLogWriter:
+    """Appends text to a size-rotated file from a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        log_type: str,
+        sample_rate: float = 1.0,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ):
+        self.path = os.path.abspath(path)
+        self.log_type = log_type
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "entries_written": 0,
+            "batches_written": 0,
+            "bytes_written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "rotations": 0,
+            "write_errors": 0,
+        }
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    # ----- producer side (event loop) -----
+
+    def begin(self) -> Optional[LogEntry]:
+        """
+        Start an entry, or return None if this entry is sampled out.
+
+        Callers should skip building log text entirely when None is returned.
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.stats["sampled_out"] += 1
+            return None
+        return LogEntry(self)
+
+    @contextmanager
+    def entry(self) -> Iterator[Union[LogEntry, _NullEntry]]:
+        """
+        Context manager form of begin(): yields an entry (or a no-op stand-in
+        if sampled out) and hands it to the writer on exit, even on error or
+        cancellation.
+        """
+        entry = self.begin() or _NULL_ENTRY
+        try:
+            yield entry
+        finally:
+            entry.close()
+
+    def write(self, text: str) -> None:
+        """Log a standalone entry (sampled like begin())."""
+        entry = self.begin()
+        if entry:
+            entry.write(text)
+            entry.close()
+
+    def enqueue(self, text: str) -> None:
+        """Queue text for the writer thread; drops (and counts) if full."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] % 100 == 1:
+                logger.warning(
+                    f"⚠️ {self.log_type} reasoning log queue full - "
+                    f"{self.stats['dropped']} entries dropped so far"
+                )
+
+    # ----- consumer side (writer thread) -----
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"log-writer-{self.log_type}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            stop = item is None
+            batch = [] if stop else [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[str]) -> None:
+        data = "".join(batch)
+        try:
+            self._rotate_if_needed(len(data.encode()))
+            with open(self.path, "a") as f:
+                f.write(data)
+            self.stats["entries_written"] += len(batch)
+            self.stats["batches_written"] += 1
+            self.stats["bytes_written"] += len(data)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"❌ Failed writing {self.log_type} reasoning log: {e}")
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size + incoming <= self.max_bytes:
+            return
+
+        for i in range(self.backup_count - 1, 0, -1):
+            src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stats["rotations"] += 1
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Drain the queue and stop the writer thread."""
+        if not self._thread or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        return {
+            "log_type": self.log_type,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "queued": self._queue.qsize(),
+            **self.stats,
+        }
+
+
+_writers: Dict[str, BufferedLogWriter] = {}
+
+
+def get_log_writer(log_type: str, path: str) -> BufferedLogWriter:
+    """Shared writer per log type (sample rate from REASONING_LOG_SAMPLE_RATES)."""
+    if log_type not in _writers:
+        _writers[log_type] = BufferedLogWriter(
+            path, log_type, sample_rate=_sample_rates().get(log_type, 1.0)
+        )
+    return _writers[log_type]
+
+
+def get_all_log_writer_stats() -> List[Dict]:
+    return [w.get_stats() for w in _writers.values()]
+
+
+@atexit.register
+def _close_all() -> None:
+    for writer in _writers.values():
+        writer.close()
@@ -10,8 +10,12 @@ from app.api.endpoints.leaderboard import router as leaderboard_router
 from app.api.endpoints.dashboard import router as dashboard_router
 from app.api.endpoints.chat import router as chat_router
 from app.services.cache.exercise_definitions import exercise_cache
+from app.services.cache.exercise_popularity import exercise_popularity
+from app.services.cache.glossary_terms import glossary_cache
+from app.services.db.conversation_service import conversation_service
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.logging_config import setup_logging
+import asyncio
 import logging
 import os
 from dotenv import load_dotenv
@@ -38,20 +42,36 @@ async def startup_event():
     """Initialize caches and services on app startup"""
     logger.info("🚀 Initializing application services...")
 
-    # Warm up exercise definition cache
+    # Warm up exercise definition cache: serve the local snapshot right away
+    # and revalidate it in the background; without one, load from the database
     logger.info("Loading exercise definition cache...")
-    success = await exercise_cache.refresh()
+    if exercise_cache.load_snapshot():
+        asyncio.create_task(exercise_cache.revalidate())
+        success = True
+    else:
+        success = await exercise_cache.refresh()
 
     if success:
         stats = exercise_cache.get_cache_stats()
         logger.info(
-            f"✅ Exercise cache initialized: {stats['cached_count']} exercises loaded"
+            f"✅ Exercise cache initialized: {stats['cached_count']} exercises loaded "
+            f"(from {stats['source']})"
         )
     else:
         logger.warning(
             "⚠️ Exercise cache failed to initialize - will retry on first request"
         )
 
+    # Glossary terms: snapshot if available, then revalidate in the background
+    glossary_cache.load_snapshot()
+    asyncio.create_task(glossary_cache.revalidate())
+
+    # Exercise popularity (tool ranking signal) loads in the background
+    asyncio.create_task(exercise_popularity.refresh())
+
+    # Rolling coach summaries need conversations.running_summary
+    asyncio.create_task(conversation_service.check_running_summary_column())
+
     logger.info("🎉 Application startup complete")
 
 
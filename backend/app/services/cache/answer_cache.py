@@ -0,0 +1,219 @@
+"""
+Answer cache for repeat coach questions
+
+Users ask the same handful of questions over and over between workouts
+("what should I train today?", "how's my bench progressing?"). With the same
+bundle and memory, the coach's answer is the same, so a repeat is served from
+this cache instead of a full generation.
+
+- Opt-in per question class: only questions matching an enabled class are
+  looked up or stored (COACH_ANSWER_CACHE_CLASSES="daily_plan,progress_check")
+- Keyed by (user, class, normalized question, bundle id, memory version), so
+  a new bundle or memory note is a new key; invalidate_user() additionally
+  drops a user's entries as soon as new memory, a new bundle or a profile
+  change is published (see app.core.events)
+- Only opening questions are cached - later in a conversation the answer
+  depends on what was said before
+- Hits are streamed back with model-like pacing
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from app.core.events import BundleReady, MemoryAppended, ProfileUpdated, event_bus
+from app.services.cache.async_cache import AsyncCache
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 5000
+MAX_QUESTION_WORDS = 14
+# Paced replay of hits: ~150 tokens/s, similar to a live stream
+DEFAULT_CHARS_PER_SECOND = 600
+REPLAY_CHUNK_CHARS = 24
+
+
+@dataclass(frozen=True)
+class QuestionClass:
+    """A family of repeat questions whose answers may be cached."""
+
+    name: str
+    patterns: Tuple[str, ...]
+    ttl_seconds: int
+    # Answer is about "today" - include the date in the key
+    date_scoped: bool = False
+
+
+QUESTION_CLASSES: Dict[str, QuestionClass] = {
+    qc.name: qc
+    for qc in [
+        QuestionClass(
+            name="daily_plan",
+            patterns=(
+                r"^what (should|do|can) i (train|do|work on|hit)( today| now)?$",
+                r"^what is (my|the) (workout|session|plan|training)( for)? today$",
+                r"^what (workout|session|training) (should|do|can) i do( today)?$",
+                r"^what should i do (at )?(the )?gym( today)?$",
+            ),
+            ttl_seconds=12 * 3600,
+            date_scoped=True,
+        ),
+        QuestionClass(
+            name="progress_check",
+            patterns=(
+                r"^how is my [a-z ]{2,30} (progress|progressing|going|coming along)$",
+                r"^how am i (progressing|doing) (on|with|in) (my )?[a-z ]{2,30}$",
+                r"^am i (making progress|progressing|getting stronger)( on| with| in)?( my)?[a-z ]{0,30}$",
+            ),
+            ttl_seconds=24 * 3600,
+        ),
+    ]
+}
+
+_COMPILED = {
+    name: [re.compile(p) for p in qc.patterns] for name, qc in QUESTION_CLASSES.items()
+}
+
+_CONTRACTIONS = {
+    "what's": "what is",
+    "how's": "how is",
+    "whats": "what is",
+    "hows": "how is",
+    "i'm": "i am",
+    "im": "i am",
+    "should've": "should have",
+}
+_FILLER = {"hey", "hi", "hello", "coach", "please", "so", "ok", "okay", "um", "just", "again", "actually"}
+
+
+def normalize_question(message: str) -> str:
+    """Lowercase, expand contractions, drop punctuation and filler words."""
+    text = message.lower().replace("’", "'")
+    words = []
+    for word in re.findall(r"[a-z0-9']+", text):
+        word = _CONTRACTIONS.get(word, word).strip("'")
+        if word and word not in _FILLER:
+            words.append(word)
+    return " ".join(words)
+
+
+def classify_question(normalized: str) -> Optional[str]:
+    """Question class for a normalized question, or None."""
+    if not normalized or len(normalized.split()) > MAX_QUESTION_WORDS:
+        return None
+    for name, patterns in _COMPILED.items():
+        if any(p.search(normalized) for p in patterns):
+            return name
+    return None
+
+
+def memory_version(ai_memory: Any) -> str:
+    """Short fingerprint of a bundle's ai_memory."""
+    payload = json.dumps(ai_memory, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def _enabled_classes() -> set:
+    raw = os.environ.get("COACH_ANSWER_CACHE_CLASSES", "")
+    return {c.strip() for c in raw.split(",") if c.strip() in QUESTION_CLASSES}
+
+
+class AnswerCache:
+    """Per-user LRU of coach answers for opted-in question classes."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.enabled_classes = _enabled_classes()
+        self.chars_per_second = float(
+            os.environ.get("COACH_ANSWER_CACHE_CHARS_PER_SEC", DEFAULT_CHARS_PER_SECOND)
+        )
+        # Filled with set() after a live answer - never loads; TTL per class
+        self._cache: AsyncCache[Tuple, str] = AsyncCache(
+            "answer_cache", max_entries=max_entries
+        )
+        self.class_stats: Dict[str, Dict[str, int]] = {}
+
+    def make_key(
+        self,
+        user_id: str,
+        message: str,
+        bundle_id: Optional[str],
+        memory_ver: str,
+    ) -> Optional[Tuple]:
+        """
+        Cache key for a message, or None if its class is not cacheable.
+        """
+        if not self.enabled_classes or not user_id or not bundle_id:
+            return None
+        normalized = normalize_question(message)
+        question_class = classify_question(normalized)
+        if question_class not in self.enabled_classes:
+            return None
+        day = date.today().isoformat() if QUESTION_CLASSES[question_class].date_scoped else ""
+        return (user_id, question_class, normalized, str(bundle_id), memory_ver, day)
+
+    def get(self, key: Tuple) -> Optional[str]:
+        answer = self._cache.lookup(key)
+        class_stats = self.class_stats.setdefault(key[1], {"hits": 0, "misses": 0, "stores": 0})
+        if answer is None:
+            class_stats["misses"] += 1
+            return None
+
+        class_stats["hits"] += 1
+        logger.info(f"💾 Answer cache hit [{key[1]}]: {key[2]!r}")
+        return answer
+
+    def set(self, key: Tuple, answer: str) -> None:
+        if not answer:
+            return
+        self._cache.set(key, answer, ttl=QUESTION_CLASSES[key[1]].ttl_seconds)
+        self.class_stats.setdefault(key[1], {"hits": 0, "misses": 0, "stores": 0})["stores"] += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop a user's answers (new bundle, memory or profile saved)."""
+        dropped = self._cache.invalidate_where(lambda key: key[0] == user_id)
+        if dropped:
+            logger.info(f"🗑️ Answer cache: invalidated {dropped} answers for user {user_id}")
+
+    async def replay(self, answer: str) -> AsyncGenerator[str, None]:
+        """Stream a cached answer in word-aligned chunks at model-like speed."""
+        delay = REPLAY_CHUNK_CHARS / self.chars_per_second if self.chars_per_second > 0 else 0
+        chunk = ""
+        for piece in re.split(r"(?<=\s)", answer):
+            chunk += piece
+            if len(chunk) >= REPLAY_CHUNK_CHARS:
+                yield chunk
+                chunk = ""
+                if delay:
+                    await asyncio.sleep(delay)
+        if chunk:
+            yield chunk
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled_classes": sorted(self.enabled_classes),
+            **self._cache.get_stats(),
+            "classes": {
+                name: {
+                    **s,
+                    "hit_rate": round(s["hits"] / (s["hits"] + s["misses"]), 3)
+                    if s["hits"] + s["misses"]
+                    else 0,
+                }
+                for name, s in self.class_stats.items()
+            },
+        }
+
+
+# Singleton instance for easy import
+answer_cache = AnswerCache()
+
+event_bus.subscribe(
+    (BundleReady, MemoryAppended, ProfileUpdated),
+    lambda event: answer_cache.invalidate_user(event.user_id),
+)
@@ -0,0 +1,297 @@
+"""
+Async in-memory cache used by the backend's per-key caches
+
+One component for values loaded from the database (shared context,
+conversation context, reference data) instead of a dict + timestamp per
+service:
+
+- bounded LRU: at most max_entries, least recently used evicted first
+- per-entry TTL: a value is fresh for ttl_seconds (or the ttl given to
+  get/set/refresh for that entry)
+- stale-while-revalidate: for stale_ttl_seconds after that (None = forever)
+  the stale value is still served while a background load refreshes it; a
+  failed background load is retried after retry_after_seconds
+- single-flight: concurrent misses and refreshes of a key share one load
+- invalidate() drops an entry (invalidate_where() every matching one); a
+  load already in flight for it is detached (its callers get its result,
+  but it is not cached)
+- metrics: hits, stale hits, misses, loads, load errors, evictions,
+  expirations, invalidations and load latency, per cache (get_stats()) and
+  for every cache (cache_stats())
+
+Loads run as tasks, so a caller that gives up (e.g. a closed WebSocket) does
+not cancel the load for the others.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+LATENCY_SAMPLES = 256  # recent loads kept for latency stats
+
+# Every cache by name, for cache_stats()
+_caches: "weakref.WeakValueDictionary[str, AsyncCache]" = weakref.WeakValueDictionary()
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "retry_at")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: Optional[float]):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until  # None: servable forever
+        self.retry_at = 0.0  # no background load before this (after a failure)
+
+    def servable(self, now: float) -> bool:
+        return self.stale_until is None or now < self.stale_until
+
+
+class AsyncCache(Generic[K, V]):
+    """Bounded LRU with TTL, single-flight loads and stale-while-revalidate."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300,
+        stale_ttl_seconds: Optional[float] = 0,
+        retry_after_seconds: float = 30,
+        loader: Optional[Callable[[K], Awaitable[V]]] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.loader = loader
+        self._entries: "OrderedDict[K, _Entry]" = OrderedDict()
+        self._loading: Dict[K, asyncio.Task] = {}
+        self._detached: Set[asyncio.Task] = set()
+        self._load_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+        _caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self,
+        key: K,
+        loader: Optional[Callable[[], Awaitable[V]]] = None,
+        ttl: Optional[float] = None,
+    ) -> V:
+        """
+        The cached value, loading it on a miss (loader, else the cache's
+        loader(key)). Load errors propagate to the callers and are not cached.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.value
+            if entry.servable(now):
+                self._entries.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                if now >= entry.retry_at and key not in self._loading:
+                    self._start_load(key, loader, ttl)
+                return entry.value
+            del self._entries[key]
+            self.stats["expirations"] += 1
+
+        self.stats["misses"] += 1
+        task = self._loading.get(key) or self._start_load(key, loader, ttl)
+        return await asyncio.shield(task)
+
+    async def refresh(
+        self,
+        key: K,
+        loader: Optional[Callable[[], Awaitable[V]]] = None,
+        ttl: Optional[float] = None,
+    ) -> V:
+        """Load now (or join the load in flight); the current entry is served meanwhile."""
+        task = self._loading.get(key) or self._start_load(key, loader, ttl)
+        return await asyncio.shield(task)
+
+    def prefetch(
+        self,
+        key: K,
+        loader: Optional[Callable[[], Awaitable[V]]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Start loading a key in the background unless it is fresh or loading."""
+        if key in self._loading or self.is_fresh(key):
+            return
+        self._start_load(key, loader, ttl)
+
+    def lookup(self, key: K) -> Optional[V]:
+        """
+        The cached value if fresh, else None - counted as a hit or miss, but
+        never loads (for caches filled with set(), e.g. generated answers).
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.value
+            del self._entries[key]
+            self.stats["expirations"] += 1
+        self.stats["misses"] += 1
+        return None
+
+    def peek(self, key: K) -> Optional[V]:
+        """The cached value if servable, without loading or counting a hit."""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None and entry.servable(time.monotonic()) else None
+
+    def is_fresh(self, key: K) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() < entry.expires_at
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        self._store(key, value, ttl)
+
+    def invalidate(self, key: K) -> bool:
+        """Drop a key. Returns True if an entry was cached."""
+        task = self._loading.pop(key, None)
+        if task is not None:
+            self._detached.add(task)
+        if self._entries.pop(key, None) is None:
+            return False
+        self.stats["invalidations"] += 1
+        return True
+
+    def invalidate_where(self, predicate: Callable[[K], bool]) -> int:
+        """Drop every key matching predicate (e.g. a user's). Returns how many were cached."""
+        dropped = 0
+        for key in [k for k in (*self._entries, *self._loading) if predicate(k)]:
+            dropped += self.invalidate(key)
+        return dropped
+
+    def clear(self) -> None:
+        for key in list(self._loading):
+            self.invalidate(key)
+        self.stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def purge_expired(self) -> int:
+        """Drop entries that can no longer be served. Returns how many."""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if not entry.servable(now)]
+        for key in expired:
+            del self._entries[key]
+        self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        samples = sorted(self._load_ms)
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "loading": len(self._loading),
+            **self.stats,
+            "hit_rate": (
+                round((self.stats["hits"] + self.stats["stale_hits"]) / lookups, 3)
+                if lookups
+                else None
+            ),
+            "load_ms_avg": round(sum(samples) / len(samples), 1) if samples else None,
+            "load_ms_p95": round(samples[int(len(samples) * 0.95)], 1) if samples else None,
+            "load_ms_max": round(samples[-1], 1) if samples else None,
+        }
+
+    # =========================
+    # INTERNAL IMPLEMENTATION
+    # =========================
+
+    def _store(self, key: K, value: V, ttl: Optional[float]) -> None:
+        now = time.monotonic()
+        expires_at = now + (self.ttl_seconds if ttl is None else ttl)
+        stale_until = (
+            None if self.stale_ttl_seconds is None else expires_at + self.stale_ttl_seconds
+        )
+        self._entries[key] = _Entry(value, expires_at, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _start_load(
+        self,
+        key: K,
+        loader: Optional[Callable[[], Awaitable[V]]],
+        ttl: Optional[float],
+    ) -> asyncio.Task:
+        if loader is None:
+            if self.loader is None:
+                raise ValueError(f"No loader for {self.name} cache")
+            default_loader = self.loader
+            loader = lambda: default_loader(key)  # noqa: E731
+
+        task = asyncio.get_running_loop().create_task(self._load(key, loader, ttl))
+        self._loading[key] = task
+        task.add_done_callback(lambda t: self._finish_load(key, t))
+        return task
+
+    async def _load(self, key: K, loader: Callable[[], Awaitable[V]], ttl: Optional[float]) -> V:
+        start = time.perf_counter()
+        try:
+            value = await loader()
+        except Exception as e:
+            self.stats["load_errors"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Keep serving the stale value; retry later
+                entry.retry_at = time.monotonic() + self.retry_after_seconds
+            logger.warning(f"⚠️ {self.name} cache load failed for {key}: {e}")
+            raise
+        finally:
+            self._load_ms.append((time.perf_counter() - start) * 1000)
+
+        self.stats["loads"] += 1
+        if asyncio.current_task() not in self._detached:
+            self._store(key, value, ttl)
+        return value
+
+    def _finish_load(self, key: K, task: asyncio.Task) -> None:
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        self._detached.discard(task)
+        if not task.cancelled():
+            task.exception()  # Retrieved: background loads may have no awaiter
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """get_stats() of every AsyncCache, by name."""
+    return {name: cache.get_stats() for name, cache in sorted(_caches.items())}
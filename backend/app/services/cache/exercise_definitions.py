@@ -1,19 +1,69 @@
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional
 import logging
 
+from app.core.events import DefinitionsChanged, event_bus
+from app.services.cache.async_cache import AsyncCache
+from app.services.cache.exercise_index import EMPTY_INDEX, ExerciseCatalogIndex
+from app.services.cache.exercise_search import EMPTY_SEARCH_INDEX, ExerciseSearchIndex
+from app.services.cache.reference_snapshot import ReferenceSnapshot
+from app.services.cache.reference_sync import ReferenceSync
+
 logger = logging.getLogger(__name__)
 
 
+class ExerciseCatalog(NamedTuple):
+    """One loaded catalog with everything derived from it."""
+
+    rows: List[Dict[str, Any]]
+    index: ExerciseCatalogIndex
+    search: ExerciseSearchIndex
+    version: Optional[str]
+    source: Optional[str]  # snapshot | database
+
+
+EMPTY_CATALOG = ExerciseCatalog([], EMPTY_INDEX, EMPTY_SEARCH_INDEX, None, None)
+
+
 class ExerciseDefinitionCache:
     """
     In-memory cache for exercise definitions.
     Refreshes hourly to keep data current without DB hits on every request.
+
+    Each refresh also builds an ExerciseCatalogIndex (inverted indexes by
+    muscle, base movement, equipment and type - see exercise_index), so
+    lookups are set operations instead of catalog scans, and an
+    ExerciseSearchIndex for typo-tolerant name search (see exercise_search).
+
+    The catalog is persisted as a local snapshot (see reference_snapshot):
+    at boot it is served from disk, and once stale it is revalidated in the
+    background - the table is only re-downloaded when its version (row count
+    + latest updated_at) changed. Readers only wait on the database when
+    there is nothing to serve yet.
+
+    The catalog lives in a single-entry AsyncCache (served stale while it
+    revalidates; a failed revalidation is retried after the next interval).
+    The /exercise-definitions endpoint is served through a ReferenceSync
+    (ETag + deltas, see reference_sync) updated on every load. A download
+    whose content differs from the catalog it replaces publishes
+    DefinitionsChanged.
     """
 
-    _cache: Optional[List[Dict[str, Any]]] = None
-    _last_refresh: Optional[datetime] = None
+    _KEY = "catalog"
     _refresh_interval = 3600  # 1 hour in seconds
+    _store: AsyncCache[str, ExerciseCatalog] = AsyncCache(
+        "exercise_definitions",
+        max_entries=1,
+        ttl_seconds=_refresh_interval,
+        stale_ttl_seconds=None,
+        retry_after_seconds=_refresh_interval,
+    )
+    _last_refresh: Optional[datetime] = None
+    _save_task: Optional[asyncio.Task] = None
+    _publish_task: Optional[asyncio.Task] = None
+    _snapshot = ReferenceSnapshot("exercise_definitions")
+    _sync = ReferenceSync("exercise_definitions")
 
     @classmethod
     async def get_all_exercises(cls) -> List[Dict[str, Any]]:
@@ -23,17 +73,82 @@ class ExerciseDefinitionCache:
         Returns:
             List of exercise definition dicts
         """
-        now = datetime.now()
+        return (await cls._catalog()).rows
+
+    @classmethod
+    async def get_index(cls) -> ExerciseCatalogIndex:
+        """
+        Get the catalog index, refresh if stale or empty.
+
+        Returns:
+            ExerciseCatalogIndex (empty if the catalog could not be loaded)
+        """
+        return (await cls._catalog()).index
+
+    @classmethod
+    async def get_search_index(cls) -> ExerciseSearchIndex:
+        """
+        Get the name search index, refresh if stale or empty.
+
+        Returns:
+            ExerciseSearchIndex (empty if the catalog could not be loaded)
+        """
+        return (await cls._catalog()).search
+
+    @classmethod
+    async def get_sync(cls) -> ReferenceSync:
+        """
+        Get the conditional/delta sync state, refresh if stale or empty.
+
+        Returns:
+            ReferenceSync for the current catalog
+        """
+        await cls._catalog()
+        return cls._sync
+
+    @classmethod
+    async def _catalog(cls) -> ExerciseCatalog:
+        # First load waits for the database; a stale catalog is served while
+        # it revalidates in the background
+        try:
+            return await cls._store.get(cls._KEY, cls._revalidate)
+        except Exception:
+            return EMPTY_CATALOG
+
+    @classmethod
+    def load_snapshot(cls) -> bool:
+        """
+        Serve the catalog from the local snapshot (boot). Call revalidate()
+        afterwards to pick up changes made since it was saved.
 
-        # First load or cache expired
-        if (
-            cls._cache is None
-            or cls._last_refresh is None
-            or (now - cls._last_refresh).total_seconds() > cls._refresh_interval
-        ):
-            await cls.refresh()
+        Returns:
+            bool: True if a snapshot was loaded
+        """
+        snapshot = cls._snapshot.load()
+        if not snapshot or not snapshot["rows"]:
+            return False
 
-        return cls._cache or []
+        catalog = cls._build(snapshot["rows"], snapshot.get("version"), "snapshot")
+        cls._store.set(cls._KEY, catalog)
+        logger.info(
+            f"🗂️ Exercise cache loaded from snapshot: {len(catalog.rows)} exercises "
+            f"(version {catalog.version}, saved {snapshot.get('saved_at')})"
+        )
+        return True
+
+    @classmethod
+    async def revalidate(cls) -> bool:
+        """
+        Refresh only if the table changed since the cached version.
+
+        Returns:
+            bool: True if the cache is current
+        """
+        try:
+            await cls._store.refresh(cls._KEY, cls._revalidate)
+            return True
+        except Exception:
+            return False
 
     @classmethod
     async def refresh(cls) -> bool:
@@ -44,37 +159,79 @@ class ExerciseDefinitionCache:
             bool: True if refresh successful
         """
         try:
-            from app.services.db.exercise_definition_service import (
-                ExerciseDefinitionService,
-            )
-
-            service = ExerciseDefinitionService()
-            result = await service.get_all_exercise_definitions_admin()
+            await cls._store.refresh(cls._KEY, cls._download)
+            return True
+        except Exception:
+            return False
 
-            if result.get("success") and result.get("data"):
-                cls._cache = result["data"]
+    @classmethod
+    async def _revalidate(cls) -> ExerciseCatalog:
+        """Cache loader: keep the current catalog if its version is unchanged."""
+        from app.services.db.exercise_definition_service import (
+            ExerciseDefinitionService,
+        )
+
+        current = cls._store.peek(cls._KEY)
+        if current is not None and current.version:
+            result = await ExerciseDefinitionService().get_exercise_definitions_version_admin()
+            if result.get("success") and result["data"] == current.version:
                 cls._last_refresh = datetime.now()
-                logger.info(
-                    f"✅ Exercise cache refreshed: {len(cls._cache)} exercises loaded"
-                )
-                return True
-            else:
-                logger.error(
-                    f"❌ Failed to refresh exercise cache: {result.get('error')}"
-                )
-                return False
-
-        except Exception as e:
-            logger.error(
-                f"❌ Exception refreshing exercise cache: {str(e)}", exc_info=True
+                logger.info(f"✅ Exercise cache unchanged (version {current.version})")
+                return current
+        return await cls._download()
+
+    @classmethod
+    async def _download(cls) -> ExerciseCatalog:
+        """Cache loader: fetch the whole catalog and build its indexes."""
+        from app.services.db.exercise_definition_service import (
+            ExerciseDefinitionService,
+        )
+
+        service = ExerciseDefinitionService()
+        # Version first: a change racing the download is caught next time
+        version_result = await service.get_exercise_definitions_version_admin()
+        result = await service.get_all_exercise_definitions_admin()
+
+        if not (result.get("success") and result.get("data")):
+            logger.error(f"❌ Failed to refresh exercise cache: {result.get('error')}")
+            raise RuntimeError(result.get("error") or "No exercise definitions")
+
+        version = version_result.get("data") if version_result.get("success") else None
+        previous = cls._sync.version
+        catalog = cls._build(result["data"], version, "database")
+        logger.info(
+            f"✅ Exercise cache refreshed: {len(catalog.rows)} exercises loaded "
+            f"({len(catalog.index.by_muscle)} muscle keys, "
+            f"{len(catalog.index.by_base_movement)} movements indexed)"
+        )
+        if version:
+            cls._save_task = asyncio.create_task(cls._snapshot.save(version, result["data"]))
+        if previous and cls._sync.version != previous:
+            # As a task: it runs once the new catalog is stored
+            cls._publish_task = asyncio.create_task(
+                event_bus.publish(DefinitionsChanged(version=cls._sync.version))
             )
-            return False
+        return catalog
+
+    @classmethod
+    def _build(
+        cls, rows: List[Dict[str, Any]], version: Optional[str], source: str
+    ) -> ExerciseCatalog:
+        """Build the indexes (and sync state) for a new catalog."""
+        index = ExerciseCatalogIndex(rows)
+        catalog = ExerciseCatalog(rows, index, ExerciseSearchIndex(index), version, source)
+        cls._sync.update(rows)
+        cls._last_refresh = datetime.now()
+        return catalog
 
     @classmethod
     def get_cache_stats(cls) -> Dict[str, Any]:
         """Get cache statistics for monitoring/debugging"""
+        catalog = cls._store.peek(cls._KEY) or EMPTY_CATALOG
         return {
-            "cached_count": len(cls._cache) if cls._cache else 0,
+            "cached_count": len(catalog.rows),
+            "version": catalog.version,
+            "source": catalog.source,
             "last_refresh": (
                 cls._last_refresh.isoformat() if cls._last_refresh else None
             ),
@@ -83,18 +240,11 @@ class ExerciseDefinitionCache:
                 if cls._last_refresh
                 else None
             ),
-            "is_stale": cls._is_stale(),
+            "is_stale": not cls._store.is_fresh(cls._KEY),
+            "sync": cls._sync.get_stats(),
+            "store": cls._store.get_stats(),
         }
 
-    @classmethod
-    def _is_stale(cls) -> bool:
-        """Check if cache is stale"""
-        if cls._last_refresh is None:
-            return True
-        return (
-            datetime.now() - cls._last_refresh
-        ).total_seconds() > cls._refresh_interval
-
 
 # Singleton instance for easy import
 exercise_cache = ExerciseDefinitionCache()
@@ -0,0 +1,150 @@
+"""
+Inverted indexes over the exercise definition catalog
+
+Built by ExerciseDefinitionCache on every refresh, so lookups never scan or
+re-normalize the catalog. Each exercise is a position in `entries`; every
+index maps a normalized key to the frozenset of positions having it:
+
+- by_muscle:        primary muscle -> positions; MUSCLE_EXPANSIONS groups
+                    ('back', 'legs', ...) are pre-applied as extra keys
+- by_base_movement, by_equipment
+- by_type:          'cardio' (cardiovascular_system primary), 'mobility'
+                    (mobility base movement), 'strength' (neither)
+
+so a lookup is a union/intersection of a few sets. Tool result dicts for a
+field list are condensed once per catalog (see condensed()).
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+# Muscle group expansion mapping
+MUSCLE_EXPANSIONS = {
+    "back": ["back", "lats", "traps", "upper_back", "lower_back", "erector_spinae"],
+    "legs": ["quadriceps", "hamstrings", "glutes", "calves", "quads", "hams", "abductors", "adductors"],
+    "core": ["abs", "obliques", "lower_back", "core", "rectus_abdominis"],
+    "arms": ["biceps", "triceps", "forearms", "brachialis"],
+    "shoulders": ["shoulders", "deltoids", "traps", "anterior_deltoid", "lateral_deltoid", "posterior_deltoid"],
+    "chest": ["chest", "pectorals", "pectoralis_major", "pectoralis_minor"]
+}
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+def normalize(value: Any) -> str:
+    return str(value).lower().strip() if value else ""
+
+
+def expand_muscles(muscle_groups: Optional[Iterable[str]]) -> Tuple[set, set]:
+    """Returns (requested, expanded) normalized muscle sets."""
+    requested = {normalize(mg) for mg in muscle_groups or [] if normalize(mg)}
+    expanded = set(requested)
+    for mg in requested:
+        expanded.update(MUSCLE_EXPANSIONS.get(mg, []))
+    return requested, expanded
+
+
+class IndexedExercise(NamedTuple):
+    """Exercise with fields pre-normalized once per catalog refresh."""
+
+    exercise: Dict[str, Any]
+    primary: frozenset
+    secondary: frozenset
+    equipment: str
+    base_movement: str
+    is_cardio: bool
+    is_mobility: bool
+
+
+class ExerciseCatalogIndex:
+    """Read-only indexes over one catalog snapshot."""
+
+    def __init__(self, exercises: List[Dict[str, Any]]):
+        self.exercises = exercises
+        self.entries: List[IndexedExercise] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        # {definition_id: primary_muscles} as stored (dashboard muscle mapping)
+        self.primary_muscles: Dict[str, List[str]] = {}
+        self.bodyweight_ids: FrozenSet[str] = frozenset(
+            ex["id"] for ex in exercises if ex.get("id") and ex.get("is_bodyweight")
+        )
+        by_muscle: Dict[str, set] = {}
+        by_base_movement: Dict[str, set] = {}
+        by_equipment: Dict[str, set] = {}
+        by_type: Dict[str, set] = {"strength": set(), "cardio": set(), "mobility": set()}
+
+        for pos, ex in enumerate(exercises):
+            primary = frozenset(normalize(m) for m in ex.get("primary_muscles") or [])
+            base_movement = normalize(ex.get("base_movement"))
+            entry = IndexedExercise(
+                exercise=ex,
+                primary=primary,
+                secondary=frozenset(normalize(m) for m in ex.get("secondary_muscles") or []),
+                equipment=normalize(ex.get("equipment")),
+                base_movement=base_movement,
+                is_cardio="cardiovascular_system" in primary,
+                is_mobility=base_movement == "mobility",
+            )
+            self.entries.append(entry)
+            if ex.get("id"):
+                self.by_id[ex["id"]] = ex
+                muscles = ex.get("primary_muscles")
+                self.primary_muscles[ex["id"]] = muscles if isinstance(muscles, list) else []
+
+            for muscle in primary:
+                by_muscle.setdefault(muscle, set()).add(pos)
+            by_base_movement.setdefault(base_movement, set()).add(pos)
+            by_equipment.setdefault(entry.equipment, set()).add(pos)
+            if entry.is_cardio:
+                by_type["cardio"].add(pos)
+            if entry.is_mobility:
+                by_type["mobility"].add(pos)
+            if not (entry.is_cardio or entry.is_mobility):
+                by_type["strength"].add(pos)
+
+        # Groups resolve to every position with a primary muscle in the group
+        for group, muscles in MUSCLE_EXPANSIONS.items():
+            positions = set(by_muscle.get(group, ()))
+            for muscle in muscles:
+                positions |= by_muscle.get(muscle, set())
+            by_muscle[group] = positions
+
+        self.by_muscle = _freeze(by_muscle)
+        self.by_base_movement = _freeze(by_base_movement)
+        self.by_equipment = _freeze(by_equipment)
+        self.by_type = _freeze(by_type)
+        self._condensed: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def muscle_matches(self, muscles: Iterable[str]) -> FrozenSet[int]:
+        """Positions with a primary mover among the (normalized) muscles or groups."""
+        matches: FrozenSet[int] = _EMPTY
+        for muscle in muscles:
+            matches = matches | self.by_muscle.get(muscle, _EMPTY)
+        return matches
+
+    def equipment_matches(self, equipment: Optional[Iterable[str]]) -> FrozenSet[int]:
+        matches: FrozenSet[int] = _EMPTY
+        for item in equipment or []:
+            matches = matches | self.by_equipment.get(normalize(item), _EMPTY)
+        return matches
+
+    def condensed(self, fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Per-position result dicts holding only `fields`, built once per field list."""
+        rows = self._condensed.get(fields)
+        if rows is None:
+            rows = [
+                {field: entry.exercise.get(field) for field in fields}
+                for entry in self.entries
+            ]
+            self._condensed[fields] = rows
+        return rows
+
+
+def _freeze(index: Dict[str, set]) -> Dict[str, FrozenSet[int]]:
+    return {key: frozenset(positions) for key, positions in index.items()}
+
+
+# Index for an empty / not yet loaded catalog
+EMPTY_INDEX = ExerciseCatalogIndex([])
@@ -0,0 +1,164 @@
+import asyncio
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+import logging
+
+from app.services.cache.async_cache import AsyncCache
+
+logger = logging.getLogger(__name__)
+
+
+class ExercisePopularityCache:
+    """
+    Global exercise popularity, from how often each definition is logged.
+
+    Scores are log-scaled to 0-1 (most-logged exercise = 1.0) and used as a
+    ranking signal by the coach's exercise tools. They live in a
+    single-entry AsyncCache refreshed every 6 hours: stale scores are served
+    while they revalidate in the background, so readers only wait on the
+    database when there is nothing to serve yet.
+    """
+
+    _KEY = "scores"
+    _refresh_interval = 6 * 3600  # 6 hours in seconds
+    _store: AsyncCache[str, Dict[str, float]] = AsyncCache(
+        "exercise_popularity",
+        max_entries=1,
+        ttl_seconds=_refresh_interval,
+        stale_ttl_seconds=None,
+        retry_after_seconds=_refresh_interval,
+    )
+    _last_refresh: Optional[datetime] = None
+
+    # Count over the most recent N logged exercises across all users
+    _max_rows = 50000
+    # Single-query fallback while the grouped count RPC is not deployed
+    _fallback_rows = 1000
+
+    @classmethod
+    async def get_score(cls, definition_id: str) -> float:
+        """Popularity score in [0, 1] (0 for unknown exercises)."""
+        return (await cls.get_scores()).get(definition_id, 0.0)
+
+    @classmethod
+    async def get_scores(cls) -> Dict[str, float]:
+        """All popularity scores {definition_id: score} (empty if never loaded)."""
+        try:
+            return await cls._store.get(cls._KEY, cls._load)
+        except Exception:
+            return {}
+
+    @classmethod
+    async def refresh(cls) -> bool:
+        """
+        Recount definition usage now (startup warm-up).
+
+        Returns:
+            bool: True if refresh successful
+        """
+        try:
+            await cls._store.refresh(cls._KEY, cls._load)
+            return True
+        except Exception:
+            return False
+
+    @classmethod
+    async def _load(cls) -> Dict[str, float]:
+        """Cache loader: recount definition usage from workout_exercises."""
+        try:
+            from app.core.supabase.client import supabase_factory
+
+            client = supabase_factory.get_admin_client()
+            counts = await cls._usage_counts(client)
+
+            scores: Dict[str, float] = {}
+            if counts:
+                top = math.log1p(max(counts.values()))
+                scores = {def_id: math.log1p(n) / top for def_id, n in counts.items()}
+
+            cls._last_refresh = datetime.now()
+            logger.info(
+                f"✅ Exercise popularity refreshed: {len(scores)} exercises scored "
+                f"from {sum(counts.values())} logged exercises"
+            )
+            return scores
+
+        except Exception as e:
+            # Previous scores stay served; retried after the next interval
+            logger.error(
+                f"❌ Exception refreshing exercise popularity: {str(e)}", exc_info=True
+            )
+            raise
+
+    @classmethod
+    async def _usage_counts(cls, client) -> Counter:
+        """
+        Times each definition was logged, from one grouped count in the
+        database (get_exercise_usage_counts RPC):
+
+            create function get_exercise_usage_counts(p_max_rows int)
+            returns table (definition_id uuid, uses bigint)
+            language sql stable as $$
+              select definition_id, count(*) as uses
+              from (
+                select definition_id from workout_exercises
+                where definition_id is not null
+                order by created_at desc
+                limit p_max_rows
+              ) recent
+              group by definition_id
+              order by uses desc
+            $$;
+
+        Until it is deployed, counts the latest _fallback_rows rows from a
+        single query instead.
+        """
+        try:
+            response = await asyncio.to_thread(
+                lambda: client.rpc(
+                    "get_exercise_usage_counts", {"p_max_rows": cls._max_rows}
+                ).execute()
+            )
+            return Counter(
+                {
+                    r["definition_id"]: int(r["uses"])
+                    for r in response.data or []
+                    if r.get("definition_id")
+                }
+            )
+        except Exception as e:
+            logger.warning(
+                f"⚠️ get_exercise_usage_counts RPC failed ({e}), "
+                f"counting the latest {cls._fallback_rows} logged exercises"
+            )
+
+        response = await asyncio.to_thread(
+            lambda: client.table("workout_exercises")
+            .select("definition_id")
+            .not_.is_("definition_id", "null")
+            .order("created_at", desc=True)
+            .limit(cls._fallback_rows)
+            .execute()
+        )
+        return Counter(
+            r["definition_id"] for r in response.data or [] if r.get("definition_id")
+        )
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """Get cache statistics for monitoring/debugging"""
+        scores = cls._store.peek(cls._KEY)
+        return {
+            "scored_count": len(scores) if scores else 0,
+            "last_refresh": (
+                cls._last_refresh.isoformat() if cls._last_refresh else None
+            ),
+            "is_stale": not cls._store.is_fresh(cls._KEY),
+            "store": cls._store.get_stats(),
+        }
+
+
+# Singleton instance for easy import
+exercise_popularity = ExercisePopularityCache()
@@ -0,0 +1,258 @@
+"""
+Typo-tolerant name search over the exercise definition catalog
+
+Built from an ExerciseCatalogIndex on every catalog refresh. Each exercise is
+a bag of words taken from its standard_name, its aliases and its equipment,
+plus the joined form of adjacent words ("pull up" -> "pullup") and the
+initials of multi-word names/aliases ("bulgarian split squat" -> "bss").
+
+A query word matches catalog words by, in order of strength:
+
+- exact word
+- prefix ("benc" -> "bench")
+- fuzzy: padded trigram overlap (Jaccard), or edit distance for short typos
+  ("benh" -> "bench", "bnech" -> "bench"); candidates come from a trigram ->
+  word index, so only words sharing trigrams are ever compared
+
+Common gym abbreviations ("rdl", "ohp", "db") are expanded before matching.
+An exercise scores the mean of its best match per query word, plus bonuses
+for matching its whole name or an alias, for covering most of its name, and
+for popularity. Only the top `limit` results are ranked (bounded heap).
+"""
+
+import bisect
+import heapq
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.services.cache.exercise_index import ExerciseCatalogIndex
+
+# Abbreviations -> words, applied per query word
+ABBREVIATIONS = {
+    "rdl": "romanian deadlift",
+    "sldl": "stiff leg deadlift",
+    "sl": "single leg",
+    "dl": "deadlift",
+    "ohp": "overhead press",
+    "ohs": "overhead squat",
+    "bp": "bench press",
+    "cgbp": "close grip bench press",
+    "bss": "bulgarian split squat",
+    "ghr": "glute ham raise",
+    "hspu": "handstand push up",
+    "bb": "barbell",
+    "db": "dumbbell",
+    "kb": "kettlebell",
+    "bw": "bodyweight",
+    "ez": "ez bar",
+}
+
+# Word match strengths
+PREFIX_SIMILARITY = 0.9
+FUZZY_DISCOUNT = 0.85  # fuzzy similarity is scaled below a prefix match
+MIN_WORD_SIMILARITY = 0.6  # one edit in four letters, before the discount
+MIN_FUZZY_LENGTH = 4  # shorter words only match exactly or by prefix
+
+# Exercise ranking
+MIN_SCORE = 0.55  # more than half of a two-word query must match
+PHRASE_BONUS = 0.5  # query is the exercise's name or one of its aliases
+COVERAGE_WEIGHT = 0.2  # share of the exercise's words the query matched
+POPULARITY_WEIGHT = 0.1
+
+# Per-catalog memo of query word -> matched words
+WORD_MATCH_MEMO_MAX = 4096
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _NON_ALNUM.sub(" ", str(text).lower()).split() if text else []
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - (optimal string alignment distance / longer length)."""
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    prev2: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [i] + [0] * lb
+        for j in range(1, lb + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return 1.0 - prev[lb] / max(la, lb)
+
+
+def _phrase(words: List[str]) -> str:
+    return " ".join(words)
+
+
+class ExerciseSearchIndex:
+    """Read-only search structures over one catalog snapshot."""
+
+    def __init__(self, index: ExerciseCatalogIndex):
+        self.index = index
+        word_positions: Dict[str, set] = {}
+        phrase_positions: Dict[str, set] = {}
+        # Words in each standard_name: coverage is judged against the name
+        self.name_lengths: List[int] = []
+        self._ids: List[Optional[str]] = []
+        self._names: List[str] = []
+
+        for pos, entry in enumerate(index.entries):
+            ex = entry.exercise
+            names = [ex.get("standard_name")] + list(ex.get("aliases") or [])
+            name_words = [tokenize(name) for name in names]
+            name_words = [words for words in name_words if words]
+
+            bag = set(tokenize(ex.get("equipment")))
+            for words in name_words:
+                bag.update(words)
+                bag.update(a + b for a, b in zip(words, words[1:]))
+                phrase_positions.setdefault(_phrase(words), set()).add(pos)
+                if len(words) > 1:
+                    phrase_positions.setdefault("".join(w[0] for w in words), set()).add(pos)
+            for word in bag:
+                word_positions.setdefault(word, set()).add(pos)
+
+            self.name_lengths.append(max(1, len(tokenize(ex.get("standard_name")))))
+            self._ids.append(ex.get("id"))
+            self._names.append(ex.get("standard_name") or "")
+
+        self.word_positions: Dict[str, FrozenSet[int]] = {
+            word: frozenset(positions) for word, positions in word_positions.items()
+        }
+        self.phrase_positions: Dict[str, FrozenSet[int]] = {
+            phrase: frozenset(positions) for phrase, positions in phrase_positions.items()
+        }
+        self.vocabulary: List[str] = sorted(self.word_positions)
+        self._word_trigrams: Dict[str, FrozenSet[str]] = {}
+        by_trigram: Dict[str, List[str]] = {}
+        for word in self.vocabulary:
+            grams = trigrams(word)
+            self._word_trigrams[word] = grams
+            for gram in grams:
+                by_trigram.setdefault(gram, []).append(word)
+        self.by_trigram = by_trigram
+        self._word_memo: Dict[str, List[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def expand_query(self, query: str) -> List[str]:
+        """Query words with abbreviations expanded."""
+        words: List[str] = []
+        for word in tokenize(query):
+            words.extend(ABBREVIATIONS.get(word, word).split())
+        return words
+
+    def match_word(self, word: str) -> List[Tuple[str, float]]:
+        """Catalog words matching a query word, with similarity in (0, 1], best first."""
+        matches = self._word_memo.get(word)
+        if matches is not None:
+            return matches
+
+        found: Dict[str, float] = {}
+        if word in self.word_positions:
+            found[word] = 1.0
+
+        # Prefix range of the sorted vocabulary
+        start = bisect.bisect_left(self.vocabulary, word)
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(word):
+                break
+            found.setdefault(candidate, PREFIX_SIMILARITY)
+
+        if len(word) >= MIN_FUZZY_LENGTH:
+            grams = trigrams(word)
+            shared: Dict[str, int] = {}
+            for gram in grams:
+                for candidate in self.by_trigram.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            # Longer words need two shared trigrams to be worth comparing
+            min_shared = 2 if len(word) > MIN_FUZZY_LENGTH else 1
+            for candidate, count in shared.items():
+                if count < min_shared or candidate in found:
+                    continue
+                jaccard = count / (len(grams) + len(self._word_trigrams[candidate]) - count)
+                similarity = jaccard
+                if abs(len(candidate) - len(word)) <= 2:
+                    similarity = max(similarity, edit_similarity(word, candidate))
+                if similarity >= MIN_WORD_SIMILARITY:
+                    found[candidate] = similarity * FUZZY_DISCOUNT
+
+        matches = sorted(found.items(), key=lambda item: -item[1])
+        if len(self._word_memo) >= WORD_MATCH_MEMO_MAX:
+            self._word_memo.clear()
+        self._word_memo[word] = matches
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        popularity: Optional[Dict[str, float]] = None,
+    ) -> Tuple[List[Tuple[float, int]], int]:
+        """
+        Rank exercises for a free-text query.
+
+        Returns:
+            ([(score, position), ...] best first, at most `limit`), total matches
+        """
+        raw_words = tokenize(query)
+        words = self.expand_query(query)
+        if not words:
+            return [], 0
+
+        # Sum over query words of each position's best similarity: matches
+        # are strongest first, so a position only takes its first (best) one
+        totals: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for word in words:
+            assigned: set = set()
+            for candidate, similarity in self.match_word(word):
+                new = self.word_positions[candidate] - assigned
+                if not new:
+                    continue
+                assigned |= new
+                for pos in new:
+                    totals[pos] = totals.get(pos, 0.0) + similarity
+                    matched[pos] = matched.get(pos, 0) + 1
+
+        phrase_matches = self.phrase_positions.get(_phrase(raw_words), frozenset()) | (
+            self.phrase_positions.get(_phrase(words), frozenset())
+        )
+        popularity = popularity or {}
+        ids, names, name_lengths = self._ids, self._names, self.name_lengths
+        min_total = MIN_SCORE * len(words)
+
+        scored = []
+        for pos in phrase_matches.union(totals):
+            total = totals.get(pos, 0.0)
+            if pos in phrase_matches:
+                total += PHRASE_BONUS * len(words)
+            elif total < min_total:
+                continue
+            score = (
+                total / len(words)
+                + COVERAGE_WEIGHT * min(1.0, matched.get(pos, 0) / name_lengths[pos])
+                + POPULARITY_WEIGHT * popularity.get(ids[pos], 0.0)
+            )
+            scored.append((-score, names[pos], pos))
+
+        # Name breaks ties so results (and the plain name before variants) are stable
+        top = heapq.nsmallest(limit, scored)
+        return [(-neg_score, pos) for neg_score, _, pos in top], len(scored)
+
+
+# Search index for an empty / not yet loaded catalog
+EMPTY_SEARCH_INDEX = ExerciseSearchIndex(ExerciseCatalogIndex([]))
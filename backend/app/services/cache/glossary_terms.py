@@ -1,68 +1,171 @@
 # backend/app/services/cache/glossary_terms.py
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+from datetime import datetime
+from app.services.cache.async_cache import AsyncCache
+from app.services.cache.reference_snapshot import ReferenceSnapshot
+from app.services.cache.reference_sync import ReferenceSync
 from app.services.db.glossary_service import glossary_service
+from app.services.llm.glossary_linker import GlossaryAutomaton, build_automaton
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class GlossaryTerms(NamedTuple):
+    """One loaded glossary with its lookups."""
+
+    terms: List[Dict]
+    by_id: Dict[str, Dict]
+    automaton: Optional[GlossaryAutomaton]
+    version: Optional[str]
+    source: Optional[str]  # snapshot | database
+
+
 class GlossaryTermCache:
     """
     In-memory cache for glossary terms.
     Terms rarely change, so we use a 24-hour TTL.
+
+    Each refresh also compiles the terms into the automaton used to link
+    glossary terms in streamed coach answers.
+
+    Terms are persisted as a local snapshot (see reference_snapshot) and
+    served from it at boot; stale terms are revalidated in the background
+    (single-entry AsyncCache) and only re-downloaded when the table version
+    changed. The /glossary-terms endpoint is served through a ReferenceSync
+    (ETag + deltas, see reference_sync).
     """
 
+    _KEY = "terms"
+
     def __init__(self):
-        self._cache: Optional[List[Dict]] = None
-        self._cache_by_id: Optional[Dict[str, Dict]] = None
+        self._cache_ttl_seconds = 24 * 3600
+        self._store: AsyncCache[str, GlossaryTerms] = AsyncCache(
+            "glossary_terms",
+            max_entries=1,
+            ttl_seconds=self._cache_ttl_seconds,
+            stale_ttl_seconds=None,
+            retry_after_seconds=self._cache_ttl_seconds,
+        )
         self._last_refresh: Optional[datetime] = None
-        self._cache_ttl = timedelta(hours=24)
+        self._save_task: Optional[asyncio.Task] = None
+        self._snapshot = ReferenceSnapshot("glossary_terms")
+        self._sync = ReferenceSync("glossary_terms")
 
     async def get_all_terms(self) -> List[Dict]:
         """Get all terms from cache (refreshes if stale)"""
-        if self._should_refresh():
-            await self.refresh()
-        return self._cache or []
+        glossary = await self._glossary()
+        return glossary.terms if glossary else []
 
     async def get_term_by_id(self, term_id: str) -> Optional[Dict]:
         """Get single term by ID from cache"""
-        if self._should_refresh():
-            await self.refresh()
-        return self._cache_by_id.get(term_id) if self._cache_by_id else None
+        glossary = await self._glossary()
+        return glossary.by_id.get(term_id) if glossary else None
+
+    async def get_sync(self) -> ReferenceSync:
+        """Conditional/delta sync state for the current terms (refreshes if stale)"""
+        await self._glossary()
+        return self._sync
+
+    async def _glossary(self) -> Optional[GlossaryTerms]:
+        # Nothing to serve yet: wait for the database; stale terms are
+        # served while they revalidate in the background
+        try:
+            return await self._store.get(self._KEY, self._revalidate)
+        except Exception:
+            return None
+
+    def load_snapshot(self) -> bool:
+        """Serve terms from the local snapshot (boot). Returns True if loaded."""
+        snapshot = self._snapshot.load()
+        if not snapshot:
+            return False
+
+        glossary = self._build(snapshot["rows"], snapshot.get("version"), "snapshot")
+        self._store.set(self._KEY, glossary)
+        logger.info(
+            f"🗂️ Glossary cache loaded from snapshot: {len(glossary.terms)} terms "
+            f"(version {glossary.version}, saved {snapshot.get('saved_at')})"
+        )
+        return True
 
-    async def refresh(self):
+    async def revalidate(self) -> bool:
+        """Refresh only if the glossary table changed since the cached version."""
+        try:
+            await self._store.refresh(self._KEY, self._revalidate)
+            return True
+        except Exception:
+            return False
+
+    async def refresh(self) -> bool:
         """Force refresh from database using admin client"""
         try:
-            logger.info("🔄 Refreshing glossary cache")
-            result = await glossary_service.get_all_glossary_terms_admin()
+            await self._store.refresh(self._KEY, self._download)
+            return True
+        except Exception:
+            return False
 
-            if result.get("success"):
-                self._cache = result.get("data", [])
-                self._cache_by_id = {t["id"]: t for t in self._cache}
+    async def _revalidate(self) -> GlossaryTerms:
+        """Cache loader: keep the current terms if the table version is unchanged."""
+        current = self._store.peek(self._KEY)
+        if current is not None and current.version:
+            result = await glossary_service.get_glossary_terms_version_admin()
+            if result.get("success") and result["data"] == current.version:
                 self._last_refresh = datetime.now()
-                logger.info(f"✅ Glossary cache refreshed: {len(self._cache)} terms")
-            else:
-                logger.error(
-                    f"❌ Failed to refresh glossary cache: {result.get('error')}"
-                )
-        except Exception as e:
-            logger.error(f"❌ Error refreshing glossary cache: {e}")
-
-    def _should_refresh(self) -> bool:
-        """Check if cache is stale or empty"""
-        if not self._cache or not self._last_refresh:
-            return True
-        return datetime.now() - self._last_refresh > self._cache_ttl
+                logger.info(f"✅ Glossary cache unchanged (version {current.version})")
+                return current
+        return await self._download()
+
+    async def _download(self) -> GlossaryTerms:
+        """Cache loader: fetch all terms and compile the automaton."""
+        logger.info("🔄 Refreshing glossary cache")
+        # Version first: a change racing the download is caught next time
+        version_result = await glossary_service.get_glossary_terms_version_admin()
+        result = await glossary_service.get_all_glossary_terms_admin()
+
+        if not result.get("success"):
+            logger.error(f"❌ Failed to refresh glossary cache: {result.get('error')}")
+            raise RuntimeError(result.get("error") or "Glossary load failed")
+
+        version = version_result.get("data") if version_result.get("success") else None
+        terms = result.get("data", [])
+        glossary = self._build(terms, version, "database")
+        logger.info(f"✅ Glossary cache refreshed: {len(terms)} terms")
+        if version:
+            self._save_task = asyncio.create_task(self._snapshot.save(version, terms))
+        return glossary
+
+    def _build(self, terms: List[Dict], version: Optional[str], source: str) -> GlossaryTerms:
+        """Build lookups, automaton and sync state for a new set of terms."""
+        glossary = GlossaryTerms(
+            terms, {t["id"]: t for t in terms}, build_automaton(terms), version, source
+        )
+        self._sync.update(terms)
+        self._last_refresh = datetime.now()
+        return glossary
+
+    def get_automaton(self) -> Optional[GlossaryAutomaton]:
+        """Compiled term matcher from the last refresh (None until loaded)."""
+        glossary = self._store.peek(self._KEY)
+        return glossary.automaton if glossary else None
 
     def get_cache_stats(self) -> Dict:
         """Return cache statistics for debugging"""
+        glossary = self._store.peek(self._KEY)
         return {
-            "cached_terms": len(self._cache) if self._cache else 0,
+            "cached_terms": len(glossary.terms) if glossary else 0,
+            "automaton_states": (
+                len(glossary.automaton.goto) if glossary and glossary.automaton else 0
+            ),
+            "version": glossary.version if glossary else None,
+            "source": glossary.source if glossary else None,
             "last_refresh": (
                 self._last_refresh.isoformat() if self._last_refresh else None
             ),
-            "is_stale": self._should_refresh(),
+            "is_stale": not self._store.is_fresh(self._KEY),
+            "sync": self._sync.get_stats(),
+            "store": self._store.get_stats(),
         }
 
 
@@ -0,0 +1,97 @@
+"""
+Local disk snapshots for reference-data caches
+
+The exercise definition and glossary caches persist what they loaded, with
+the table version it was loaded at, so a restarted (or new) worker serves
+them immediately at boot. The cache then asks the database for the table's
+version - row count + latest updated_at, a single-row query - and only
+re-downloads the table when it changed (see BaseDBService.get_table_version_admin).
+
+Snapshots are JSON files under REFERENCE_CACHE_DIR (default backend/.cache),
+written atomically (temp file + rename) off the event loop. A snapshot from a
+different database (SUPABASE_URL) or format is ignored.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parents[3] / ".cache"
+
+
+def snapshot_dir() -> Path:
+    return Path(os.environ.get("REFERENCE_CACHE_DIR", DEFAULT_SNAPSHOT_DIR))
+
+
+def _source() -> str:
+    # Snapshots are only valid for the database they were taken from
+    url = os.environ.get("SUPABASE_URL", "")
+    return hashlib.sha1(url.encode()).hexdigest()[:12]
+
+
+class ReferenceSnapshot:
+    """One cache's snapshot file: {"format", "source", "version", "saved_at", "rows"}."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def path(self) -> Path:
+        return snapshot_dir() / f"{self.name}.json"
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The stored snapshot, or None if missing, unreadable or not ours."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable {self.name} snapshot: {e}")
+            return None
+
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("format") != SNAPSHOT_FORMAT
+            or snapshot.get("source") != _source()
+            or not isinstance(snapshot.get("rows"), list)
+        ):
+            logger.info(f"🗂️ Ignoring {self.name} snapshot from another format or database")
+            return None
+        return snapshot
+
+    async def save(self, version: Optional[str], rows: List[Dict[str, Any]]) -> None:
+        """Persist rows at version (errors are logged, never raised)."""
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "source": _source(),
+            "version": version,
+            "saved_at": datetime.now().isoformat(),
+            "rows": rows,
+        }
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+            logger.info(f"💾 Saved {self.name} snapshot ({len(rows)} rows, version {version})")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save {self.name} snapshot: {e}")
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.name}.", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"), default=str)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
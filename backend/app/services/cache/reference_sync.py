@@ -0,0 +1,149 @@
+"""
+Conditional and delta sync for reference-data endpoints
+
+Clients keep a copy of the exercise catalog and glossary and should only
+download what changed. Each reference cache owns a ReferenceSync that it
+updates whenever it installs new rows:
+
+- version: short digest of the cached rows (same on every worker, and across
+  snapshot loads), sent as the ETag. A request whose If-None-Match matches
+  gets a 304 with no body.
+- full body: the rows serialized to JSON once per version, so repeated full
+  downloads cost no serialization.
+- delta since a version: the previous few versions are kept as
+  {id: row fingerprint}, so `since=<version>` returns only the added,
+  changed and removed rows:
+
+      {"version": "...", "since": "...", "reset": false,
+       "added": [...], "changed": [...], "removed": ["id", ...]}
+
+  An unknown (too old, or from before a restart) since version gets
+  reset=true with every row in "added": the client replaces its copy.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSIONS = 8  # versions a client can still get a delta from
+MAX_DELTA_BODIES = 16  # memoized delta bodies per version
+
+Fingerprints = Dict[str, str]
+
+
+def _dumps(value: Any) -> bytes:
+    # Same output as FastAPI's JSONResponse
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def fingerprint(row: Dict[str, Any]) -> str:
+    return hashlib.sha1(
+        json.dumps(row, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()[:16]
+
+
+def etag_matches(if_none_match: Optional[str], version: str) -> bool:
+    """If-None-Match check (weak comparison, '*' matches any version)."""
+    if not if_none_match or not version:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == version:
+            return True
+    return False
+
+
+class ReferenceSync:
+    """Versioned response bodies and deltas for one reference cache."""
+
+    def __init__(self, name: str, key: str = "id"):
+        self.name = name
+        self.key = key
+        self.version: str = ""
+        self._rows: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self._history: "OrderedDict[str, Fingerprints]" = OrderedDict()
+        self._full_body: Optional[bytes] = None
+        self._delta_bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def update(self, rows: List[Dict[str, Any]]) -> None:
+        """Install a new row set (called by the owning cache on every install)."""
+        prints = {str(row[self.key]): fingerprint(row) for row in rows if row.get(self.key)}
+        version = hashlib.sha1(
+            _dumps(sorted(prints.items()))
+        ).hexdigest()[:16]
+
+        self._rows = rows
+        self._by_key = {str(row[self.key]): row for row in rows if row.get(self.key)}
+        if version != self.version:
+            self._full_body = None
+            self._delta_bodies.clear()
+        self.version = version
+
+        self._history.pop(version, None)
+        self._history[version] = prints
+        while len(self._history) > HISTORY_VERSIONS:
+            self._history.popitem(last=False)
+
+    def full_body(self) -> bytes:
+        """All rows as a JSON array, serialized once per version."""
+        if self._full_body is None:
+            self._full_body = _dumps(self._rows)
+        return self._full_body
+
+    def delta_body(self, since: str) -> bytes:
+        """Changes since a version as JSON (a reset if the version is unknown)."""
+        since = since.removeprefix("W/").strip('"')
+        body = self._delta_bodies.get(since)
+        if body is not None:
+            self._delta_bodies.move_to_end(since)
+            return body
+
+        body = _dumps(self.delta(since))
+        self._delta_bodies[since] = body
+        while len(self._delta_bodies) > MAX_DELTA_BODIES:
+            self._delta_bodies.popitem(last=False)
+        return body
+
+    def delta(self, since: str) -> Dict[str, Any]:
+        old = self._history.get(since)
+        if old is None:
+            logger.info(f"🔁 {self.name} delta from unknown version {since!r}, sending reset")
+            return {
+                "version": self.version,
+                "since": since,
+                "reset": True,
+                "added": self._rows,
+                "changed": [],
+                "removed": [],
+            }
+
+        current = self._history[self.version]
+        return {
+            "version": self.version,
+            "since": since,
+            "reset": False,
+            "added": [self._by_key[k] for k in current if k not in old],
+            "changed": [
+                self._by_key[k] for k, fp in current.items() if k in old and old[k] != fp
+            ],
+            "removed": [k for k in old if k not in current],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "history_versions": len(self._history),
+            "full_body_bytes": len(self._full_body) if self._full_body else None,
+            "memoized_deltas": len(self._delta_bodies),
+        }
@@ -0,0 +1,568 @@
+# backend/app/services/cache/workout_history.py
+"""
+Per-user workout history index for on-demand coach queries
+
+The coach prompt carries only a bounded slice of history (recent workouts and
+the top e1RM series). Everything else is answered through the query_history
+tool from this index, so prompt size does not grow with the user's history.
+
+WorkoutHistoryIndex is built once per user from the workout tables:
+
+- by exercise: one aggregate row per session (best e1RM, top set, volume,
+  sets, reps), sorted by date, with prefix sums for volume/sets/reps
+- by date: sorted workout dates for overall frequency queries
+- by muscle group: exercise keys per primary muscle and per broad group
+  (legs, back, ...), from the cached exercise definitions
+
+A windowed query is two bisects plus (for e1RM/top set) a max over the
+sessions in the window, so answers come back in well under a millisecond.
+Indexes are cached per user and dropped as soon as one of the user's
+workouts is created, updated or deleted (or a new bundle is saved); all of
+them are dropped when the exercise catalog changes (see app.core.events).
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.events import WORKOUT_EVENTS, BundleReady, DefinitionsChanged, event_bus
+from app.services.cache.async_cache import AsyncCache
+from app.services.workout_analysis.calc.downsample import SeriesDownsampler
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 730
+MAX_CACHED_USERS = 500
+INDEX_TTL_SECONDS = 6 * 3600
+
+METRICS = ("e1rm", "top_set", "volume", "sets", "frequency")
+DEFAULT_WINDOW = "12w"
+MAX_GROUP_RESULTS = 8
+
+RESOLUTIONS = ("auto", "session", "week", "month")
+MAX_SERIES_POINTS = 60
+
+# Broad groups the coach (and users) talk about -> primary muscles
+MUSCLE_GROUPS = {
+    "back": ["back", "lats", "traps", "upper_back", "lower_back", "erector_spinae"],
+    "legs": ["quadriceps", "hamstrings", "glutes", "calves", "quads", "hams", "abductors", "adductors"],
+    "core": ["abs", "obliques", "lower_back", "core", "rectus_abdominis"],
+    "arms": ["biceps", "triceps", "forearms", "brachialis"],
+    "shoulders": ["shoulders", "deltoids", "traps", "anterior_deltoid", "lateral_deltoid", "posterior_deltoid"],
+    "chest": ["chest", "pectorals", "pectoralis_major", "pectoralis_minor"],
+}
+
+_WINDOW_RE = re.compile(r"^(\d+)\s*([dwmy])$")
+_WINDOW_DAYS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+
+def _norm(value: Any) -> str:
+    return " ".join(str(value).lower().split()) if value else ""
+
+
+def parse_window(window: Optional[str]) -> Optional[int]:
+    """Window in days ("4w", "90d", "6m", "1y"); None means all history."""
+    text = _norm(window or DEFAULT_WINDOW).replace(" ", "")
+    if text in ("all", "alltime", "ever"):
+        return None
+    match = _WINDOW_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid window {window!r} - use e.g. '4w', '90d', '6m' or 'all'")
+    return max(1, int(match.group(1)) * _WINDOW_DAYS[match.group(2)])
+
+
+class SessionStats(NamedTuple):
+    """One exercise in one workout, reduced to its aggregates."""
+
+    day: int  # date ordinal
+    best_e1rm: float
+    top_weight: float
+    top_reps: int
+    volume: float  # sum of weight x reps (kg)
+    sets: int
+    reps: int
+
+
+class ExerciseHistory:
+    """All sessions of one exercise, date-sorted, with prefix sums."""
+
+    __slots__ = (
+        "name",
+        "definition_id",
+        "muscles",
+        "sessions",
+        "days",
+        "volume_sum",
+        "sets_sum",
+        "reps_sum",
+        "best_e1rm",
+        "best_e1rm_day",
+        "best_weight",
+    )
+
+    def __init__(self, name: str, definition_id: Optional[str], muscles: frozenset, sessions: List[SessionStats]):
+        self.name = name
+        self.definition_id = definition_id
+        self.muscles = muscles
+        self.sessions = sorted(sessions, key=lambda s: s.day)
+        self.days = [s.day for s in self.sessions]
+
+        self.volume_sum = [0.0]
+        self.sets_sum = [0]
+        self.reps_sum = [0]
+        for s in self.sessions:
+            self.volume_sum.append(self.volume_sum[-1] + s.volume)
+            self.sets_sum.append(self.sets_sum[-1] + s.sets)
+            self.reps_sum.append(self.reps_sum[-1] + s.reps)
+
+        best = max(self.sessions, key=lambda s: s.best_e1rm, default=None)
+        self.best_e1rm = best.best_e1rm if best else 0.0
+        self.best_e1rm_day = best.day if best else 0
+        self.best_weight = max((s.top_weight for s in self.sessions), default=0.0)
+
+    def span(self, start_day: int, end_day: int) -> Tuple[int, int]:
+        """Session index range [lo, hi) for days in [start_day, end_day]."""
+        return bisect_left(self.days, start_day), bisect_right(self.days, end_day)
+
+
+def _iso(day: int) -> str:
+    return date.fromordinal(day).isoformat()
+
+
+def _session_value(session: SessionStats, metric: str) -> float:
+    if metric == "e1rm":
+        return session.best_e1rm
+    if metric == "top_set":
+        return session.top_weight
+    if metric == "volume":
+        return session.volume
+    if metric == "sets":
+        return float(session.sets)
+    return 1.0  # frequency
+
+
+def _bucket(day: int, resolution: str) -> int:
+    """Ordinal of the first day of the bucket containing day."""
+    if resolution == "week":
+        return day - date.fromordinal(day).weekday()
+    if resolution == "month":
+        return date.fromordinal(day).replace(day=1).toordinal()
+    return day
+
+
+def _bucket_label(day: int, resolution: str) -> str:
+    value = date.fromordinal(day)
+    return value.strftime("%Y-%m") if resolution == "month" else value.isoformat()
+
+
+def _pct(old: float, new: float) -> Optional[float]:
+    return round((new - old) / old * 100, 1) if old else None
+
+
+class WorkoutHistoryIndex:
+    """In-memory history for one user, keyed by exercise, date and muscle group."""
+
+    def __init__(self, workouts: List[Dict], definitions_by_id: Optional[Dict[str, Dict]] = None):
+        definitions_by_id = definitions_by_id or {}
+        per_exercise: Dict[str, Dict[str, Any]] = {}
+        workout_days = []
+
+        for workout in workouts:
+            created = workout.get("created_at")
+            if not created:
+                continue
+            day = datetime.fromisoformat(str(created).replace("Z", "+00:00")).date().toordinal()
+            workout_days.append(day)
+
+            for exercise in workout.get("workout_exercises") or []:
+                name = (exercise.get("name") or "").strip()
+                key = _norm(name)
+                if not key:
+                    continue
+                stats = self._session_stats(day, exercise.get("workout_exercise_sets") or [])
+                if stats is None:
+                    continue
+                entry = per_exercise.setdefault(
+                    key, {"name": name, "definition_id": exercise.get("definition_id"), "sessions": {}}
+                )
+                # Same exercise twice on one day counts as one session
+                previous = entry["sessions"].get(day)
+                entry["sessions"][day] = stats if previous is None else self._merge(previous, stats)
+
+        self.exercises: Dict[str, ExerciseHistory] = {}
+        self.by_muscle: Dict[str, List[str]] = {}
+        for key, entry in per_exercise.items():
+            definition = definitions_by_id.get(entry["definition_id"] or "", {})
+            muscles = frozenset(_norm(m) for m in definition.get("primary_muscles") or [])
+            self.exercises[key] = ExerciseHistory(
+                entry["name"], entry["definition_id"], muscles, list(entry["sessions"].values())
+            )
+            for muscle in muscles:
+                self.by_muscle.setdefault(muscle, []).append(key)
+        for group, members in MUSCLE_GROUPS.items():
+            keys = {k for m in members for k in self.by_muscle.get(m, [])}
+            if keys:
+                self.by_muscle[group] = sorted(keys | set(self.by_muscle.get(group, [])))
+
+        self.workout_days = sorted(workout_days)
+        self.built_at = time.time()
+
+    @staticmethod
+    def _session_stats(day: int, sets: List[Dict]) -> Optional[SessionStats]:
+        best_e1rm = top_weight = volume = 0.0
+        top_reps = total_reps = 0
+        for s in sets:
+            weight = float(s.get("weight") or 0)
+            reps = int(s.get("reps") or 0)
+            best_e1rm = max(best_e1rm, float(s.get("estimated_1rm") or 0))
+            if weight > top_weight or (weight == top_weight and reps > top_reps):
+                top_weight, top_reps = weight, reps
+            volume += weight * reps
+            total_reps += reps
+        if not sets:
+            return None
+        return SessionStats(day, best_e1rm, top_weight, top_reps, volume, len(sets), total_reps)
+
+    @staticmethod
+    def _merge(a: SessionStats, b: SessionStats) -> SessionStats:
+        top = a if (a.top_weight, a.top_reps) >= (b.top_weight, b.top_reps) else b
+        return SessionStats(
+            a.day,
+            max(a.best_e1rm, b.best_e1rm),
+            top.top_weight,
+            top.top_reps,
+            a.volume + b.volume,
+            a.sets + b.sets,
+            a.reps + b.reps,
+        )
+
+    @property
+    def workout_count(self) -> int:
+        return len(self.workout_days)
+
+    def resolve_exercise(self, query: str) -> Optional[str]:
+        """Exact name, else the most-trained exercise whose name contains every query word."""
+        key = _norm(query)
+        if key in self.exercises:
+            return key
+        words = key.split()
+        if not words:
+            return None
+        matches = [k for k in self.exercises if all(w in k for w in words)]
+        if not matches:
+            return None
+        return max(matches, key=lambda k: (len(self.exercises[k].sessions), -len(k)))
+
+    def query(
+        self,
+        exercise: Optional[str] = None,
+        metric: str = "e1rm",
+        window: Optional[str] = DEFAULT_WINDOW,
+        today: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aggregate answer for an exercise, a muscle group or (no exercise) all training.
+
+        Weights are in kg.
+        """
+        metric = _norm(metric) or "e1rm"
+        if metric not in METRICS:
+            return {"error": f"Unknown metric {metric!r} - use one of {', '.join(METRICS)}"}
+        try:
+            window_days = parse_window(window)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        end = (today or date.today()).toordinal()
+        start = end - window_days + 1 if window_days else 0
+        window_label = f"{window_days}d" if window_days else "all"
+
+        if not exercise:
+            return self._overall(start, end, window_days, window_label)
+
+        key = self.resolve_exercise(exercise)
+        if key is not None:
+            result = self._exercise_summary(self.exercises[key], metric, start, end, window_days)
+            return {"window": window_label, **result}
+
+        group = _norm(exercise).replace(" ", "_")
+        keys = self.by_muscle.get(group)
+        if keys:
+            rows = []
+            for k in keys:
+                row = self._exercise_summary(self.exercises[k], metric, start, end, window_days)
+                if row["sessions"]:
+                    del row["metric"]  # Same for every row
+                    rows.append(row)
+            rows.sort(key=lambda r: (r["sessions"], r.get("volume_kg", 0)), reverse=True)
+            return {
+                "muscle_group": group,
+                "metric": metric,
+                "window": window_label,
+                "results": rows[:MAX_GROUP_RESULTS],
+                "total": len(rows),
+                "next_cursor": None,
+            }
+
+        return self._not_found(exercise)
+
+    def series(
+        self,
+        exercise: Optional[str] = None,
+        metric: str = "e1rm",
+        window: Optional[str] = DEFAULT_WINDOW,
+        resolution: str = "auto",
+        today: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Time series for charting: one point per session, week or month.
+
+        e1RM / top set take the best value in a bucket; volume, sets and
+        frequency are summed. "auto" is per session (per week for
+        frequency). Series longer than MAX_SERIES_POINTS are reduced with
+        LTTB, which keeps their shape and the best point. Volume, sets and
+        frequency also accept a muscle
+        group (summed over its exercises); frequency without an exercise
+        counts all workouts. Weights are in kg.
+        """
+        metric = _norm(metric) or "e1rm"
+        resolution = _norm(resolution) or "auto"
+        if metric not in METRICS:
+            return {"error": f"Unknown metric {metric!r} - use one of {', '.join(METRICS)}"}
+        if resolution not in RESOLUTIONS:
+            return {"error": f"Unknown resolution {resolution!r} - use one of {', '.join(RESOLUTIONS)}"}
+        try:
+            window_days = parse_window(window)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        end = (today or date.today()).toordinal()
+        start = end - window_days + 1 if window_days else 0
+
+        # (day, value) pairs to bucket
+        if not exercise:
+            if metric != "frequency":
+                return {"error": "An exercise is required for this metric"}
+            subject = "All workouts"
+            raw = [(d, 1.0) for d in self.workout_days if start <= d <= end]
+        else:
+            key = self.resolve_exercise(exercise)
+            group = _norm(exercise).replace(" ", "_")
+            if key is not None:
+                histories = [self.exercises[key]]
+                subject = histories[0].name
+            elif group in self.by_muscle:
+                if metric in ("e1rm", "top_set"):
+                    return {"error": f"{metric} needs a single exercise, not a muscle group"}
+                histories = [self.exercises[k] for k in self.by_muscle[group]]
+                subject = group.replace("_", " ").title()
+            else:
+                return self._not_found(exercise)
+            raw = []
+            for ex in histories:
+                lo, hi = ex.span(start, end)
+                raw.extend((s.day, _session_value(s, metric)) for s in ex.sessions[lo:hi])
+            raw = [(d, v) for d, v in raw if v > 0]
+            if metric == "frequency":
+                # Training days, not exercise sessions
+                raw = [(d, 1.0) for d in sorted({d for d, _ in raw})]
+
+        if not raw:
+            return {"error": f"No {metric} data for {subject} in this window"}
+
+        aggregate = max if metric in ("e1rm", "top_set") else sum
+        res = resolution
+        if res == "auto":
+            # A per-session count is always 1 - bucket frequency by week
+            res = "week" if metric == "frequency" else "session"
+        buckets: Dict[int, List[float]] = {}
+        for day, value in raw:
+            buckets.setdefault(_bucket(day, res), []).append(value)
+
+        points = [(day, round(aggregate(values), 1)) for day, values in sorted(buckets.items())]
+        points = SeriesDownsampler.downsample(
+            points, MAX_SERIES_POINTS, x=lambda p: p[0], y=lambda p: p[1]
+        )
+        return {
+            "subject": subject,
+            "metric": metric,
+            "resolution": res,
+            "total_points": len(buckets),
+            "labels": [_bucket_label(day, res) for day, _ in points],
+            "values": [value for _, value in points],
+        }
+
+    def _not_found(self, exercise: str) -> Dict[str, Any]:
+        return {
+            "error": f"No history for {exercise!r}",
+            "known_exercises": [
+                e.name
+                for e in sorted(self.exercises.values(), key=lambda e: -len(e.sessions))[:15]
+            ],
+        }
+
+    def _exercise_summary(
+        self, ex: ExerciseHistory, metric: str, start: int, end: int, window_days: Optional[int]
+    ) -> Dict[str, Any]:
+        lo, hi = ex.span(start, end)
+        sessions = hi - lo
+        result: Dict[str, Any] = {
+            "exercise": ex.name,
+            "metric": metric,
+            "sessions": sessions,
+            "last_session": _iso(ex.days[hi - 1]) if sessions else None,
+        }
+        if not sessions:
+            return result
+
+        if metric in ("e1rm", "top_set"):
+            window_sessions = ex.sessions[lo:hi]
+            if metric == "e1rm":
+                values = [(s.best_e1rm, s) for s in window_sessions if s.best_e1rm > 0]
+                all_time = ex.best_e1rm
+            else:
+                values = [(s.top_weight, s) for s in window_sessions if s.top_weight > 0]
+                all_time = ex.best_weight
+            if not values:
+                return result
+            first, last = values[0], values[-1]
+            best = max(values, key=lambda v: v[0])
+            result.update(
+                {
+                    "first_kg": round(first[0], 1),
+                    "last_kg": round(last[0], 1),
+                    "best_kg": round(best[0], 1),
+                    "best_date": _iso(best[1].day),
+                    "change_kg": round(last[0] - first[0], 1),
+                    "change_pct": _pct(first[0], last[0]),
+                    "all_time_best_kg": round(all_time, 1),
+                    "is_all_time_best": best[0] >= all_time,
+                }
+            )
+            if metric == "top_set":
+                result["last_top_set"] = f"{last[1].top_reps}x{round(last[1].top_weight, 1)}kg"
+            return result
+
+        volume = ex.volume_sum[hi] - ex.volume_sum[lo]
+        sets = ex.sets_sum[hi] - ex.sets_sum[lo]
+        weeks = max(1.0, (window_days or (end - ex.days[lo] + 1)) / 7)
+        result.update(
+            {
+                "volume_kg": round(volume, 1),
+                "sets": sets,
+                "reps": ex.reps_sum[hi] - ex.reps_sum[lo],
+                "sessions_per_week": round(sessions / weeks, 2),
+                "sets_per_week": round(sets / weeks, 1),
+            }
+        )
+        if window_days:
+            # Same-length window just before, for a trend
+            p_lo, p_hi = ex.span(start - window_days, start - 1)
+            previous = ex.volume_sum[p_hi] - ex.volume_sum[p_lo]
+            result["previous_window_volume_kg"] = round(previous, 1)
+            result["volume_change_pct"] = _pct(previous, volume)
+        return result
+
+    def _overall(self, start: int, end: int, window_days: Optional[int], window_label: str) -> Dict[str, Any]:
+        lo = bisect_left(self.workout_days, start)
+        hi = bisect_right(self.workout_days, end)
+        count = hi - lo
+        weeks = max(1.0, (window_days or (end - self.workout_days[0] + 1 if self.workout_days else 7)) / 7)
+        result: Dict[str, Any] = {
+            "window": window_label,
+            "workouts": count,
+            "workouts_per_week": round(count / weeks, 2),
+            "last_workout": _iso(self.workout_days[hi - 1]) if count else None,
+            "days_since_last": end - self.workout_days[hi - 1] if count else None,
+        }
+        if window_days:
+            p_lo = bisect_left(self.workout_days, start - window_days)
+            result["previous_window_workouts"] = lo - p_lo
+
+        trained = []
+        for ex in self.exercises.values():
+            e_lo, e_hi = ex.span(start, end)
+            if e_hi > e_lo:
+                trained.append((e_hi - e_lo, ex.name))
+        trained.sort(reverse=True)
+        result["most_trained"] = [f"{name} ({n})" for n, name in trained[:5]]
+        return result
+
+
+class WorkoutHistoryCache:
+    """
+    Per-user WorkoutHistoryIndex cache (AsyncCache: LRU, TTL as a safety net).
+
+    Concurrent first queries for a user share a single load; an index being
+    built when the user is invalidated is not cached, and later queries
+    start a fresh load instead of joining it.
+    """
+
+    def __init__(self, history_days: int = HISTORY_DAYS, max_users: int = MAX_CACHED_USERS):
+        self.history_days = history_days
+        self._cache: AsyncCache[str, WorkoutHistoryIndex] = AsyncCache(
+            "workout_history", max_entries=max_users, ttl_seconds=INDEX_TTL_SECONDS
+        )
+
+    async def get_index(self, user_id: str) -> Optional[WorkoutHistoryIndex]:
+        """The user's index, loading it on first use (None if loading fails)."""
+        try:
+            return await self._cache.get(user_id, lambda: self._load(user_id))
+        except Exception as e:
+            logger.error(f"❌ Failed to build workout history index for {user_id}: {e}")
+            return None
+
+    def prewarm(self, user_id: str) -> None:
+        """Start loading a user's index in the background (e.g. on coach connect)."""
+        try:
+            self._cache.prefetch(user_id, lambda: self._load(user_id))
+        except RuntimeError:
+            pass  # No running loop - the first query will load
+
+    async def _load(self, user_id: str) -> WorkoutHistoryIndex:
+        """Cache loader: fetch the user's workouts and build the index."""
+        from app.services.cache.exercise_definitions import exercise_cache
+        from app.services.db.workout_service import WorkoutService
+
+        start = time.perf_counter()
+        result = await WorkoutService().get_user_workouts_admin(
+            user_id=user_id, days_back=self.history_days
+        )
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "Unknown error"))
+
+        catalog = await exercise_cache.get_index()
+        index = WorkoutHistoryIndex(result.get("data") or [], catalog.by_id)
+        logger.info(
+            f"📚 Workout history index built for {user_id}: {index.workout_count} workouts, "
+            f"{len(index.exercises)} exercises in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return index
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop a user's index (workout saved or deleted)."""
+        if self._cache.invalidate(user_id):
+            logger.info(f"🗑️ Workout history index invalidated for user {user_id}")
+
+    def invalidate_all(self) -> None:
+        """Drop every index (exercise catalog changed: names and muscles)."""
+        cached = len(self._cache)
+        self._cache.clear()
+        if cached:
+            logger.info(f"🗑️ Workout history indexes invalidated for {cached} users")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._cache.get_stats()
+
+
+# Singleton instance for easy import
+workout_history_cache = WorkoutHistoryCache()
+
+event_bus.subscribe(
+    (*WORKOUT_EVENTS, BundleReady),
+    lambda event: workout_history_cache.invalidate_user(event.user_id),
+)
+event_bus.subscribe(DefinitionsChanged, lambda _event: workout_history_cache.invalidate_all())
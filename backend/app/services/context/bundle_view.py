@@ -0,0 +1,112 @@
+"""
+Compact read-only projections of context bundles
+
+SharedContextLoader keeps one bundle per warm user. A UserContextBundle is a
+tree of pydantic models - every recent workout, set, volume point and e1RM
+point is its own object with its own __dict__ - while its consumers (the
+coach and chat actions) only read:
+
+- id, metadata.created_at          (prompt memo / answer-cache keys)
+- metadata.context_snapshot        (prompt text, see context_formatter)
+- ai_memory                        (memory index, answer-cache keys)
+- recent_workouts[i].name / .date  (chat actions)
+
+BundleView holds exactly those, built once when the bundle is loaded: slotted
+classes, tuples for the workout list and array-backed e1RM series in the
+snapshot. The snapshot is resolved for the user's units at build time, so
+get_context_snapshot() always finds it current.
+"""
+
+from array import array
+from collections.abc import Sequence
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from app.services.context.context_formatter import get_context_snapshot
+
+
+class PointSeries(Sequence):
+    """[date str, kg] chart points stored as two typed arrays."""
+
+    __slots__ = ("_days", "_values")
+
+    def __init__(self, points: Iterable[Sequence[Any]]):
+        self._days = array("l")
+        self._values = array("d")
+        for day, value in points:
+            self._days.append(date.fromisoformat(day).toordinal())
+            self._values.append(value)
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return (date.fromordinal(self._days[i]).isoformat(), self._values[i])
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        for day, value in zip(self._days, self._values):
+            yield date.fromordinal(day).isoformat(), value
+
+
+class WorkoutRef(NamedTuple):
+    date: datetime
+    name: Optional[str]
+
+
+class BundleMetadataView:
+    __slots__ = ("created_at", "context_snapshot")
+
+    def __init__(self, created_at: Optional[datetime], context_snapshot: Dict[str, Any]):
+        self.created_at = created_at
+        self.context_snapshot = context_snapshot
+
+
+class BundleView:
+    """The parts of a UserContextBundle the cached shared context is read for."""
+
+    __slots__ = ("id", "user_id", "metadata", "ai_memory", "recent_workouts")
+
+    def __init__(
+        self,
+        id: str,
+        user_id: str,
+        metadata: BundleMetadataView,
+        ai_memory: Optional[Dict[str, Any]],
+        recent_workouts: Tuple[WorkoutRef, ...],
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.metadata = metadata
+        self.ai_memory = ai_memory
+        self.recent_workouts = recent_workouts
+
+    @classmethod
+    def from_bundle(cls, bundle, is_imperial: bool) -> "BundleView":
+        """Project a UserContextBundle (the bundle itself is not retained)."""
+        metadata = getattr(bundle, "metadata", None)
+        return cls(
+            id=bundle.id,
+            user_id=bundle.user_id,
+            metadata=BundleMetadataView(
+                getattr(metadata, "created_at", None),
+                _compact_snapshot(get_context_snapshot(bundle, is_imperial)),
+            ),
+            ai_memory=bundle.ai_memory,
+            recent_workouts=tuple(
+                WorkoutRef(w.date, w.name) for w in bundle.recent_workouts or []
+            ),
+        )
+
+
+def _compact_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Same snapshot layout with tuple blocks and array-backed points."""
+    return {
+        **snapshot,
+        "workouts": tuple(snapshot.get("workouts", [])),
+        "strength": tuple(
+            {**entry, "points": PointSeries(entry["points"])}
+            for entry in snapshot.get("strength", [])
+        ),
+    }
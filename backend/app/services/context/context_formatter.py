@@ -0,0 +1,249 @@
+"""
+Coach Context Formatter
+
+Renders the bundle-derived parts of the coach prompt (recent workout history
+and strength progression) and the precomputed context snapshot they are
+rendered from.
+
+The snapshot is built once per bundle generation by AnalysisBundleGenerator
+and stored in the bundle metadata. It holds prompt-ready lines - one block per
+workout, one summary + data points per exercise - so a coach session renders
+any budgeted size of these sections with a join instead of walking the full
+UserContextBundle. Bundles without a (current) snapshot are snapshotted on
+the fly, so there is one rendering path either way.
+
+Snapshot layout (SNAPSHOT_VERSION 2):
+    {
+        "version": 2,
+        "is_imperial": bool,            # units the text was rendered in
+        "generated_at": iso str,
+        "workouts": [str, ...],          # newest first, MAX_WORKOUTS blocks
+        "strength": [                    # strongest first, MAX_EXERCISES
+            {"exercise", "best", "change", "total_points",
+             "points": [[date str, e1rm kg]]}   # LTTB-downsampled, PR kept
+        ],
+        "last_weights": {definition_id: {"weight", "reps", "date"}},
+        "tokens": {"workout_history": int, "strength_progression": int},
+    }
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from app.services.context.token_budget import count_tokens
+from app.services.workout_analysis.calc.downsample import SeriesDownsampler
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+# Largest sizes any context variant renders; smaller sizes are slices
+MAX_WORKOUTS = 5
+MAX_EXERCISES = 20
+MAX_POINTS = 30
+
+NO_WORKOUTS = "No workout history available"
+NO_STRENGTH = "No strength progression data available"
+
+
+def format_weight(weight_kg: float, is_imperial: bool) -> str:
+    """
+    Format weight in user's preferred units.
+
+    Returns:
+        Formatted weight string with unit (e.g., "225.0lbs" or "102.0kg")
+    """
+    if is_imperial:
+        weight_lbs = weight_kg / 0.453592
+        return f"{weight_lbs:.1f}lbs"
+    return f"{weight_kg:.1f}kg"
+
+
+def _format_date(value: Any, fmt: str) -> str:
+    return value.strftime(fmt) if hasattr(value, "strftime") else str(value)
+
+
+def _workout_blocks(bundle, is_imperial: bool, max_workouts: int) -> List[str]:
+    """One text block per recent workout with full set details."""
+    blocks = []
+    for w in (getattr(bundle, "recent_workouts", None) or [])[:max_workouts]:
+        date_str = _format_date(w.date, "%b %d, %Y")
+        name = w.name or "Unnamed Workout"
+
+        exercise_details = []
+        for ex in getattr(w, "exercises", None) or []:
+            sets_info = []
+            for s in getattr(ex, "sets", None) or []:
+                reps = s.reps if hasattr(s, "reps") else "N/A"
+                weight = (
+                    format_weight(s.weight, is_imperial)
+                    if getattr(s, "weight", None)
+                    else "bodyweight"
+                )
+                sets_info.append(f"{reps}x{weight}")
+
+            sets_str = ", ".join(sets_info) if sets_info else "No sets"
+            ex_name = getattr(ex, "name", None) or "Unknown exercise"
+            exercise_details.append(f"    - {ex_name}: {sets_str}")
+
+        exercises_str = (
+            "\n".join(exercise_details) if exercise_details else "    - No exercises"
+        )
+        notes_str = f"\n  Notes: {w.notes}" if getattr(w, "notes", None) else ""
+        blocks.append(f"- {date_str}: {name}{notes_str}\n{exercises_str}")
+    return blocks
+
+
+def _strength_entries(bundle, is_imperial: bool, max_exercises: int) -> List[Dict]:
+    """Summary pieces and chart points for the strongest exercises."""
+    strength_data = getattr(bundle, "strength_data", None)
+    progress = getattr(strength_data, "exercise_strength_progress", None) or []
+
+    exercises = []
+    for ex_prog in progress:
+        series = getattr(ex_prog, "e1rm_time_series", None)
+        if series:
+            best = max(series, key=lambda x: x.estimated_1rm)
+            total = getattr(ex_prog, "total_points", None) or len(series)
+            exercises.append((best.estimated_1rm, ex_prog.exercise, series, total))
+
+    entries = []
+    for best_e1rm, exercise, series, total in sorted(
+        exercises, key=lambda x: x[0], reverse=True
+    )[:max_exercises]:
+        first, last = series[0], series[-1]
+        change_kg = last.estimated_1rm - first.estimated_1rm
+        change_pct = (
+            (change_kg / first.estimated_1rm * 100) if first.estimated_1rm > 0 else 0
+        )
+        change_formatted = format_weight(abs(change_kg), is_imperial)
+        change = (
+            f"+{change_formatted} (+{change_pct:.1f}%)"
+            if change_kg >= 0
+            else f"-{change_formatted} ({change_pct:.1f}%)"
+        )
+        entries.append(
+            {
+                "exercise": exercise,
+                "best": format_weight(best_e1rm, is_imperial),
+                "change": change,
+                "total_points": total,
+                # Raw chart points stay in kg (see the prompt's chart rules)
+                "points": [
+                    [_format_date(p.date, "%Y-%m-%d"), round(p.estimated_1rm, 1)]
+                    for p in SeriesDownsampler.downsample(
+                        series,
+                        MAX_POINTS,
+                        x=lambda p: p.date.timestamp(),
+                        y=lambda p: p.estimated_1rm,
+                    )
+                ],
+            }
+        )
+    return entries
+
+
+def _last_weights(bundle) -> Dict[str, Dict[str, Any]]:
+    """Heaviest set from the most recent session of each exercise definition."""
+    last_weights = {}
+    # recent_workouts is sorted newest first
+    for workout in getattr(bundle, "recent_workouts", None) or []:
+        for exercise in workout.exercises:
+            def_id = exercise.definition_id
+            if not def_id or def_id in last_weights or not exercise.sets:
+                continue
+            heaviest_set = max(
+                [s for s in exercise.sets if s.weight],
+                key=lambda s: s.weight,
+                default=None,
+            )
+            if heaviest_set and heaviest_set.weight:
+                last_weights[def_id] = {
+                    "weight": heaviest_set.weight,
+                    "reps": heaviest_set.reps,
+                    "date": _format_date(workout.date, "%b %d"),
+                }
+    return last_weights
+
+
+def build_context_snapshot(bundle, is_imperial: bool) -> Dict[str, Any]:
+    """Render the prompt-ready context snapshot for a bundle."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "is_imperial": is_imperial,
+        "generated_at": datetime.now().isoformat(),
+        "workouts": _workout_blocks(bundle, is_imperial, MAX_WORKOUTS),
+        "strength": _strength_entries(bundle, is_imperial, MAX_EXERCISES),
+        "last_weights": _last_weights(bundle),
+    }
+    snapshot["tokens"] = {
+        "workout_history": count_tokens(format_workout_history(snapshot, MAX_WORKOUTS)),
+        "strength_progression": count_tokens(
+            format_strength_progression(snapshot, MAX_EXERCISES, MAX_POINTS)
+        ),
+    }
+    return snapshot
+
+
+def get_context_snapshot(bundle, is_imperial: bool) -> Dict[str, Any]:
+    """
+    The bundle's stored snapshot if it is current and in the right units,
+    otherwise a freshly built one (older bundles, unit preference changed).
+    """
+    metadata = getattr(bundle, "metadata", None)
+    snapshot: Optional[Dict] = getattr(metadata, "context_snapshot", None)
+    if (
+        snapshot
+        and snapshot.get("version") == SNAPSHOT_VERSION
+        and snapshot.get("is_imperial") == is_imperial
+    ):
+        return snapshot
+
+    if bundle is not None:
+        logger.info(f"📸 No usable context snapshot for bundle {getattr(bundle, 'id', None)} - building")
+    return build_context_snapshot(bundle, is_imperial)
+
+
+def _downsample_points(points: List, max_points: int) -> List:
+    return SeriesDownsampler.downsample(
+        points,
+        max_points,
+        x=lambda p: date.fromisoformat(p[0]).toordinal(),
+        y=lambda p: p[1],
+    )
+
+
+def format_workout_history(snapshot: Dict[str, Any], max_workouts: int) -> str:
+    """The most recent max_workouts workouts with full set details."""
+    blocks = snapshot.get("workouts", [])[:max_workouts]
+    return "\n\n".join(blocks) if blocks else NO_WORKOUTS
+
+
+def format_strength_progression(
+    snapshot: Dict[str, Any], max_exercises: int, max_points: int
+) -> str:
+    """
+    e1RM progression for the strongest max_exercises exercises.
+
+    max_points=0 renders summary lines only (no raw chart data); fewer
+    points than stored are a shape-preserving downsample, not the latest N.
+    """
+    entries = snapshot.get("strength", [])[:max_exercises]
+    if not entries:
+        return NO_STRENGTH
+
+    lines = ["**Top Exercise Strength Progression (e1RM):**"]
+    for entry in entries:
+        points = _downsample_points(entry["points"], max_points) if max_points > 0 else []
+        point_count = len(points) if max_points > 0 else entry["total_points"]
+        lines.append(
+            f"- {entry['exercise']}: Best {entry['best']} | Change: {entry['change']} "
+            f"| Data Points: {point_count}"
+        )
+        if points:
+            # RAW DATA BLOCK for chart extraction (hidden from user but visible to LLM)
+            lines.append(
+                f"  Raw data (kg): [{', '.join(f'{d}: {v}' for d, v in points)}]"
+            )
+    return "\n".join(lines)
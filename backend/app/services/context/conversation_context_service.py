@@ -1,13 +1,18 @@
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-
-from ...core.utils.conversation_attachments import load_conversation_context
+from datetime import datetime
+from typing import Optional
+
+from ...core.events import MessageSaved, event_bus
+from ...core.utils.conversation_attachments import (
+    ConversationAttachmentsService,
+    load_conversation_context,
+)
 from ..db.conversation_service import ConversationService
 from ..db.message_service import MessageService
 from ..db.context_service import ContextBundleService
+from ..cache.async_cache import AsyncCache
+from ..workout_analysis.bundle_registry import bundle_registry
 from app.schemas.schemas import ConversationContext
 import logging
-import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -18,27 +23,34 @@ class ConversationContextService:
 
     Encapsulates caching logic and database operations behind a clean interface.
     Automatically handles:
-    - Smart caching with 30-minute expiration
+    - Smart caching with 30-minute expiration (AsyncCache: bounded LRU,
+      concurrent loads of a conversation share one database load)
     - Fallback from cache to database
-    - Retry logic for pending analysis
+    - Waiting for a pending analysis bundle (bundle_registry) instead of
+      polling the database
     - Type conversion from database formats to typed objects
-    - Cache invalidation when new data is added
+    - Cache updates when new data is added (saved messages are appended to
+      the cached context - MessageSaved event - instead of reloading it)
     - Both user (JWT) and server (admin) operations
     """
 
     def __init__(self):
+        # Cache configuration
+        self.cache_expiry_minutes = 30
+        self.pending_bundle_timeout_seconds = 10
+
         # In-memory cache for conversation contexts
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache: AsyncCache[str, ConversationContext] = AsyncCache(
+            "conversation_context",
+            max_entries=500,
+            ttl_seconds=self.cache_expiry_minutes * 60,
+        )
 
         # Database services (used as fallback when cache misses)
         self.conversation_service = ConversationService()
         self.message_service = MessageService()
         self.context_bundle_service = ContextBundleService()
 
-        # Cache configuration
-        self.cache_expiry_minutes = 30
-        self.pending_analysis_max_retries = 20  # 10 seconds at 500ms intervals
-
     async def load_context(
         self, conversation_id: str, jwt_token: str, user_id: Optional[str] = None
     ) -> ConversationContext:
@@ -50,27 +62,24 @@ class ConversationContextService:
             )
 
             # FAST PATH: Check cache first
-            if self._is_cached_and_valid(conversation_id):
+            if self._cache.is_fresh(conversation_id):
+                context = await self._cache.get(conversation_id)
                 elapsed = (datetime.now() - start_time).total_seconds()
                 logger.info(
                     f"⚡ CACHE HIT: Context loaded in {elapsed:.2f}s for conversation: {conversation_id}"
                 )
-                self._update_last_accessed(conversation_id)
-                return self._cache[conversation_id]["context"]
+                return context
 
-            # SLOW PATH: Cache miss - load from database
-            elapsed = (datetime.now() - start_time).total_seconds()
+            # SLOW PATH: Cache miss - load from database (shared with concurrent misses)
             logger.info(
-                f"💾 CACHE MISS: Loading from database for conversation: {conversation_id} (check took {elapsed:.2f}s)"
+                f"💾 CACHE MISS: Loading from database for conversation: {conversation_id}"
             )
 
-            context = await self._load_from_database_with_retries(
-                conversation_id, jwt_token, user_id
+            context = await self._cache.get(
+                conversation_id,
+                lambda: self._load_from_database(conversation_id, jwt_token, user_id),
             )
 
-            # Store in cache for future requests
-            self._store_in_cache(conversation_id, context)
-
             total_elapsed = (datetime.now() - start_time).total_seconds()
             logger.info(
                 f"✅ UNIFIED SERVICE: Context loaded successfully in {total_elapsed:.2f}s - {len(context.messages)} messages, {len(context.bundles)} bundles"
@@ -93,27 +102,24 @@ class ConversationContextService:
             )
 
             # FAST PATH: Check cache first
-            if self._is_cached_and_valid(conversation_id):
+            if self._cache.is_fresh(conversation_id):
+                context = await self._cache.get(conversation_id)
                 elapsed = (datetime.now() - start_time).total_seconds()
                 logger.info(
                     f"⚡ CACHE HIT: Admin context loaded in {elapsed:.2f}s for conversation: {conversation_id}"
                 )
-                self._update_last_accessed(conversation_id)
-                return self._cache[conversation_id]["context"]
+                return context
 
             # SLOW PATH: Cache miss - load from database with admin client
-            elapsed = (datetime.now() - start_time).total_seconds()
             logger.info(
-                f"💾 CACHE MISS: Loading from database with admin for conversation: {conversation_id} (check took {elapsed:.2f}s)"
+                f"💾 CACHE MISS: Loading from database with admin for conversation: {conversation_id}"
             )
 
-            context = await self._load_from_database_with_retries_admin(
-                conversation_id, user_id
+            context = await self._cache.get(
+                conversation_id,
+                lambda: self._load_from_database_admin(conversation_id, user_id),
             )
 
-            # Store in cache for future requests
-            self._store_in_cache(conversation_id, context)
-
             total_elapsed = (datetime.now() - start_time).total_seconds()
             logger.info(
                 f"✅ ADMIN: Context loaded successfully in {total_elapsed:.2f}s - {len(context.messages)} messages, {len(context.bundles)} bundles"
@@ -156,106 +162,109 @@ class ConversationContextService:
 
         Call this when you know the conversation has changed.
         """
-        if conversation_id in self._cache:
-            del self._cache[conversation_id]
+        if self._cache.invalidate(conversation_id):
             logger.info(f"Invalidated cache for conversation: {conversation_id}")
 
+    async def append_message(self, event: MessageSaved) -> None:
+        """
+        Add a saved message to the cached context (MessageSaved handler).
+
+        The event carries ids only. A message saved by this worker uses the
+        row it just inserted; one saved elsewhere is read back, and only if
+        the conversation is cached. Any load in flight is detached, as it
+        may have read the messages before this one was saved.
+        """
+        row = self.message_service.take_saved_row(event.message_id)
+        if row is None:
+            if self._cache.peek(event.conversation_id) is None:
+                self._cache.invalidate(event.conversation_id)
+                return
+            result = await self.message_service.get_message_admin(event.message_id)
+            row = result["data"] if result.get("success") else None
+
+        # Re-read after any fetch: the context may have changed meanwhile
+        context = self._cache.peek(event.conversation_id)
+        self._cache.invalidate(event.conversation_id)
+        if context is None or row is None:
+            return
+
+        new_messages = ConversationAttachmentsService()._convert_messages_to_langchain(
+            [row]
+        )
+        self._cache.set(
+            event.conversation_id,
+            ConversationContext(
+                messages=[*context.messages, *new_messages], bundles=context.bundles
+            ),
+        )
+        logger.info(
+            f"➕ Appended {event.sender} message to cached context for conversation: {event.conversation_id}"
+        )
+
     def cleanup_expired_cache(self):
         """
         Remove expired conversations from cache.
 
         Called automatically, but you can call manually for memory management.
         """
-        now = datetime.now()
-        expired_keys = [
-            key for key, value in self._cache.items() if now >= value["expires_at"]
-        ]
-
-        for key in expired_keys:
-            del self._cache[key]
-
-        if expired_keys:
-            logger.info(f"Cleaned up {len(expired_keys)} expired conversation contexts")
+        expired = self._cache.purge_expired()
+        if expired:
+            logger.info(f"Cleaned up {expired} expired conversation contexts")
 
     # =========================
     # INTERNAL IMPLEMENTATION
     # =========================
 
-    async def _load_from_database_with_retries(
+    async def _wait_for_pending_bundle(self, user_id: Optional[str]):
+        """Wait (bounded) for a bundle generation running for the user."""
+        if user_id and bundle_registry.is_pending(user_id):
+            logger.info(f"⏳ Waiting for pending analysis bundle for user: {user_id}")
+            await bundle_registry.wait_for(
+                user_id, timeout=self.pending_bundle_timeout_seconds
+            )
+
+    async def _load_from_database(
         self, conversation_id: str, jwt_token: str, user_id: Optional[str]
     ) -> ConversationContext:
-        """Load from database with retries using user JWT"""
-        for attempt in range(self.pending_analysis_max_retries):
-            # Try RPC approach first (more reliable, single call)
-            try:
-                context_result = await load_conversation_context(conversation_id)
-                if context_result["success"]:
-                    context = context_result["data"]
-                    if context.bundles or not any(True for _ in context.bundles):
-                        return context
-                    await asyncio.sleep(0.5)
-                    continue
-            except Exception as e:
-                logger.warning(f"RPC load failed: {str(e)}")
-
-            # If RPC fails and we don't have user_id, can't use fallback
-            if not user_id:
-                logger.warning(
-                    "No user_id provided, cannot use fallback loading method"
-                )
-                break
+        """Load from database using user JWT, once any pending bundle is ready"""
+        await self._wait_for_pending_bundle(user_id)
 
-            # Try fallback method
-            try:
-                context = await self._load_via_separate_calls(
-                    conversation_id, jwt_token, user_id
-                )
-                if context.bundles:
-                    return context
-                await asyncio.sleep(0.5)
-            except Exception as e:
-                logger.warning(f"Fallback load failed: {str(e)}")
-                await asyncio.sleep(0.5)
-
-        # Return what we can get
+        # Try RPC approach first (more reliable, single call)
         try:
             context_result = await load_conversation_context(conversation_id)
-            return (
-                context_result["data"]
-                if context_result["success"]
-                else ConversationContext(messages=[], bundles=[])
+            if context_result["success"]:
+                return context_result["data"]
+        except Exception as e:
+            logger.warning(f"RPC load failed: {str(e)}")
+
+        # If RPC fails and we don't have user_id, can't use fallback
+        if not user_id:
+            logger.warning("No user_id provided, cannot use fallback loading method")
+            return ConversationContext(messages=[], bundles=[])
+
+        # Try fallback method
+        try:
+            return await self._load_via_separate_calls(
+                conversation_id, jwt_token, user_id
             )
-        except:
+        except Exception as e:
+            logger.warning(f"Fallback load failed: {str(e)}")
             return ConversationContext(messages=[], bundles=[])
 
-    async def _load_from_database_with_retries_admin(
+    async def _load_from_database_admin(
         self, conversation_id: str, user_id: Optional[str]
     ) -> ConversationContext:
-        """Load from database with retries using admin client"""
-        for attempt in range(self.pending_analysis_max_retries):
-            try:
-                # Use the conversation_attachments with admin client (it already uses admin client)
-                context_result = await load_conversation_context(conversation_id)
-                if context_result["success"]:
-                    context = context_result["data"]
-                    if context.bundles or not any(True for _ in context.bundles):
-                        return context
-                    await asyncio.sleep(0.5)
-                    continue
-            except Exception as e:
-                logger.warning(f"Admin RPC load failed: {str(e)}")
-                await asyncio.sleep(0.5)
-
-        # Return what we can get
+        """Load from database using admin client, once any pending bundle is ready"""
+        await self._wait_for_pending_bundle(user_id)
+
         try:
+            # Use the conversation_attachments with admin client (it already uses admin client)
             context_result = await load_conversation_context(conversation_id)
-            return (
-                context_result["data"]
-                if context_result["success"]
-                else ConversationContext(messages=[], bundles=[])
-            )
-        except:
-            return ConversationContext(messages=[], bundles=[])
+            if context_result["success"]:
+                return context_result["data"]
+        except Exception as e:
+            logger.warning(f"Admin RPC load failed: {str(e)}")
+        return ConversationContext(messages=[], bundles=[])
 
     async def _load_via_separate_calls(
         self, conversation_id: str, jwt_token: str, user_id: Optional[str]
@@ -287,28 +296,8 @@ class ConversationContextService:
 
         return ConversationContext(messages=langchain_messages, bundles=workout_bundles)
 
-    def _is_cached_and_valid(self, conversation_id: str) -> bool:
-        """Check if conversation is cached and not expired."""
-        if conversation_id not in self._cache:
-            return False
-        return datetime.now() < self._cache[conversation_id]["expires_at"]
-
-    def _store_in_cache(self, conversation_id: str, context: ConversationContext):
-        """Store context in cache with expiration."""
-        now = datetime.now()
-        self._cache[conversation_id] = {
-            "context": context,
-            "expires_at": now + timedelta(minutes=self.cache_expiry_minutes),
-            "last_accessed": now,
-        }
-        logger.info(
-            f"💾 CACHED: Stored context for conversation: {conversation_id} (expires in {self.cache_expiry_minutes} min)"
-        )
-
-    def _update_last_accessed(self, conversation_id: str):
-        """Update last accessed time for cache entry."""
-        self._cache[conversation_id]["last_accessed"] = datetime.now()
-
 
 # Single shared instance - you just import and use this
 conversation_context_service = ConversationContextService()
+
+event_bus.subscribe(MessageSaved, conversation_context_service.append_message)
@@ -1,9 +1,13 @@
 import logging
 import asyncio
 from typing import Dict, Any, Optional
+from app.core.events import BundleReady, MemoryAppended, ProfileUpdated, event_bus
 from app.services.db.user_profile_service import UserProfileService
 from app.services.db.context_service import ContextBundleService
+from app.services.cache.async_cache import AsyncCache
 from app.services.cache.glossary_terms import glossary_cache
+from app.services.context.bundle_view import BundleView
+from app.services.workout_analysis.bundle_registry import bundle_registry
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +16,22 @@ class SharedContextLoader:
     """
     Loads all shared context once per WebSocket connection.
     Replaces duplicated context loading across separate services.
+
+    Bundles are cached as compact BundleView projections (see bundle_view),
+    not full UserContextBundle objects.
+
+    Cached per user for 5 minutes; for 5 more minutes a stale context is
+    served while it reloads in the background. Concurrent connects for a
+    user share one load. A user's entry is dropped as soon as a new bundle,
+    memory note or profile change is published; while a bundle is being
+    generated (e.g. right after a workout was logged), loads wait for it.
     """
 
-    # Simple in-memory cache: {user_id: {'data': context, 'timestamp': float}}
-    _cache: Dict[str, Dict] = {}
-    _CACHE_TTL = 300  # 5 minutes
+    pending_bundle_timeout_seconds = 10
+
+    _cache: AsyncCache[str, Dict[str, Any]] = AsyncCache(
+        "shared_context", max_entries=1000, ttl_seconds=300, stale_ttl_seconds=300
+    )
 
     def __init__(self):
         self.profile_service = UserProfileService()
@@ -25,9 +40,8 @@ class SharedContextLoader:
     @classmethod
     def invalidate_bundle_cache(cls, user_id: str):
         """Invalidate cache for a specific user"""
-        if user_id in cls._cache:
+        if cls._cache.invalidate(user_id):
             logger.info(f"🧹 Invalidating shared context cache for user: {user_id}")
-            del cls._cache[user_id]
 
     async def load_all(self, user_id: str) -> Dict[str, Any]:
         """
@@ -38,21 +52,22 @@ class SharedContextLoader:
             {
                 "user_id": str,
                 "profile": dict | None,
-                "bundle": UserContextBundle | None,
+                "bundle": BundleView | None,
                 "glossary_terms": list,
                 "has_profile": bool,
                 "has_bundle": bool
             }
         """
-        import time
-
-        # Check cache
-        if user_id in self._cache:
-            cache_entry = self._cache[user_id]
-            if time.time() - cache_entry["timestamp"] < self._CACHE_TTL:
-                logger.debug(f"✅ Served shared context from cache for user: {user_id}")
-                return cache_entry["data"]
+        if bundle_registry.is_pending(user_id):
+            # BundleReady drops the cached context before waiters resume
+            logger.info(f"⏳ Waiting for pending analysis bundle for user: {user_id}")
+            await bundle_registry.wait_for(
+                user_id, timeout=self.pending_bundle_timeout_seconds
+            )
+        return await self._cache.get(user_id, lambda: self._load(user_id))
 
+    async def _load(self, user_id: str) -> Dict[str, Any]:
+        """Fetch profile, bundle and glossary in parallel (cache loader)."""
         logger.info(f"🔄 Loading shared context for user: {user_id}")
 
         # Run fetches in parallel
@@ -101,7 +116,8 @@ class SharedContextLoader:
             and bundle_result.get("success")
             and bundle_result.get("data")
         ):
-            context["bundle"] = bundle_result["data"]
+            is_imperial = bool(context["profile"] and context["profile"].get("is_imperial"))
+            context["bundle"] = BundleView.from_bundle(bundle_result["data"], is_imperial)
             context["has_bundle"] = True
             logger.info("✅ Analysis bundle loaded")
         else:
@@ -120,7 +136,10 @@ class SharedContextLoader:
                 f"⚠️ Glossary load returned unexpected format: {type(glossary_result)}"
             )
 
-        # Update cache
-        self._cache[user_id] = {"data": context, "timestamp": time.time()}
-
         return context
+
+
+event_bus.subscribe(
+    (BundleReady, MemoryAppended, ProfileUpdated),
+    lambda event: SharedContextLoader.invalidate_bundle_cache(event.user_id),
+)
@@ -0,0 +1,195 @@
+"""
+Token Budget Manager for coach context assembly
+
+Counts tokens per prompt section and fits the sections into an overall budget.
+Sections are trimmed lowest-priority first: a section's reducer (which can
+re-render or summarize it at a smaller size) is tried before falling back to
+line-level truncation.
+
+Budget is set with COACH_CONTEXT_TOKEN_BUDGET (context sections only - the
+fixed coaching instructions are not counted).
+
+Conversation history has its own budget (COACH_HISTORY_TOKEN_BUDGET), enforced
+by rolling compaction: select_compaction_slice picks the oldest messages to
+fold into the running summary.
+"""
+
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 8000
+DEFAULT_HISTORY_TOKEN_BUDGET = 6000
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate token count (~4 chars per token for English prose).
+
+    Cheap enough to run on every section of every turn; exact provider
+    counts are recorded separately from usage metadata.
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text on a line boundary so it fits max_tokens, noting what was dropped."""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.append(f"... ({omitted} more lines omitted to fit context budget)")
+    return "\n".join(kept)
+
+
+def first_fitting(max_tokens: int, renderers: Iterable[Callable[[], str]]) -> str:
+    """
+    Render candidates (largest first) until one fits max_tokens.
+
+    Returns the last (smallest) rendering if none fit, or "" if there are none.
+    """
+    text = ""
+    for render in renderers:
+        text = render()
+        if count_tokens(text) <= max_tokens:
+            break
+    return text
+
+
+@dataclass
+class PromptSection:
+    """
+    One budgeted section of the prompt.
+
+    Lower priority numbers are more important and trimmed last. reducer, if
+    given, receives a token target and returns a smaller rendering of the
+    section (best effort - the result is truncated if still over).
+    """
+
+    name: str
+    text: str
+    priority: int
+    min_tokens: int = 0
+    reducer: Optional[Callable[[int], str]] = None
+
+
+class TokenBudgetManager:
+    """Allocates a token budget across prompt sections by priority."""
+
+    def __init__(self, budget: Optional[int] = None):
+        if budget is None:
+            budget = int(
+                os.environ.get("COACH_CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)
+            )
+        self.budget = budget
+
+    def fit(self, sections: List[PromptSection]) -> Dict[str, str]:
+        """
+        Fit sections into the budget.
+
+        Returns:
+            {section_name: text} with lower-priority sections reduced as needed
+        """
+        texts = {s.name: s.text for s in sections}
+        tokens = {s.name: count_tokens(s.text) for s in sections}
+        over = sum(tokens.values()) - self.budget
+
+        if over <= 0:
+            return texts
+
+        # Least important first
+        for section in sorted(sections, key=lambda s: s.priority, reverse=True):
+            if over <= 0:
+                break
+
+            current = tokens[section.name]
+            target = max(section.min_tokens, current - over)
+            if target >= current:
+                continue
+
+            text = (section.reducer(target) if section.reducer else "") or section.text
+            if count_tokens(text) > target:
+                text = truncate_to_tokens(text, target)
+
+            new_tokens = count_tokens(text)
+            over -= current - new_tokens
+            texts[section.name] = text
+            tokens[section.name] = new_tokens
+            logger.info(
+                f"✂️ Trimmed '{section.name}' {current}→{new_tokens} tokens to fit budget"
+            )
+
+        if over > 0:
+            logger.warning(
+                f"⚠️ Context still {over} tokens over budget ({self.budget}) after trimming"
+            )
+        return texts
+
+    @staticmethod
+    def section_tokens(texts: Dict[str, str]) -> Dict[str, int]:
+        """Per-section token counts."""
+        return {name: count_tokens(text) for name, text in texts.items()}
+
+
+def history_token_budget() -> int:
+    """Token budget for raw conversation history (COACH_HISTORY_TOKEN_BUDGET)."""
+    return int(os.environ.get("COACH_HISTORY_TOKEN_BUDGET", DEFAULT_HISTORY_TOKEN_BUDGET))
+
+
+def select_compaction_slice(
+    messages: List[Dict[str, str]],
+    budget: int,
+    target_ratio: float = 0.5,
+    keep_recent: int = 6,
+    max_slice_tokens: int = 4000,
+) -> int:
+    """
+    Choose how many of the oldest messages to compact.
+
+    Nothing is compacted until history exceeds budget; then the oldest
+    messages are taken until the remainder is at or under target_ratio *
+    budget, never touching the last keep_recent messages and never taking
+    more than max_slice_tokens in one pass (a very long backlog is worked
+    through over several passes). The slice ends before a user message so a
+    question and its answer stay together.
+
+    Args:
+        messages: History dicts with 'role' and 'content', oldest first
+
+    Returns:
+        Number of leading messages to compact (0 = nothing to do)
+    """
+    tokens = [count_tokens(m["content"]) for m in messages]
+    total = sum(tokens)
+    if total <= budget:
+        return 0
+
+    target = int(budget * target_ratio)
+    limit = max(0, len(messages) - keep_recent)
+    cutoff = 0
+    taken = 0
+    while cutoff < limit and total - taken > target:
+        if taken + tokens[cutoff] > max_slice_tokens and cutoff > 0:
+            break
+        taken += tokens[cutoff]
+        cutoff += 1
+
+    # Don't separate an answer from its question
+    while 0 < cutoff < len(messages) and messages[cutoff]["role"] != "user":
+        cutoff -= 1
+    return cutoff
@@ -19,6 +19,27 @@ class BaseDBService:
 
         return supabase_factory.get_admin_client()
 
+    async def get_table_version_admin(
+        self, table: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Cheap change check for a reference table: exact row count plus the
+        latest updated_at, from a single-row query.
+
+        Returns:
+            {'success': bool, 'data': 'count:max_updated_at', 'error': str}
+        """
+        try:
+            query = self.get_admin_client().table(table).select("updated_at", count="exact")
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            result = query.order("updated_at", desc=True).limit(1).execute()
+
+            latest = result.data[0].get("updated_at") if result.data else None
+            return await self.format_response(f"{result.count}:{latest}")
+        except Exception as e:
+            return await self.handle_error(f"get_table_version_admin({table})", e)
+
     async def handle_error(self, operation: str, error: Exception) -> Dict[str, Any]:
         """Standardized error handling"""
         logger.error(f"Error in {operation}: {str(error)}")
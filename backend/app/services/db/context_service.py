@@ -7,8 +7,9 @@ Location: /app/services/db/analysis_service.py
 """
 
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from app.core.events import MemoryAppended, event_bus
 from app.core.supabase.client import get_user_client, get_admin_client
 from ..workout_analysis.schemas import UserContextBundle
 
@@ -63,6 +64,14 @@ class ContextBundleService:
         """Return default consistency data structure for NULL/missing data."""
         return {"avg_days_between": 0.0, "variance": None}
 
+    async def _publish_memory_appended(self, rows: List[Dict[str, Any]]) -> None:
+        """Tell subscribed caches that these bundles' ai_memory changed."""
+        for row in rows:
+            if row.get("user_id"):
+                await event_bus.publish(
+                    MemoryAppended(user_id=row["user_id"], bundle_id=row.get("id"))
+                )
+
     def _normalize_ai_memory(self, ai_memory: Any) -> Optional[Dict[str, Any]]:
         """
         Normalize ai_memory to ensure it's always a dict with 'notes' key.
@@ -323,6 +332,7 @@ class ContextBundleService:
                 "created_at": bundle_dict["metadata"]["created_at"],
                 "data_window": bundle_dict["metadata"]["data_window"],
                 "errors": bundle_dict["metadata"]["errors"],
+                "context_snapshot": bundle_dict["metadata"].get("context_snapshot"),
             }
 
             # Store complete workout data (general + recent) in 'workouts' column
@@ -404,6 +414,7 @@ class ContextBundleService:
                 "created_at": bundle_dict["metadata"]["created_at"],
                 "data_window": bundle_dict["metadata"]["data_window"],
                 "errors": bundle_dict["metadata"]["errors"],
+                "context_snapshot": bundle_dict["metadata"].get("context_snapshot"),
             }
 
             # Store complete workout data (general + recent) in 'workouts' column
@@ -495,6 +506,7 @@ class ContextBundleService:
 
             if hasattr(result, "data") and result.data:
                 logger.debug(f"ai_memory updated successfully (admin): {bundle_id}")
+                await self._publish_memory_appended(result.data)
                 return {"success": True}
             else:
                 error = f"Failed to update ai_memory (admin): No data returned for bundle {bundle_id}"
@@ -575,6 +587,7 @@ class ContextBundleService:
                 logger.info(
                     f"✅ Appended notes successfully, total: {len(unique_notes)}"
                 )
+                await self._publish_memory_appended(update_result.data)
                 return {"success": True, "note_count": len(unique_notes)}
             else:
                 return {"success": False, "error": "Failed to save updated memory"}
@@ -809,6 +822,7 @@ class ContextBundleService:
                 )
 
                 logger.info(f"Updated bundle {bundle['id']} with onboarding notes")
+                await self._publish_memory_appended(update_result.data or [])
                 return (
                     await self.format_response(update_result.data[0])
                     if hasattr(self, "format_response")
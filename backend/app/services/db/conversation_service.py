@@ -1,6 +1,6 @@
 # backend/app/services/db/conversation_service.py
 from app.services.db.base_service import BaseDBService
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,6 +9,10 @@ logger = logging.getLogger(__name__)
 class ConversationService(BaseDBService):
     """Service for handling conversation operations"""
 
+    # Whether conversations.running_summary exists - set at startup by
+    # check_running_summary_column() (None: not checked yet)
+    running_summary_supported: Optional[bool] = None
+
     async def create_conversation(
         self, title: str, config_name: str, user, jwt_token: str
     ) -> Dict[str, Any]:
@@ -152,5 +156,74 @@ class ConversationService(BaseDBService):
             logger.error(f"Error in create_conversation_with_messages: {str(e)}")
             return await self.handle_error("create_conversation_with_messages", e)
 
+    async def check_running_summary_column(self) -> Optional[bool]:
+        """
+        Check that conversations.running_summary exists (startup).
+
+        Without it rolling compaction still works in memory, but summaries
+        are not persisted: this logs one warning and the running summary
+        methods below become no-ops.
+        """
+        try:
+            admin_client = self.get_admin_client()
+            admin_client.table("conversations").select("running_summary").limit(1).execute()
+            ConversationService.running_summary_supported = True
+        except Exception as e:
+            if "running_summary" not in str(e):
+                logger.warning(f"⚠️ Could not check conversations.running_summary: {e}")
+                return None
+            ConversationService.running_summary_supported = False
+            logger.warning(
+                "⚠️ conversations.running_summary column is missing - coach history "
+                "summaries will not survive reconnects. Add it with: "
+                "alter table conversations add column running_summary jsonb;"
+            )
+        return ConversationService.running_summary_supported
+
+    async def get_running_summary_admin(self, conversation_id: str) -> Dict[str, Any]:
+        """
+        Get the coach's rolling conversation summary (admin client).
+
+        Stored in conversations.running_summary (jsonb) as
+        {"text": str, "covered_messages": int, "updated_at": iso str};
+        data is None if the conversation has not been compacted yet (or the
+        column is missing, see check_running_summary_column).
+        """
+        if self.running_summary_supported is False:
+            return await self.format_response(None)
+        try:
+            admin_client = self.get_admin_client()
+            result = (
+                admin_client.table("conversations")
+                .select("running_summary")
+                .eq("id", conversation_id)
+                .limit(1)
+                .execute()
+            )
+            row = result.data[0] if result.data else {}
+            return await self.format_response(row.get("running_summary"))
+
+        except Exception as e:
+            return await self.handle_error("get_running_summary_admin", e)
+
+    async def save_running_summary_admin(
+        self, conversation_id: str, summary: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Persist the coach's rolling conversation summary (admin client)."""
+        if self.running_summary_supported is False:
+            return await self.format_response(None)
+        try:
+            admin_client = self.get_admin_client()
+            result = (
+                admin_client.table("conversations")
+                .update({"running_summary": summary})
+                .eq("id", conversation_id)
+                .execute()
+            )
+            return await self.format_response(result.data)
+
+        except Exception as e:
+            return await self.handle_error("save_running_summary_admin", e)
+
 
 conversation_service = ConversationService()
@@ -1,5 +1,6 @@
 from app.services.db.base_service import BaseDBService
 from app.services.db.workout_service import WorkoutService
+from app.services.cache.exercise_definitions import exercise_cache
 from typing import Dict, List, Any
 import logging
 from datetime import datetime, timedelta, timezone  # Add timezone import
@@ -108,12 +109,15 @@ class DashboardService(BaseDBService):
                 f"Processing {len(recent_workouts)} workouts for dashboard analytics"
             )
 
+            # Primary muscles per definition, from the exercise cache index
+            primary_muscles = (await exercise_cache.get_index()).primary_muscles
+
             # Process data for all timeframes
             dashboard_data = {
-                "1week": self._calculate_timeframe_data(recent_workouts, 7),
-                "2weeks": self._calculate_timeframe_data(recent_workouts, 14),
-                "1month": self._calculate_timeframe_data(recent_workouts, 30),
-                "2months": self._calculate_timeframe_data(recent_workouts, 60),
+                "1week": self._calculate_timeframe_data(recent_workouts, 7, primary_muscles),
+                "2weeks": self._calculate_timeframe_data(recent_workouts, 14, primary_muscles),
+                "1month": self._calculate_timeframe_data(recent_workouts, 30, primary_muscles),
+                "2months": self._calculate_timeframe_data(recent_workouts, 60, primary_muscles),
                 "lastUpdated": datetime.now(timezone.utc).isoformat(),
             }
 
@@ -135,7 +139,7 @@ class DashboardService(BaseDBService):
             return await self.handle_error("get_dashboard_data", e)
 
     def _calculate_timeframe_data(
-        self, workouts: List[Dict], days: int
+        self, workouts: List[Dict], days: int, primary_muscles: Dict[str, List[str]]
     ) -> Dict[str, Any]:
         """Calculate muscle balance and consistency for a specific timeframe"""
         # Use UTC timezone-aware datetime
@@ -168,50 +172,18 @@ class DashboardService(BaseDBService):
                 "exercises": actual_exercises,
                 "sets": actual_sets,
             },
-            "muscleBalance": self._calculate_muscle_balance(timeframe_workouts),
+            "muscleBalance": self._calculate_muscle_balance(
+                timeframe_workouts, primary_muscles
+            ),
             "consistency": self._calculate_consistency(timeframe_workouts, days),
         }
 
-    def _get_all_exercise_definitions(self) -> Dict[str, List[str]]:
-        """Get all exercise definitions in one query and cache primary muscles"""
-        try:
-            admin_client = self.get_admin_client()
-            result = (
-                admin_client.table("exercise_definitions")
-                .select("id, primary_muscles")
-                .execute()
-            )
-
-            if hasattr(result, "error") and result.error:
-                logger.warning(
-                    f"Error batch fetching definitions: {result.error.message}"
-                )
-                return {}
-
-            # Return mapping: {definition_id: [primary_muscles]}
-            definitions_map = {}
-            for row in result.data or []:
-                definition_id = row.get("id")
-                primary_muscles = row.get("primary_muscles", [])
-                if definition_id:
-                    definitions_map[definition_id] = (
-                        primary_muscles if isinstance(primary_muscles, list) else []
-                    )
-
-            logger.info(f"Cached {len(definitions_map)} exercise definitions")
-            return definitions_map
-
-        except Exception as e:
-            logger.warning(f"Could not batch fetch definitions: {str(e)}")
-            return {}
-
-    def _calculate_muscle_balance(self, workouts: List[Dict]) -> List[Dict[str, Any]]:
+    def _calculate_muscle_balance(
+        self, workouts: List[Dict], exercise_definitions: Dict[str, List[str]]
+    ) -> List[Dict[str, Any]]:
         """Calculate muscle group balance from workouts"""
         muscle_sets = {}
 
-        # Batch fetch all exercise definitions once
-        exercise_definitions = self._get_all_exercise_definitions()
-
         for workout in workouts:
             for exercise in workout.get("workout_exercises", []):
                 definition_id = exercise.get("definition_id")
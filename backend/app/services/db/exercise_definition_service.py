@@ -71,6 +71,10 @@ class ExerciseDefinitionService(BaseDBService):
             )
             return {"success": False, "error": str(e)}
 
+    async def get_exercise_definitions_version_admin(self) -> Dict[str, Any]:
+        """Version of the active catalog (row count + latest updated_at)"""
+        return await self.get_table_version_admin("exercise_definitions", {"is_active": True})
+
     async def create_exercise_definition(
         self, exercise_data: Dict[str, Any], jwt_token: str
     ) -> Dict[str, Any]:
@@ -37,5 +37,9 @@ class GlossaryService(BaseDBService):
         except Exception as e:
             return await self.handle_error("get_all_glossary_terms_admin", e)
 
+    async def get_glossary_terms_version_admin(self) -> Dict[str, Any]:
+        """Version of the glossary (row count + latest updated_at)"""
+        return await self.get_table_version_admin("glossary_term")
+
 
 glossary_service = GlossaryService()
@@ -1,13 +1,32 @@
+from app.core.events import MessageSaved, event_bus
 from app.services.db.base_service import BaseDBService
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+SAVED_ROWS_MAX = 256  # rows kept for this worker's MessageSaved handlers
+
 
 class MessageService(BaseDBService):
     """Service for handling message operations"""
 
+    # Rows this worker just inserted, so its MessageSaved handlers use them
+    # instead of reading them back (events from other workers still fetch)
+    _saved_rows: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @classmethod
+    def take_saved_row(cls, message_id: str) -> Optional[Dict[str, Any]]:
+        """The row of a message saved by this worker (once), else None"""
+        return cls._saved_rows.pop(message_id, None)
+
+    @classmethod
+    def _remember_saved_row(cls, message: Dict[str, Any]) -> None:
+        cls._saved_rows[message.get("id")] = message
+        while len(cls._saved_rows) > SAVED_ROWS_MAX:
+            cls._saved_rows.popitem(last=False)
+
     async def get_conversation_messages(
         self, conversation_id: str, jwt_token: str
     ) -> Dict[str, Any]:
@@ -64,6 +83,29 @@ class MessageService(BaseDBService):
             logger.error(f"Error getting messages (admin): {str(e)}")
             return await self.handle_error("get_conversation_messages_admin", e)
 
+    async def get_message_admin(self, message_id: str) -> Dict[str, Any]:
+        """Get a single message by ID using admin access (for background tasks)"""
+        try:
+            admin_client = self.get_admin_client()
+            result = (
+                admin_client.table("messages")
+                .select("*")
+                .eq("id", message_id)
+                .execute()
+            )
+
+            if hasattr(result, "error") and result.error:
+                raise Exception(f"Failed to fetch message: {result.error.message}")
+
+            if not result.data:
+                raise Exception(f"Message {message_id} not found")
+
+            return await self.format_response(result.data[0])
+
+        except Exception as e:
+            logger.error(f"Error getting message (admin): {str(e)}")
+            return await self.handle_error("get_message_admin", e)
+
     async def save_message(
         self, conversation_id: str, content: str, sender: str, jwt_token: str
     ) -> Dict[str, Any]:
@@ -93,13 +135,16 @@ class MessageService(BaseDBService):
             message = result.data[0]
             logger.info(f"Message saved with ID: {message.get('id')}")
 
-            # Refresh context cache since we added a new message
-            from app.services.context.conversation_context_service import (
-                conversation_context_service,
+            # Cached contexts of this conversation pick up the new message
+            self._remember_saved_row(message)
+            await event_bus.publish(
+                MessageSaved(
+                    conversation_id=conversation_id,
+                    message_id=message.get("id"),
+                    sender=sender,
+                )
             )
 
-            await conversation_context_service.refresh_context(conversation_id)
-
             return await self.format_response(message)
 
         except Exception as e:
@@ -139,13 +184,16 @@ class MessageService(BaseDBService):
             message = result.data[0]
             logger.info(f"Server message saved with ID: {message.get('id')}")
 
-            # Refresh context cache since we added a new message
-            from app.services.context.conversation_context_service import (
-                conversation_context_service,
+            # Cached contexts of this conversation pick up the new message
+            self._remember_saved_row(message)
+            await event_bus.publish(
+                MessageSaved(
+                    conversation_id=conversation_id,
+                    message_id=message.get("id"),
+                    sender=sender,
+                )
             )
 
-            await conversation_context_service.refresh_context(conversation_id)
-
             return await self.format_response(message)
 
         except Exception as e:
@@ -1,3 +1,4 @@
+from app.core.events import ProfileUpdated, event_bus
 from app.services.db.base_service import BaseDBService
 from typing import Dict, Any
 import logging
@@ -87,6 +88,7 @@ class UserProfileService(BaseDBService):
                 raise Exception("Failed to fetch saved user profile")
 
             logger.info(f"Successfully saved profile for user {user_id} (admin)")
+            await event_bus.publish(ProfileUpdated(user_id=user_id))
             return {"success": True, "data": profile_result.data[0]}
 
         except Exception as e:
@@ -161,6 +163,7 @@ class UserProfileService(BaseDBService):
                 raise Exception("Failed to fetch updated user profile")
 
             logger.info(f"Successfully saved profile for user: {user_id}")
+            await event_bus.publish(ProfileUpdated(user_id=user_id))
             return await self.format_response(profile_result.data[0])
 
         except Exception as e:
@@ -287,6 +290,7 @@ class UserProfileService(BaseDBService):
                 raise Exception("Failed to update user profile")
 
             logger.info(f"Updated user profile for {user_id}")
+            await event_bus.publish(ProfileUpdated(user_id=user_id))
 
             # 2. Format memory notes
             from datetime import datetime
@@ -1,3 +1,4 @@
+from app.core.events import WorkoutCreated, WorkoutDeleted, WorkoutUpdated, event_bus
 from app.utils.one_rm_calc import OneRMCalculator
 from app.services.cache.exercise_definitions import exercise_cache
 from .base_service import BaseDBService
@@ -135,6 +136,10 @@ class WorkoutService(BaseDBService):
 
             # Regenerate bundle after deletion
             if user_id:
+                await event_bus.publish(
+                    WorkoutDeleted(user_id=user_id, workout_id=workout_id)
+                )
+
                 import asyncio
 
                 asyncio.create_task(self._regenerate_user_bundle(user_id, jwt_token))
@@ -323,14 +328,11 @@ class WorkoutService(BaseDBService):
             )
 
             # Build bodyweight exercise lookup from cache
-            bodyweight_exercises = {}
+            bodyweight_exercises = frozenset()
             if user_bodyweight_kg and workout_data.get("workout_exercises"):
-                all_exercises = await exercise_cache.get_all_exercises()
-                bodyweight_exercises = {
-                    ex["id"]: ex.get("is_bodyweight", False) for ex in all_exercises
-                }
+                bodyweight_exercises = (await exercise_cache.get_index()).bodyweight_ids
                 logger.info(
-                    f"Loaded {len(bodyweight_exercises)} exercise definition statuses for bodyweight check"
+                    f"Loaded {len(bodyweight_exercises)} bodyweight exercise ids for bodyweight check"
                 )
 
             # Insert workout
@@ -397,7 +399,7 @@ class WorkoutService(BaseDBService):
                                 # Add bodyweight for bodyweight exercises
                                 if (
                                     definition_id
-                                    and bodyweight_exercises.get(definition_id)
+                                    and definition_id in bodyweight_exercises
                                     and user_bodyweight_kg
                                 ):
                                     total_weight += user_bodyweight_kg
@@ -413,7 +415,7 @@ class WorkoutService(BaseDBService):
                                 # This ensures the 1RM stored represents "Max Added Weight" not "Total Force"
                                 if (
                                     definition_id
-                                    and bodyweight_exercises.get(definition_id)
+                                    and definition_id in bodyweight_exercises
                                     and user_bodyweight_kg
                                     and estimated_1rm
                                 ):
@@ -465,6 +467,7 @@ class WorkoutService(BaseDBService):
                 exercise["workout_exercise_sets"].sort(key=lambda x: x["set_number"])
 
             await self.update_bicep_leaderboard(workout_id, user_id, jwt_token)
+            await event_bus.publish(WorkoutCreated(user_id=user_id, workout_id=workout_id))
 
             import asyncio
 
@@ -511,12 +514,9 @@ class WorkoutService(BaseDBService):
                 raise Exception("Failed to update workout")
 
             # Build bodyweight exercise lookup from cache (same as create)
-            bodyweight_exercises = {}
+            bodyweight_exercises = frozenset()
             if user_bodyweight_kg and workout_data.get("workout_exercises"):
-                all_exercises = await exercise_cache.get_all_exercises()
-                bodyweight_exercises = {
-                    ex["id"]: ex.get("is_bodyweight", False) for ex in all_exercises
-                }
+                bodyweight_exercises = (await exercise_cache.get_index()).bodyweight_ids
 
             # If exercises are provided, replace them entirely
             if workout_data.get("workout_exercises"):
@@ -576,7 +576,7 @@ class WorkoutService(BaseDBService):
                                 # Add bodyweight for bodyweight exercises
                                 if (
                                     definition_id
-                                    and bodyweight_exercises.get(definition_id)
+                                    and definition_id in bodyweight_exercises
                                     and user_bodyweight_kg
                                 ):
                                     total_weight += user_bodyweight_kg
@@ -589,7 +589,7 @@ class WorkoutService(BaseDBService):
                                 # This ensures the 1RM stored represents "Max Added Weight" not "Total Force"
                                 if (
                                     definition_id
-                                    and bodyweight_exercises.get(definition_id)
+                                    and definition_id in bodyweight_exercises
                                     and user_bodyweight_kg
                                     and estimated_1rm
                                 ):
@@ -633,6 +633,9 @@ class WorkoutService(BaseDBService):
             )
             if workout_user:
                 await self.update_bicep_leaderboard(workout_id, workout_user, jwt_token)
+                await event_bus.publish(
+                    WorkoutUpdated(user_id=workout_user, workout_id=workout_id)
+                )
 
             logger.info(f"Successfully updated workout: {workout_id}")
             return await self.format_response(workout)
@@ -44,22 +44,56 @@ class BaseLLMService:
 
         # Native Reasoning Parameters
         # These are passed via extra arguments to handle different SDK versions safely
-        self.model_kwargs = {}
-        if kwargs.get("thinking_budget"):
-            self.model_kwargs["thinking_budget"] = kwargs["thinking_budget"]
-        if kwargs.get("include_thoughts"):
-            self.model_kwargs["include_thoughts"] = kwargs["include_thoughts"]
+        self.model_kwargs = self._reasoning_kwargs(
+            kwargs.get("thinking_budget"), kwargs.get("include_thoughts")
+        )
+
+        self.llm = self._create_llm()
+        # Unbound model (no tools) - used when tools live in a provider context cache
+        self.base_llm = self.llm
 
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=temperature,
-            streaming=streaming,
-            credentials=credentials,
-            project=project_id,
+    @staticmethod
+    def _reasoning_kwargs(
+        thinking_budget: Optional[int], include_thoughts: Optional[bool]
+    ) -> Dict[str, Any]:
+        """Build the reasoning kwargs passed through to the model client."""
+        model_kwargs = {}
+        # A budget of 0 is meaningful (disables thinking), so only skip None
+        if thinking_budget is not None:
+            model_kwargs["thinking_budget"] = thinking_budget
+        if include_thoughts:
+            model_kwargs["include_thoughts"] = include_thoughts
+        return model_kwargs
+
+    def _create_llm(self) -> ChatGoogleGenerativeAI:
+        """Create the underlying chat model from the current configuration."""
+        return ChatGoogleGenerativeAI(
+            model=self.model_name,
+            temperature=self.temperature,
+            streaming=self.streaming,
+            credentials=self.credentials,
+            project=self.project_id,
             vertexai=True,
             **self.model_kwargs,
         )
 
+    def configure_model(
+        self,
+        model_name: str,
+        thinking_budget: Optional[int] = None,
+        include_thoughts: bool = False,
+    ):
+        """
+        Rebuild the underlying LLM with a different model/reasoning config.
+
+        Any previously bound tools are dropped - call bind_tools() again afterwards.
+        """
+        self.model_name = model_name
+        self.model_kwargs = self._reasoning_kwargs(thinking_budget, include_thoughts)
+        self.llm = self._create_llm()
+        self.base_llm = self.llm
+        return self
+
     def bind_tools(self, tools: List[Any]):
         """Bind tools to the underlying LLM."""
         self.llm = self.llm.bind_tools(tools)
@@ -80,12 +114,17 @@ class BaseLLMService:
         """Invoke the LLM with retry logic."""
         return await self._call_with_retry(self.llm.ainvoke, input_data, **kwargs)
 
-    async def stream(self, input_data: Any, **kwargs) -> AsyncGenerator[Any, None]:
+    async def stream(
+        self, input_data: Any, runnable: Any = None, **kwargs
+    ) -> AsyncGenerator[Any, None]:
         """
         Stream from the LLM with retry logic for the initial connection.
         Note: Tenacity doesn't easily wrap an entire async generator, 
         so we wrap the initial call if possible or handle chunks.
+
+        Pass runnable to stream from a different model binding (e.g. base_llm).
         """
+        runnable = runnable or self.llm
         # For streaming, we'll use a manual retry loop for the generator creation
         # to ensure we catch 429s that happen at the start of the stream.
         max_retries = 5
@@ -93,7 +132,7 @@ class BaseLLMService:
             try:
                 # Test the connection or just try to start the stream
                 logger.info(f"Attempting to stream from LLM (attempt {attempt + 1})")
-                async for chunk in self.llm.astream(input_data, **kwargs):
+                async for chunk in runnable.astream(input_data, **kwargs):
                     # Log chunk structure for debugging empty responses
                     logger.info(f"DEBUG CHUNK: content_type={type(chunk.content)} content='{str(chunk.content)[:100]}...' metadata={chunk.response_metadata}")
                     yield chunk
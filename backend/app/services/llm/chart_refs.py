@@ -0,0 +1,124 @@
+"""
+Server-side chart data for coach answers
+
+Instead of copying every data point from its context into a chart_data block,
+the coach calls the build_chart tool. The tool computes the series and the
+coach registers it here under a short ref ("chart_1"); the model only sees a
+summary and writes the marker `[[chart:chart_1]]` where the chart belongs.
+
+ChartRefInjector rewrites the streamed answer: each marker is replaced with
+the full fenced chart_data block, so the client renderer, the component
+events and the stored message all see an ordinary chart component.
+"""
+
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MARKER_PREFIX = "[[chart:"
+MARKER_SUFFIX = "]]"
+# Longest marker we wait for before giving up and streaming it as text
+MAX_MARKER_LENGTH = 48
+MAX_CHARTS = 20
+
+_MARKER_RE = re.compile(r"\[\[chart:\s*([A-Za-z0-9_-]+)\s*\]\]")
+
+
+def chart_marker(ref: str) -> str:
+    return f"{MARKER_PREFIX}{ref}{MARKER_SUFFIX}"
+
+
+class ChartRefRegistry:
+    """Charts built during a coach session, by ref (most recent MAX_CHARTS)."""
+
+    def __init__(self, max_charts: int = MAX_CHARTS):
+        self.max_charts = max_charts
+        self._charts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._counter = 0
+
+    def register(self, chart: Dict[str, Any]) -> str:
+        self._counter += 1
+        ref = f"chart_{self._counter}"
+        self._charts[ref] = chart
+        while len(self._charts) > self.max_charts:
+            self._charts.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[Dict[str, Any]]:
+        return self._charts.get(ref)
+
+
+def render_chart_block(chart: Dict[str, Any]) -> str:
+    """A chart as the fenced chart_data component the client renders."""
+    payload = json.dumps({"type": "chart_data", "data": chart}, separators=(",", ":"))
+    return f"\n```json\n{payload}\n```\n"
+
+
+class ChartRefInjector:
+    """
+    Streaming rewriter: feed() chunks in, get text with chart markers expanded.
+
+    Only text that could still be the start of a marker is held back.
+    """
+
+    def __init__(self, registry: ChartRefRegistry):
+        self.registry = registry
+        self.charts_injected = 0
+        self._buf = ""
+
+    def feed(self, text: str) -> str:
+        if not text:
+            return ""
+        self._buf += text
+        out = []
+        while True:
+            start = self._buf.find(MARKER_PREFIX)
+            if start < 0:
+                # Hold back a trailing partial prefix ("[", "[[c", ...)
+                keep = _partial_prefix_length(self._buf)
+                out.append(self._buf[: len(self._buf) - keep])
+                self._buf = self._buf[len(self._buf) - keep :]
+                break
+
+            end = self._buf.find(MARKER_SUFFIX, start + len(MARKER_PREFIX))
+            if end < 0:
+                if len(self._buf) - start > MAX_MARKER_LENGTH:
+                    # Not a marker after all
+                    out.append(self._buf[: start + len(MARKER_PREFIX)])
+                    self._buf = self._buf[start + len(MARKER_PREFIX) :]
+                    continue
+                out.append(self._buf[:start])
+                self._buf = self._buf[start:]
+                break
+
+            end += len(MARKER_SUFFIX)
+            out.append(self._buf[:start])
+            out.append(self._expand(self._buf[start:end]))
+            self._buf = self._buf[end:]
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Flush held-back text (end of a model turn)."""
+        out, self._buf = self._buf, ""
+        return out
+
+    def _expand(self, marker: str) -> str:
+        match = _MARKER_RE.fullmatch(marker)
+        chart = self.registry.get(match.group(1)) if match else None
+        if chart is None:
+            logger.warning(f"⚠️ Unknown chart marker dropped: {marker}")
+            return ""
+        self.charts_injected += 1
+        logger.info(f"📈 Injected chart {match.group(1)}")
+        return render_chart_block(chart)
+
+
+def _partial_prefix_length(text: str) -> int:
+    for length in range(min(len(MARKER_PREFIX) - 1, len(text)), 0, -1):
+        if MARKER_PREFIX.startswith(text[-length:]):
+            return length
+    return 0
@@ -0,0 +1,227 @@
+"""
+Provider Context Cache for the coach prompt prefix
+
+The coach system prompt (instructions + formatted shared context) and the tool
+schemas are identical across a user's turns until their bundle changes. This
+module registers that stable prefix with the provider's context cache, keyed by
+a content hash, so each turn only sends the dynamic suffix (history + message).
+
+Registering never blocks a turn: a prefix that is not cached yet is created
+in a background task (one per prefix, however many turns ask for it) and the
+turn sends the full prompt inline; later turns use the cached prefix.
+
+Backends (COACH_CONTEXT_CACHE):
+- "off":    always send the full prompt (default until an experiment arm
+            shows a TTFT gain from caching)
+- "vertex": Vertex AI cached contents
+- "local":  in-process stand-in that never calls the provider (tests/benchmarks)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.services.context.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Vertex rejects cached contents below this size; skip caching small prompts
+MIN_CACHEABLE_TOKENS = 1024
+CACHE_TTL_SECONDS = 3600
+# Back off after a failed create so a bad prefix doesn't add latency every turn
+FAILURE_BACKOFF_SECONDS = 300
+
+
+def prefix_cache_key(model_name: str, system_prompt: str, tools: List[Any]) -> str:
+    """Content hash of everything that makes up the cacheable prefix."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    tool_schemas = [convert_to_openai_tool(t) for t in tools]
+    payload = json.dumps(
+        {"model": model_name, "system": system_prompt, "tools": tool_schemas},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CachedPrefix:
+    name: str
+    expires_at: float
+
+
+class ContextCacheBackend(ABC):
+    """Base class: maps prefix hashes to provider cache names."""
+
+    # Whether returned names can be passed to the model as cached_content
+    sends_cached_content = True
+
+    def __init__(self):
+        self._entries: Dict[str, CachedPrefix] = {}
+        self._failures: Dict[str, float] = {}
+        self._creating: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "creates": 0, "failures": 0, "skipped": 0}
+
+    def get_or_register(
+        self, model_name: str, system_prompt: str, tools: List[Any], **client_kwargs
+    ) -> Optional[str]:
+        """
+        Return the cache name for this prefix if it is registered.
+
+        Otherwise starts registering it in the background (unless already in
+        progress or backing off after a failure) and returns None: the
+        caller sends the prefix inline for this turn.
+        """
+        if count_tokens(system_prompt) < MIN_CACHEABLE_TOKENS:
+            self.stats["skipped"] += 1
+            return None
+
+        key = prefix_cache_key(model_name, system_prompt, tools)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry and entry.expires_at > now:
+            self.stats["hits"] += 1
+            return entry.name
+
+        failed_at = self._failures.get(key)
+        if failed_at and now - failed_at < FAILURE_BACKOFF_SECONDS:
+            self.stats["skipped"] += 1
+            return None
+
+        self.stats["misses"] += 1
+        if key not in self._creating:
+            task = asyncio.get_running_loop().create_task(
+                self._register(key, model_name, system_prompt, tools, **client_kwargs)
+            )
+            self._creating[key] = task
+            task.add_done_callback(lambda _t: self._creating.pop(key, None))
+        return None
+
+    async def _register(
+        self, key: str, model_name: str, system_prompt: str, tools: List[Any], **client_kwargs
+    ) -> None:
+        """Background task: create the provider cache entry for a prefix."""
+        try:
+            name = await self._create(key, model_name, system_prompt, tools, **client_kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ Context cache create failed, sending full prompt: {e}")
+            self.stats["failures"] += 1
+            self._failures[key] = time.time()
+            self._evict_expired(time.time())
+            return
+
+        now = time.time()
+        self.stats["creates"] += 1
+        self._entries[key] = CachedPrefix(name=name, expires_at=now + CACHE_TTL_SECONDS - 60)
+        self._evict_expired(now)
+        logger.info(f"🗄️ Registered prompt prefix in context cache: {name}")
+
+    @abstractmethod
+    async def _create(
+        self, key: str, model_name: str, system_prompt: str, tools: List[Any], **client_kwargs
+    ) -> str:
+        """Register the prefix with the provider and return its cache name."""
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [k for k, v in self._entries.items() if v.expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        # Past the backoff a failure no longer matters - retry on next use
+        stale = [k for k, t in self._failures.items() if now - t >= FAILURE_BACKOFF_SECONDS]
+        for k in stale:
+            del self._failures[k]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "backend": type(self).__name__,
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0,
+            "entries": len(self._entries),
+            "registering": len(self._creating),
+            "backoff": len(self._failures),
+        }
+
+
+class LocalContextCache(ContextCacheBackend):
+    """
+    Stand-in cache that only tracks prefix reuse.
+
+    Never touches the provider and never asks the caller to send cached_content,
+    so it is safe for tests and offline benchmarks.
+    """
+
+    sends_cached_content = False
+
+    async def _create(self, key, model_name, system_prompt, tools, **client_kwargs) -> str:
+        return f"local/{key[:16]}"
+
+
+class VertexContextCache(ContextCacheBackend):
+    """Vertex AI cached contents via the google-genai SDK."""
+
+    def __init__(self):
+        super().__init__()
+        self._clients: Dict[Any, Any] = {}
+
+    def _get_client(self, credentials: Any, project_id: Optional[str]):
+        from google import genai
+
+        client_key = (id(credentials), project_id)
+        if client_key not in self._clients:
+            self._clients[client_key] = genai.Client(
+                vertexai=True,
+                credentials=credentials,
+                project=project_id,
+                location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
+            )
+        return self._clients[client_key]
+
+    async def _create(
+        self,
+        key: str,
+        model_name: str,
+        system_prompt: str,
+        tools: List[Any],
+        credentials: Any = None,
+        project_id: Optional[str] = None,
+    ) -> str:
+        from google.genai import types
+        from langchain_google_genai._function_utils import (
+            convert_to_genai_function_declarations,
+        )
+
+        client = self._get_client(credentials, project_id)
+        cache = await client.aio.caches.create(
+            model=model_name,
+            config=types.CreateCachedContentConfig(
+                display_name=f"coach-prefix-{key[:16]}",
+                system_instruction=system_prompt,
+                tools=convert_to_genai_function_declarations(tools) if tools else None,
+                ttl=f"{CACHE_TTL_SECONDS}s",
+            ),
+        )
+        return cache.name
+
+
+_BACKENDS = {"vertex": VertexContextCache, "local": LocalContextCache}
+_instance: Optional[ContextCacheBackend] = None
+
+
+def get_context_cache() -> Optional[ContextCacheBackend]:
+    """Shared backend selected by COACH_CONTEXT_CACHE (None when disabled)."""
+    global _instance
+    mode = os.environ.get("COACH_CONTEXT_CACHE", "off").lower()
+    backend_cls = _BACKENDS.get(mode)
+    if backend_cls is None:
+        return None
+    if not isinstance(_instance, backend_cls):
+        _instance = backend_cls()
+    return _instance
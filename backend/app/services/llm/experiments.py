@@ -0,0 +1,288 @@
+"""
+Coach Model-Config Experiments
+
+Deterministically buckets users into experiment arms (model, thinking budget,
+context variant, tool set) and records per-turn latency and token metrics per
+arm so configurations can be compared on live traffic.
+
+Enable with COACH_EXPERIMENTS_ENABLED=true. Arm weights can be overridden with
+COACH_EXPERIMENT_WEIGHTS="control=50,low_thinking=50".
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Changing the salt reshuffles every user into a new bucket
+EXPERIMENT_SALT = "coach-config-v1"
+
+ALL_COACH_TOOLS: Tuple[str, ...] = (
+    "get_strength_exercises",
+    "get_cardio_exercises",
+    "get_mobility_exercises",
+    "search_exercises",
+    "query_history",
+    "build_chart",
+)
+
+
+@dataclass(frozen=True)
+class ExperimentArm:
+    """A single coach configuration under test."""
+
+    name: str
+    model_name: str = "gemini-2.5-flash"
+    thinking_budget: Optional[int] = 4096
+    include_thoughts: bool = True
+    context_variant: str = "full"  # full | lean
+    tools: Tuple[str, ...] = ALL_COACH_TOOLS
+    prompt_cache: bool = True  # Serve the static prefix from the provider cache
+    prefetch: bool = True  # Speculatively run the predicted exercise tool call
+    weight: int = 0
+
+
+CONTROL_ARM = ExperimentArm(name="control", weight=100)
+
+EXPERIMENT_ARMS: Dict[str, ExperimentArm] = {
+    arm.name: arm
+    for arm in [
+        CONTROL_ARM,
+        ExperimentArm(name="low_thinking", thinking_budget=1024),
+        ExperimentArm(name="no_thinking", thinking_budget=0, include_thoughts=False),
+        ExperimentArm(name="lean_context", context_variant="lean"),
+        # Holdout for measuring the TTFT delta of prompt prefix caching
+        ExperimentArm(name="no_prompt_cache", prompt_cache=False),
+        # Holdout for measuring tool iterations/TTFT with and without prefetch
+        ExperimentArm(name="no_prefetch", prefetch=False),
+    ]
+}
+
+
+def experiments_enabled() -> bool:
+    """Whether live traffic should be split across arms."""
+    return os.environ.get("COACH_EXPERIMENTS_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def _arm_weights() -> List[Tuple[ExperimentArm, int]]:
+    """Resolve arm weights, applying the COACH_EXPERIMENT_WEIGHTS override."""
+    override = os.environ.get("COACH_EXPERIMENT_WEIGHTS", "").strip()
+    if not override:
+        return [(arm, arm.weight) for arm in EXPERIMENT_ARMS.values() if arm.weight > 0]
+
+    weights = []
+    for part in override.split(","):
+        name, _, weight = part.partition("=")
+        arm = EXPERIMENT_ARMS.get(name.strip())
+        if not arm:
+            logger.warning(f"⚠️ Unknown experiment arm in override: {name!r}")
+            continue
+        try:
+            if int(weight) > 0:
+                weights.append((arm, int(weight)))
+        except ValueError:
+            logger.warning(f"⚠️ Invalid weight for experiment arm {name!r}: {weight!r}")
+    return weights
+
+
+def assign_arm(user_id: str) -> ExperimentArm:
+    """
+    Deterministically assign a user to an experiment arm.
+
+    The same user always lands in the same arm for a given salt and weight
+    configuration, so a user's experience is stable across sessions.
+    """
+    if not experiments_enabled() or not user_id:
+        return CONTROL_ARM
+
+    weights = _arm_weights()
+    total = sum(weight for _, weight in weights)
+    if total <= 0:
+        return CONTROL_ARM
+
+    digest = hashlib.sha256(f"{EXPERIMENT_SALT}:{user_id}".encode()).hexdigest()
+    bucket = int(digest[:15], 16) % total
+
+    cumulative = 0
+    for arm, weight in weights:
+        cumulative += weight
+        if bucket < cumulative:
+            return arm
+    return CONTROL_ARM
+
+
+@dataclass
+class TurnMetrics:
+    """Latency and token usage for one coach turn."""
+
+    arm: str
+    user_id: str
+    conversation_id: str
+    ttft_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    tool_iterations: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cached_tokens: int = 0
+    prompt_cache_hit: bool = False
+    prefetched: bool = False
+    answer_cache_hit: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+    def add_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Accumulate a LangChain usage_metadata delta from a streamed chunk."""
+        if not usage:
+            return
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.output_tokens += usage.get("output_tokens", 0) or 0
+        details = usage.get("output_token_details") or {}
+        self.thinking_tokens += details.get("reasoning", 0) or 0
+        input_details = usage.get("input_token_details") or {}
+        self.cached_tokens += input_details.get("cache_read", 0) or 0
+
+
+class ExperimentMetricsStore:
+    """
+    In-memory, per-worker store of recent turn metrics, bounded per arm.
+    """
+
+    METRIC_FIELDS = (
+        "ttft_ms",
+        "total_ms",
+        "tool_iterations",
+        "input_tokens",
+        "output_tokens",
+        "thinking_tokens",
+        "cached_tokens",
+    )
+
+    def __init__(self, max_turns_per_arm: int = 1000):
+        self.max_turns_per_arm = max_turns_per_arm
+        self._turns: Dict[str, Deque[TurnMetrics]] = {}
+
+    def record_turn(self, metrics: TurnMetrics) -> None:
+        """Store metrics for a completed turn."""
+        if metrics.arm not in self._turns:
+            self._turns[metrics.arm] = deque(maxlen=self.max_turns_per_arm)
+        self._turns[metrics.arm].append(metrics)
+        logger.info(
+            f"🧪 Experiment turn [{metrics.arm}]: TTFT={metrics.ttft_ms}ms "
+            f"total={metrics.total_ms}ms tools={metrics.tool_iterations} "
+            f"tokens={metrics.input_tokens}→{metrics.output_tokens} "
+            f"(thinking {metrics.thinking_tokens}, cached {metrics.cached_tokens})"
+        )
+
+    def get_turns(self, arm: str) -> List[Dict[str, Any]]:
+        """Raw recorded turns for an arm (newest last)."""
+        return [asdict(t) for t in self._turns.get(arm, [])]
+
+    def clear(self) -> None:
+        self._turns.clear()
+
+    @staticmethod
+    def _percentiles(values: List[float]) -> Dict[str, float]:
+        """Summary statistics matching the admin dashboard percentile style."""
+        values = sorted(values)
+        n = len(values)
+        if n == 0:
+            return {"avg": 0, "p50": 0, "p90": 0, "p95": 0, "p99": 0}
+
+        def pick(q: float) -> float:
+            return values[min(int(n * q), n - 1)]
+
+        return {
+            "avg": round(sum(values) / n, 2),
+            "p50": pick(0.50),
+            "p90": pick(0.90),
+            "p95": pick(0.95),
+            "p99": pick(0.99),
+        }
+
+    def summarize(self) -> Dict[str, Any]:
+        """
+        Per-arm percentile comparison of every recorded metric.
+
+        Turns replayed from the answer cache never reach the model, so they
+        are kept out of the latency/token aggregates (and the delta against
+        control) and reported in their own "answer_cache" bucket.
+        """
+        arms = {}
+        for arm_name, all_turns in self._turns.items():
+            turns = [t for t in all_turns if not t.answer_cache_hit]
+            replayed = [t for t in all_turns if t.answer_cache_hit]
+            arm_summary = {"turns": len(all_turns), "generated_turns": len(turns)}
+            for metric in self.METRIC_FIELDS:
+                values = [
+                    getattr(t, metric) for t in turns if getattr(t, metric) is not None
+                ]
+                arm_summary[metric] = self._percentiles(values)
+
+            # Share of input tokens served from the provider context cache
+            total_input = sum(t.input_tokens for t in turns)
+            total_cached = sum(t.cached_tokens for t in turns)
+            arm_summary["cached_token_ratio"] = (
+                round(total_cached / total_input, 3) if total_input else 0
+            )
+            arm_summary["prompt_cache_hit_rate"] = (
+                round(sum(1 for t in turns if t.prompt_cache_hit) / len(turns), 3)
+                if turns
+                else 0
+            )
+            for hit, label in ((True, "ttft_ms_cache_hit"), (False, "ttft_ms_cache_miss")):
+                arm_summary[label] = self._percentiles(
+                    [
+                        t.ttft_ms
+                        for t in turns
+                        if t.prompt_cache_hit == hit and t.ttft_ms is not None
+                    ]
+                )
+
+            # Speculative exercise prefetch: did it save the tool round trip?
+            prefetched = [t for t in turns if t.prefetched]
+            arm_summary["prefetch_rate"] = (
+                round(len(prefetched) / len(turns), 3) if turns else 0
+            )
+            arm_summary["ttft_ms_prefetched"] = self._percentiles(
+                [t.ttft_ms for t in prefetched if t.ttft_ms is not None]
+            )
+            arm_summary["tool_iterations_prefetched"] = self._percentiles(
+                [t.tool_iterations for t in prefetched]
+            )
+
+            # Repeat questions answered from the answer cache (no generation)
+            arm_summary["answer_cache_hit_rate"] = round(
+                len(replayed) / len(all_turns), 3
+            )
+            arm_summary["answer_cache"] = {"turns": len(replayed)}
+            for metric in ("ttft_ms", "total_ms"):
+                arm_summary["answer_cache"][metric] = self._percentiles(
+                    [getattr(t, metric) for t in replayed if getattr(t, metric) is not None]
+                )
+            arms[arm_name] = arm_summary
+
+        # TTFT delta of each arm against control (negative = faster)
+        control_ttft = arms.get(CONTROL_ARM.name, {}).get("ttft_ms", {})
+        for arm_name, arm_summary in arms.items():
+            if arm_name == CONTROL_ARM.name or not control_ttft:
+                continue
+            arm_summary["ttft_delta_ms"] = {
+                stat: round(arm_summary["ttft_ms"][stat] - control_ttft[stat], 2)
+                for stat in ("avg", "p50", "p90")
+            }
+
+        return {
+            "enabled": experiments_enabled(),
+            "salt": EXPERIMENT_SALT,
+            "weights": {arm.name: weight for arm, weight in _arm_weights()},
+            "arms": arms,
+        }
+
+
+# Singleton instance
+experiment_metrics = ExperimentMetricsStore()
@@ -0,0 +1,206 @@
+"""
+Server-side glossary linking for streamed coach answers
+
+Glossary terms used to be listed in full in every coach prompt so the model
+could write [term](glossary://id) links itself. Instead, the terms are
+compiled once (when the glossary cache loads) into an Aho-Corasick automaton,
+and GlossaryLinker annotates the streamed answer in a single linear pass:
+
+- Case-insensitive, whole-word matches only; longest match wins
+- Each term is linked on its first mention in a response
+- Nothing inside code fences / inline code (component JSON stays plain) or
+  inside existing markdown links
+- Matches may span chunk boundaries: the linker holds back only the tail
+  that could still be the start of a term (at most the longest term length)
+"""
+
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class GlossaryAutomaton:
+    """Aho-Corasick automaton over lowercased glossary terms."""
+
+    def __init__(self, terms: List[Dict]):
+        # Node arrays: goto transitions, failure link, depth, terms ending here
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.depth: List[int] = [0]
+        self.outputs: List[List[Tuple[int, str]]] = [[]]  # (length, term_id)
+        self.term_count = 0
+        self.max_term_length = 0
+
+        seen: Set[str] = set()
+        for term in terms:
+            text = (term.get("term") or "").strip().lower()
+            if len(text) < 2 or text in seen or not term.get("id"):
+                continue
+            seen.add(text)
+            self._add(text, term["id"])
+        self._build_failure_links()
+
+    def _add(self, text: str, term_id: str) -> None:
+        node = 0
+        for ch in text:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.depth.append(self.depth[node] + 1)
+                self.outputs.append([])
+                self.goto[node][ch] = nxt
+            node = nxt
+        self.outputs[node].append((len(text), term_id))
+        self.term_count += 1
+        self.max_term_length = max(self.max_term_length, len(text))
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so a node's failure target is final before its children
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                if node:
+                    self.fail[child] = self.step(self.fail[node], ch)
+                # Inherit matches that end here via the failure link
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def step(self, node: int, ch: str) -> int:
+        while node and ch not in self.goto[node]:
+            node = self.fail[node]
+        return self.goto[node].get(ch, 0)
+
+
+class GlossaryLinker:
+    """
+    Streaming annotator: feed() chunks in, get linked text out.
+
+    One instance per response; call finish() at the end of each model turn
+    to flush the held-back tail.
+    """
+
+    def __init__(self, automaton: GlossaryAutomaton):
+        self.automaton = automaton
+        self.linked_terms: Set[str] = set()
+        self.links_added = 0
+        self._reset_scan()
+        # Markdown state carried across turns
+        self._in_fence = False
+        self._in_inline_code = False
+        self._bracket_depth = 0
+        self._tick_run = 0
+
+    def _reset_scan(self) -> None:
+        self._buf = ""
+        self._node = 0
+        self._prev_char = ""
+        self._candidates: List[Tuple[int, int, str]] = []  # (start, end, term_id) in _buf
+
+    def feed(self, text: str) -> str:
+        """Consume a chunk; returns the text that is now safe to stream."""
+        if not text:
+            return ""
+
+        auto = self.automaton
+        base = len(self._buf)
+        self._buf += text
+        for offset, ch in enumerate(text):
+            i = base + offset
+            self._track_markdown(ch)
+            self._node = auto.step(self._node, ch.lower())
+            if auto.outputs[self._node] and not self._in_code_or_link():
+                for length, term_id in auto.outputs[self._node]:
+                    start = i + 1 - length
+                    if start == 0:
+                        before = self._prev_char
+                    else:
+                        before = self._buf[start - 1]
+                    if before and _is_word_char(before):
+                        continue
+                    self._candidates.append((start, i + 1, term_id))
+
+        # Nothing before this index can begin a new match
+        safe = len(self._buf) - auto.depth[self._node]
+        return self._drain(safe)
+
+    def finish(self) -> str:
+        """Flush everything held back (end of a model turn)."""
+        out = self._drain(len(self._buf), final=True)
+        self._reset_scan()
+        return out
+
+    def _track_markdown(self, ch: str) -> None:
+        if ch == "`":
+            self._tick_run += 1
+            return
+        if self._tick_run:
+            if self._tick_run >= 3:
+                self._in_fence = not self._in_fence
+            elif not self._in_fence:
+                self._in_inline_code = not self._in_inline_code
+            self._tick_run = 0
+        if self._in_fence or self._in_inline_code:
+            return
+        if ch == "[":
+            self._bracket_depth += 1
+        elif ch == "]" and self._bracket_depth:
+            self._bracket_depth -= 1
+        elif ch == "\n":
+            self._bracket_depth = 0
+
+    def _in_code_or_link(self) -> bool:
+        return self._in_fence or self._in_inline_code or self._bracket_depth > 0 or self._tick_run > 0
+
+    def _drain(self, limit: int, final: bool = False) -> str:
+        buf = self._buf
+        out = []
+        pos = 0
+        # Leftmost, then longest, non-overlapping candidates starting before limit
+        for start, end, term_id in sorted(self._candidates, key=lambda c: (c[0], c[0] - c[1])):
+            if start < pos or start >= limit:
+                continue
+            if term_id in self.linked_terms:
+                continue
+            after = buf[end] if end < len(buf) else ""
+            if not after and not final:
+                continue  # cannot happen before limit; defensive
+            if after and (_is_word_char(after) or after == "]"):
+                continue
+            out.append(buf[pos:start])
+            out.append(f"[{buf[start:end]}](glossary://{term_id})")
+            self.linked_terms.add(term_id)
+            self.links_added += 1
+            pos = end
+
+        if pos < limit:
+            out.append(buf[pos:limit])
+            pos = limit
+
+        if pos:
+            self._prev_char = buf[pos - 1]
+            self._buf = buf[pos:]
+            self._candidates = [
+                (s - pos, e - pos, t) for s, e, t in self._candidates if s >= pos
+            ]
+        return "".join(out)
+
+
+def build_automaton(terms: Optional[List[Dict]]) -> Optional[GlossaryAutomaton]:
+    """Compile glossary terms, or None if there are none."""
+    if not terms:
+        return None
+    automaton = GlossaryAutomaton(terms)
+    logger.info(
+        f"🔤 Glossary automaton built: {automaton.term_count} terms, "
+        f"{len(automaton.goto)} states"
+    )
+    return automaton if automaton.term_count else None
@@ -0,0 +1,153 @@
+"""
+Exercise Intent Detector
+
+Cheap keyword detector run on the user message before the first model call.
+When a message looks like a workout-planning request, it returns the exercise
+tool call the model would most likely make, so the coach can prefetch the
+result from the exercise cache and skip a tool round trip.
+
+Deliberately conservative: it needs a request (a planning verb or request
+form - "give me", "build me a", "what should I train", "I want a", ...) and
+a target (muscle group, cardio or mobility), and it skips anything that
+reads as a question about past training ("what did I", "how was my last
+workout", "felt"). Otherwise it returns None and the model decides as before.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Request forms - a bare "workout" or "train" is not a request
+PLANNING_CUES = (
+    r"\bgive me\b",
+    r"\b(plan|program|build|create|make|design|write|put together)( me| us| out)? (a|an|some|my)\b",
+    r"\b(suggest|recommend)\b",
+    r"\bwhat (should|can|could) i (do|train|hit|work on)\b",
+    r"\bi( want| need| would like|'?d like) (a|an|some|to (do|train|hit|work))\b",
+    r"\bhelp me (plan|build|train)\b",
+    r"\b(ideas|options) for\b",
+    r"\b(workout|routine|session|exercises|program) (for|to|that|with)\b",
+)
+
+# Questions about past training or progress - answered from history, not a plan
+REVIEW_CUES = (
+    r"\b(did|was|were|felt|had|went)\b", r"\bhave i\b", r"\blast\b", r"\byesterday\b",
+    r"\bago\b", r"\bhow('?s| is| are) my\b", r"\bprogress(ing|ion)?\b", r"\bhistory\b",
+)
+
+# "back" as in returning, not the muscle
+NOT_MUSCLE_PHRASES = r"\b(i'?m|i am|be|get|got|come|came|coming|welcome|go|going) back\b"
+
+# Phrase -> canonical muscle groups accepted by get_strength_exercises
+MUSCLE_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    r"\bpush\b": ("chest", "shoulders", "triceps"),
+    r"\bpull\b": ("back", "biceps"),
+    r"\bupper body\b": ("chest", "back", "shoulders", "arms"),
+    r"\blower body\b": ("legs",),
+    r"\bfull body\b": ("chest", "back", "legs", "shoulders"),
+    r"\bchest\b|\bpecs?\b": ("chest",),
+    r"\bback\b": ("back",),
+    r"\blats?\b": ("lats",),
+    r"\btraps?\b": ("traps",),
+    r"\bshoulders?\b|\bdelts?\b": ("shoulders",),
+    r"\bbiceps?\b|\bbis\b": ("biceps",),
+    r"\btriceps?\b|\btris\b": ("triceps",),
+    r"\barms?\b": ("arms",),
+    r"\bforearms?\b|\bgrip\b": ("forearms",),
+    r"\blegs?\b|\bleg day\b": ("legs",),
+    r"\bquads?\b|\bquadriceps\b": ("quadriceps",),
+    r"\bhamstrings?\b|\bhams\b": ("hamstrings",),
+    r"\bglutes?\b|\bbooty\b": ("glutes",),
+    r"\bcalf\b|\bcalves\b": ("calves",),
+    r"\babs\b|\bcore\b|\babdominals?\b": ("core",),
+    r"\bobliques?\b": ("obliques",),
+}
+
+CARDIO_CUES = (
+    r"\bcardio\b", r"\brun(ning)?\b", r"\bjog(ging)?\b", r"\bcycl(e|ing)\b",
+    r"\bbike\b", r"\brow(ing)?\b", r"\bswim(ming)?\b", r"\bhiit\b", r"\bconditioning\b",
+)
+CARDIO_MOVEMENTS = {
+    r"\brun(ning)?\b|\bjog(ging)?\b": "running",
+    r"\bcycl(e|ing)\b|\bbike\b": "cycling",
+    r"\bswim(ming)?\b": "swimming",
+}
+
+MOBILITY_CUES = (
+    r"\bstretch(es|ing)?\b", r"\bmobility\b", r"\bwarm[- ]?up\b", r"\bcool[- ]?down\b",
+    r"\byoga\b", r"\bfoam roll(ing)?\b", r"\bflexibility\b", r"\brecovery\b",
+)
+
+EQUIPMENT_SYNONYMS: Dict[str, str] = {
+    r"\bdumbbells?\b|\bdbs?\b": "dumbbell",
+    r"\bbarbells?\b": "barbell",
+    r"\bkettlebells?\b|\bkbs?\b": "kettlebell",
+    r"\bcables?\b": "cable",
+    r"\bmachines?\b": "machine",
+    r"\bbodyweight\b|\bno equipment\b|\bat home\b": "bodyweight",
+    r"\bbands?\b": "bands",
+}
+
+
+def _compile(patterns) -> re.Pattern:
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+_PLANNING_RE = _compile(PLANNING_CUES)
+_REVIEW_RE = _compile(REVIEW_CUES)
+_NOT_MUSCLE_RE = re.compile(NOT_MUSCLE_PHRASES)
+_CARDIO_RE = _compile(CARDIO_CUES)
+_MOBILITY_RE = _compile(MOBILITY_CUES)
+_MUSCLE_RES = [(re.compile(p), groups) for p, groups in MUSCLE_SYNONYMS.items()]
+_CARDIO_MOVEMENT_RES = [(re.compile(p), m) for p, m in CARDIO_MOVEMENTS.items()]
+_EQUIPMENT_RES = [(re.compile(p), e) for p, e in EQUIPMENT_SYNONYMS.items()]
+
+
+@dataclass
+class ExerciseIntent:
+    """A predicted exercise tool call."""
+
+    tool_name: str
+    args: Dict = field(default_factory=dict)
+
+
+def detect_exercise_intent(message: str) -> Optional[ExerciseIntent]:
+    """
+    Predict the exercise tool call for a planning message.
+
+    Returns:
+        ExerciseIntent, or None if the message is not clearly a planning request
+    """
+    text = message.lower().replace("\u2019", "'")
+    if not _PLANNING_RE.search(text) or _REVIEW_RE.search(text):
+        return None
+    text = _NOT_MUSCLE_RE.sub(" ", text)
+
+    equipment = sorted({e for pattern, e in _EQUIPMENT_RES if pattern.search(text)})
+
+    muscles: List[str] = []
+    for pattern, groups in _MUSCLE_RES:
+        if pattern.search(text):
+            muscles.extend(g for g in groups if g not in muscles)
+
+    if muscles:
+        args = {"muscle_groups": muscles}
+        if equipment:
+            args["equipment"] = equipment
+        # Mobility wording ("stretches for my hamstrings") beats strength
+        if _MOBILITY_RE.search(text):
+            return ExerciseIntent("get_mobility_exercises", args)
+        return ExerciseIntent("get_strength_exercises", args)
+
+    if _MOBILITY_RE.search(text):
+        return ExerciseIntent("get_mobility_exercises", {})
+
+    if _CARDIO_RE.search(text):
+        args = {}
+        for pattern, movement in _CARDIO_MOVEMENT_RES:
+            if pattern.search(text):
+                args["base_movement"] = movement
+                break
+        return ExerciseIntent("get_cardio_exercises", args)
+
+    return None
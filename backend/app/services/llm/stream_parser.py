@@ -0,0 +1,114 @@
+"""
+Incremental component parser for streamed coach answers
+
+Coach answers embed structured components as fenced JSON blocks:
+
+    ```json
+    {"type": "workout_template", "data": {...}}
+    ```
+
+ComponentStreamParser is fed text chunks as they arrive and returns each
+component the moment its closing fence is seen, so the websocket can send a
+`workout_template` / `chart_data` event without waiting for the full answer.
+It only inspects text - callers still stream every chunk as content
+unchanged, so stored messages and the markdown renderer are unaffected.
+
+Fences may be split across chunks; the parser keeps only the current
+partial line plus the body of an open json block.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COMPONENT_TYPES = ("workout_template", "chart_data")
+
+FENCE = "```"
+
+
+class ComponentStreamParser:
+    """Line-oriented fence scanner over a stream of text chunks."""
+
+    def __init__(self, component_types=COMPONENT_TYPES):
+        self.component_types = set(component_types)
+        self._line = ""
+        self._in_fence = False
+        self._is_json = False
+        self._body: List[str] = []
+        self.components_emitted = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Consume a chunk of streamed text.
+
+        Returns:
+            Components ({"type", "data"}) whose block closed within this chunk
+        """
+        components = []
+        if not text:
+            return components
+
+        self._line += text
+        while "\n" in self._line:
+            line, self._line = self._line.split("\n", 1)
+            component = self._consume_line(line)
+            if component:
+                components.append(component)
+        return components
+
+    def finish(self) -> List[Dict]:
+        """Flush the trailing partial line (a closing fence without newline)."""
+        line, self._line = self._line, ""
+        component = self._consume_line(line) if line else None
+        self._in_fence = False
+        self._body = []
+        return [component] if component else []
+
+    def _consume_line(self, line: str) -> Optional[Dict]:
+        stripped = line.strip()
+
+        if not self._in_fence:
+            if stripped.startswith(FENCE):
+                self._in_fence = True
+                self._is_json = stripped[len(FENCE):].strip().lower() in ("json", "")
+                self._body = []
+            return None
+
+        if stripped.startswith(FENCE):
+            # Closing fence; anything before it on the line belongs to the body
+            self._in_fence = False
+            body, self._body = "\n".join(self._body), []
+            return self._parse_block(body) if self._is_json else None
+
+        if stripped.endswith(FENCE):
+            # Inline close: `{...}``` on one line
+            self._body.append(stripped[: -len(FENCE)])
+            self._in_fence = False
+            body, self._body = "\n".join(self._body), []
+            return self._parse_block(body) if self._is_json else None
+
+        if self._is_json:
+            self._body.append(line)
+        return None
+
+    def _parse_block(self, body: str) -> Optional[Dict]:
+        body = body.strip()
+        if not body.startswith("{"):
+            return None
+        try:
+            parsed = json.loads(body)
+        except json.JSONDecodeError as e:
+            logger.warning(f"⚠️ Failed to parse streamed JSON component: {e}")
+            return None
+
+        if (
+            isinstance(parsed, dict)
+            and parsed.get("type") in self.component_types
+            and parsed.get("data")
+        ):
+            self.components_emitted += 1
+            logger.info(f"🧩 Streamed component: {parsed['type']}")
+            return {"type": parsed["type"], "data": parsed["data"]}
+        return None
@@ -1,22 +1,68 @@
 import logging
 import json
-import re
+import time
 import asyncio
-from typing import Dict, Any, List, AsyncGenerator, Optional
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+import hashlib
+from typing import Dict, Any, List, AsyncGenerator, Optional, Tuple
+from langchain_core.messages import (
+    BaseMessage,
+    SystemMessage,
+    HumanMessage,
+    AIMessage,
+    ToolMessage,
+)
 from datetime import datetime, date
 from app.services.llm.base import BaseLLMService
 
 from app.services.context.shared_context_loader import SharedContextLoader
+from app.services.context.context_formatter import (
+    format_strength_progression,
+    format_weight,
+    format_workout_history,
+    get_context_snapshot,
+)
+from app.services.context.token_budget import (
+    PromptSection,
+    TokenBudgetManager,
+    count_tokens,
+    first_fitting,
+    history_token_budget,
+    select_compaction_slice,
+)
 from app.services.db.message_service import MessageService
 from app.core.prompts.unified_coach import get_unified_coach_prompt
+from app.tools.encoding import encode_tool_result
 from app.tools.exercise_tool import (
     get_strength_exercises,
     get_cardio_exercises,
     get_mobility_exercises,
+    search_exercises,
 )
+from app.tools.history_tool import USER_SCOPED_TOOLS, build_chart, query_history
+from app.services.cache.workout_history import workout_history_cache
 
+from app.core.utils.log_writer import get_log_writer
+from app.services.cache.answer_cache import answer_cache, memory_version
+from app.services.cache.async_cache import AsyncCache
 from app.core.utils.telemetry import FlightRecorderCallback
+from app.services.llm.context_cache import get_context_cache
+from app.services.llm.intent_detector import detect_exercise_intent
+from app.services.llm.stream_parser import ComponentStreamParser
+from app.services.llm.glossary_linker import GlossaryLinker
+from app.services.llm.chart_refs import ChartRefInjector, ChartRefRegistry, chart_marker
+from app.services.cache.glossary_terms import glossary_cache
+from app.services.memory.memory_index import (
+    MemoryNoteIndex,
+    format_memory_notes,
+    memory_index_cache,
+)
+from app.services.llm.experiments import (
+    CONTROL_ARM,
+    ExperimentArm,
+    TurnMetrics,
+    assign_arm,
+    experiment_metrics,
+)
 from langchain_core.agents import AgentAction
 
 import os
@@ -30,7 +76,8 @@ COACH_REASONING_LOG = os.path.join(
     "logs",
     "coach_reasoning.log",
 )
-os.makedirs(os.path.dirname(COACH_REASONING_LOG), exist_ok=True)
+# Buffered in memory per turn and written by a background thread
+coach_reasoning_log = get_log_writer("coach", COACH_REASONING_LOG)
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +91,14 @@ class UnifiedCoachService(BaseLLMService):
     then processes messages using that context.
     """
 
+    # Formatted context + rendered system message per
+    # (context version, conversation, context variant). Class-level so a
+    # reconnect to the same conversation skips re-formatting.
+    PROMPT_MEMO_MAX_ENTRIES = 256
+    _prompt_memo: "AsyncCache[Tuple[str, str, str], Tuple[Dict[str, str], SystemMessage, Dict[str, int], Dict[str, Any]]]" = AsyncCache(
+        "coach_prompt", max_entries=PROMPT_MEMO_MAX_ENTRIES, ttl_seconds=24 * 3600
+    )
+
     def __init__(self, credentials=None, project_id=None):
         super().__init__(
             model_name="gemini-2.5-flash",
@@ -58,30 +113,60 @@ class UnifiedCoachService(BaseLLMService):
         # Shared services
         self.context_loader = SharedContextLoader()
         self.message_service = MessageService()
+        self.token_budget = TokenBudgetManager()
 
         # Tool registry
         self.tool_executors = {
             "get_strength_exercises": get_strength_exercises,
             "get_cardio_exercises": get_cardio_exercises,
             "get_mobility_exercises": get_mobility_exercises,
+            "search_exercises": search_exercises,
+            "query_history": query_history,
+            "build_chart": build_chart,
         }
 
         # Bind tools directly to the coach model
         self.bind_tools(list(self.tool_executors.values()))
 
+        # Experiment arm (assigned per user in initialize)
+        self.experiment_arm: ExperimentArm = CONTROL_ARM
+
         # State (initialized per connection)
         self.conversation_id: str = ""
         self.user_id: str = ""
         self.message_history: List[Dict] = []
         self.formatted_context: Dict[str, str] = {}
-        self.raw_bundle = None  # Store raw bundle for weight lookups
+        self.system_message: Optional[SystemMessage] = None
+        # LangChain messages for message_history, kept in lockstep (see _append_history)
+        self.history_messages: List[BaseMessage] = []
+        # Token estimates for logging (see _log_prompt_tokens)
+        self.context_section_tokens: Dict[str, int] = {}
+        self.history_tokens: int = 0
+        self.raw_bundle = None
+        # BM25 index over the user's memory notes (see _select_memory)
+        self.memory_index: MemoryNoteIndex = MemoryNoteIndex()
+        self.memory_tokens: int = 0
+        # Prompt-ready bundle sections + last weights (see context_formatter)
+        self.context_snapshot: Optional[Dict[str, Any]] = None
         self.is_imperial: bool = False  # User's unit preference
         self.current_response: str = ""
+        # Answer content only (no thinking narration) - what the answer cache stores
+        self.answer_text: str = ""
         self.initialized: bool = False
-
-        # Compaction state (for long conversations)
+        # Charts built by build_chart this session, expanded from markers
+        # in the streamed answer (see chart_refs)
+        self.chart_refs = ChartRefRegistry()
+
+        # Rolling compaction state (for long conversations): the oldest
+        # messages are folded into running_summary once history exceeds
+        # history_token_budget (see _maybe_schedule_compaction)
+        self.history_token_budget: int = history_token_budget()
+        self.running_summary: str = ""
+        self.summarized_messages: int = 0  # Conversation messages covered by the summary
+        self.summary_message: Optional[HumanMessage] = None
         self.compaction_state: str = "idle"  # idle | extracting | ready
         self.compaction_cutoff: int = 0  # Index to truncate history at
+        self.pending_summary: str = ""
         self.compaction_task: Optional[asyncio.Task] = None
 
     async def initialize(self, conversation_id: str, user_id: str) -> None:
@@ -98,6 +183,13 @@ class UnifiedCoachService(BaseLLMService):
         self.conversation_id = conversation_id
         self.user_id = user_id
 
+        # Bucket user into an experiment arm before anything is formatted
+        self._apply_experiment_arm(assign_arm(user_id))
+
+        # History queries are answered from a per-user index - start building it
+        if "query_history" in self.tool_executors:
+            workout_history_cache.prewarm(user_id)
+
         # Load conversation context
         from app.services.context.conversation_context_service import (
             conversation_context_service,
@@ -108,35 +200,82 @@ class UnifiedCoachService(BaseLLMService):
         )
 
         # Load shared context (profile, memory, workout history, strength data)
-        shared_context = await self.context_loader.load_all(user_id)
-        self.formatted_context = self._format_shared_context(shared_context)
+        # alongside the running summary of any earlier compaction
+        from app.services.db.conversation_service import conversation_service
 
-        # Store raw bundle for weight lookups
+        shared_context, summary_result = await asyncio.gather(
+            self.context_loader.load_all(user_id),
+            conversation_service.get_running_summary_admin(conversation_id),
+        )
+        self._load_prompt_context(shared_context)
+
+        # Raw bundle for answer-cache keys (id + memory version)
         self.raw_bundle = shared_context.get("bundle")
+        ai_memory = getattr(self.raw_bundle, "ai_memory", None) or {}
+        self.memory_index = memory_index_cache.get_index(user_id, ai_memory.get("notes", []))
 
         # Store unit preference from profile (source of truth)
         profile = shared_context.get("profile")
         self.is_imperial = profile.get("is_imperial", False) if profile else False
 
-        # Build message history from DB
+        # Build message history from DB, skipping messages already folded
+        # into the running summary
+        summary = summary_result.get("data") if summary_result.get("success") else None
+        covered = (summary or {}).get("covered_messages", 0)
+        if summary and 0 < covered <= len(context.messages):
+            self._set_running_summary(summary.get("text", ""), covered)
+        else:
+            self._set_running_summary("", 0)
+
         self.message_history = []
-        for msg in context.messages:
+        self.history_messages = []
+        self.history_tokens = 0
+        self.compaction_state = "idle"
+        for msg in context.messages[self.summarized_messages :]:
             role = "user" if msg.type == "human" else "assistant"
-            self.message_history.append({"role": role, "content": msg.content})
-
-        # Keep only last 10 messages -> REMOVED to allow compaction testing
-        # if len(self.message_history) > 10:
-        #     self.message_history = self.message_history[-10:]
+            self._append_history(role, msg.content)
 
         logger.info(
-            f"✅ Service initialized - {len(self.message_history)} messages loaded"
+            f"✅ Service initialized - {len(self.message_history)} messages loaded "
+            f"({self.summarized_messages} summarized, experiment arm: {self.experiment_arm.name})"
         )
         self.initialized = True
 
+        # A long conversation may already be over the history budget
+        self._maybe_schedule_compaction()
+
         # Snapshot initial context for telemetry
         telemetry = FlightRecorderCallback(self.conversation_id)
         telemetry.snapshot_context(self.formatted_context)
 
+    def _apply_experiment_arm(self, arm: ExperimentArm) -> None:
+        """
+        Reconfigure model, reasoning budget and tool set for an experiment arm.
+
+        The control arm matches the constructor defaults, so it is a no-op.
+        """
+        self.experiment_arm = arm
+        if arm == CONTROL_ARM:
+            return
+
+        logger.info(
+            f"🧪 Applying experiment arm '{arm.name}': model={arm.model_name}, "
+            f"thinking_budget={arm.thinking_budget}, context={arm.context_variant}, "
+            f"tools={list(arm.tools)}"
+        )
+        self.configure_model(
+            arm.model_name,
+            thinking_budget=arm.thinking_budget,
+            include_thoughts=arm.include_thoughts,
+        )
+        self.tool_executors = {
+            name: executor
+            for name, executor in self.tool_executors.items()
+            if name in arm.tools
+        }
+        if self.tool_executors:
+            self.bind_tools(list(self.tool_executors.values()))
+
     async def process_message(self, message: str) -> AsyncGenerator[str, None]:
         """
         Process a single user message and yield response chunks.
@@ -155,67 +294,74 @@ class UnifiedCoachService(BaseLLMService):
         if not self.initialized:
             raise RuntimeError("Service not initialized - call initialize() first")
 
-        # Check for pending compaction swap
+        # Swap in a finished background compaction (in-memory only)
         if self.compaction_state == "ready":
-            await self._apply_compaction()
+            self._apply_compaction()
 
         logger.info(f"🤖 Processing message: {message[:80]}...")
 
         # Reset current response tracker
         self.current_response = ""
+        self.answer_text = ""
 
         # Add user message to history
-        self.message_history.append({"role": "user", "content": message})
-
-        # Initial prompt build (no tool results yet)
-        prompt = self._build_prompt(
-            message=message,
-            message_history=self.message_history[:-1],
-            formatted_context=self.formatted_context,
-            tool_results={},
-        )
+        self._append_history("user", message)
 
-        # Initial prompt build (no tool results yet)
-        messages = self._build_prompt(
-            message=message,
-            message_history=self.message_history[:-1],
-            formatted_context=self.formatted_context,
-            tool_results={},
-        )
+        # Repeat opening questions (same bundle + memory) replay a cached answer
+        answer_key = self._answer_cache_key(message)
+        cached_answer = answer_cache.get(answer_key) if answer_key else None
+        if cached_answer is not None:
+            async for chunk in self._replay_cached_answer(cached_answer, telemetry):
+                yield chunk
+            return
+
+        # Prefix + history are fixed for the whole turn, so assemble once
+        base_messages = self._build_prompt(self._select_memory(message))
+        self._log_prompt_tokens()
+
+        # Serve the static prefix (system prompt + tool schemas) from the
+        # provider context cache when available; only the suffix is sent
+        cached_content = self._resolve_prompt_cache(base_messages[0].content)
+
+        # Speculatively run the most likely exercise tool call, so planning
+        # requests can usually be answered without a tool round trip
+        prefetched_turns = await self._prefetch_exercises(message)
 
         # Stream response
         logger.info("📤 Streaming LLM response...")
         telemetry.start_stream_timer()
         first_token_received = False
+        turn_metrics = TurnMetrics(
+            arm=self.experiment_arm.name,
+            user_id=self.user_id,
+            conversation_id=self.conversation_id,
+            prompt_cache_hit=cached_content is not None,
+            prefetched=bool(prefetched_turns),
+        )
+        turn_start = time.time()
         
-        # Log to reasoning file
-        with open(COACH_REASONING_LOG, "a") as f:
+        # Log to reasoning file (buffered per turn, written off the event loop)
+        with coach_reasoning_log.entry() as f:
             f.write(f"\n[{datetime.now().isoformat()}] CONVERSATION: {self.conversation_id}\n")
-            f.write(f"SYSTEM PROMPT PREVIEW: {messages[0].content[:500]}...\n")
+            f.write(f"SYSTEM PROMPT PREVIEW: {base_messages[0].content[:500]}...\n")
             f.write(f"USER: {message}\n")
             f.write("ASSISTANT REASONING & RESPONSE:\n")
 
             iterations = 0
             max_iterations = 5
-            tool_results = {}
             # Track all turns (AI and Tool messages) generated DURING this process_message call
-            current_exchange_turns = []
+            current_exchange_turns = list(prefetched_turns)
+            component_parser = ComponentStreamParser()
+            automaton = glossary_cache.get_automaton()
+            glossary_linker = GlossaryLinker(automaton) if automaton else None
+            chart_injector = ChartRefInjector(self.chart_refs)
 
             while iterations < max_iterations:
                 iterations += 1
                 logger.info(f"Loop iteration {iterations}...")
                 
-                # 1. Start with fresh prompt (contains injected data from tool_results)
-                # _build_prompt handles the SystemPrompt formatting with tools
-                messages = self._build_prompt(
-                    message=message,
-                    message_history=self.message_history[:-1],
-                    formatted_context=self.formatted_context,
-                    tool_results=tool_results,
-                )
-                
-                # 2. Append all turns from this current multi-turn exchange
-                messages.extend(current_exchange_turns)
+                # 1. Turn prompt + all turns from this current multi-turn exchange
+                messages = base_messages + current_exchange_turns
 
                 # 3. Add reinforcement if we just got tool results but haven't finished
                 if iterations > 1:
@@ -227,16 +373,27 @@ class UnifiedCoachService(BaseLLMService):
                 turn_text_buffer = ""
                 turn_tool_calls = []
                 
-                # Turn-level streaming state
-                turn_lookahead_buffer = []
+                # Text seen after a tool call in turn 1 is the model narrating
+                # its plan - surface it as thinking rather than answer content
                 turn_is_thinking = False
-                turn_content_committed = False
 
-                async for chunk in self.stream(messages):
+                if cached_content:
+                    stream = self.stream(
+                        self._dynamic_suffix(messages),
+                        runnable=self.base_llm,
+                        cached_content=cached_content,
+                    )
+                else:
+                    stream = self.stream(messages)
+
+                async for chunk in stream:
                     if not first_token_received:
                         telemetry.record_first_token()
+                        turn_metrics.ttft_ms = round((time.time() - turn_start) * 1000, 2)
                         first_token_received = True
 
+                    turn_metrics.add_usage(getattr(chunk, "usage_metadata", None))
+
                     # Collect tool calls if model decides to use tools
                     if hasattr(chunk, "tool_calls") and chunk.tool_calls:
                         for tc in chunk.tool_calls:
@@ -249,69 +406,43 @@ class UnifiedCoachService(BaseLLMService):
                         continue
 
                     if isinstance(content, str):
-                        turn_text_buffer += content
-                        self.current_response += content
-                        f.write(content)
-                        f.flush()
-                        
-                        if iterations > 1:
-                            # Turn 2+ always streams immediately
-                            yield content
-                        else:
-                            # Turn 1: 2-chunk lookahead to check for early tool calls
-                            if turn_is_thinking:
-                                # We already saw a tool call in this turn (perhaps in this chunk)
-                                yield json.dumps({"_type": "thinking", "content": content})
-                            elif turn_content_committed:
-                                # We already decided this is a content turn
-                                yield content
-                            else:
-                                turn_lookahead_buffer.append(content)
-                                # After 2 chunks of text-only, we commit to content for snappiness
-                                if len(turn_lookahead_buffer) >= 2:
-                                    turn_content_committed = True
-                                    for buffered_text in turn_lookahead_buffer:
-                                        yield buffered_text
-                                    turn_lookahead_buffer = []
-                            
-                    elif isinstance(content, list):
-                        for block in content:
-                            if isinstance(block, dict):
-                                if block.get("type") == "thinking":
-                                    thought = block.get("thinking", "")
-                                    f.write(f"[THOUGHT]: {thought}\n")
-                                    f.flush()
-                                    yield json.dumps({"_type": "thinking", "content": thought})
-                                elif block.get("type") == "text":
-                                    text = block.get("text", "")
-                                    turn_text_buffer += text
-                                    self.current_response += text
-                                    f.write(text)
-                                    f.flush()
-                                    if iterations > 1:
-                                        yield text
-                                    else:
-                                        # Standard buffering logic for Turn 1
-                                        if turn_is_thinking:
-                                            yield json.dumps({"_type": "thinking", "content": text})
-                                        elif turn_content_committed:
-                                            yield text
-                                        else:
-                                            turn_lookahead_buffer.append(text)
-                                            if len(turn_lookahead_buffer) >= 2:
-                                                turn_content_committed = True
-                                                for buffered_text in turn_lookahead_buffer:
-                                                    yield buffered_text
-                                                turn_lookahead_buffer = []
-
-                # Turn complete. Flush any remaining lookahead buffer.
-                if iterations == 1 and not turn_content_committed and turn_lookahead_buffer:
-                    if turn_is_thinking:
-                        for buffered_text in turn_lookahead_buffer:
-                            yield json.dumps({"_type": "thinking", "content": buffered_text})
+                        texts = [content]
                     else:
-                        for buffered_text in turn_lookahead_buffer:
-                            yield buffered_text
+                        texts = []
+                        for block in content:
+                            if not isinstance(block, dict):
+                                continue
+                            if block.get("type") == "thinking":
+                                thought = block.get("thinking", "")
+                                f.write(f"[THOUGHT]: {thought}\n")
+                                yield json.dumps({"_type": "thinking", "content": thought})
+                            elif block.get("type") == "text":
+                                texts.append(block.get("text", ""))
+
+                    for text in texts:
+                        if not text:
+                            continue
+                        turn_text_buffer += text
+                        f.write(text)
+
+                        if turn_is_thinking:
+                            self.current_response += text
+                            yield json.dumps({"_type": "thinking", "content": text})
+                            continue
+
+                        # Stream immediately (minus any glossary-term or chart
+                        # marker prefix held back); components are emitted as
+                        # soon as their closing fence arrives
+                        for out in self._emit_text(
+                            text, glossary_linker, chart_injector, component_parser
+                        ):
+                            yield out
+
+                # Flush text held back at the end of the turn
+                for out in self._emit_text(
+                    "", glossary_linker, chart_injector, component_parser, flush=True
+                ):
+                    yield out
 
                 # If no tool calls, we are done — text was already streamed
                 if not turn_tool_calls:
@@ -319,18 +450,23 @@ class UnifiedCoachService(BaseLLMService):
 
                 # Record this AI turn in the exchange history
                 current_exchange_turns.append(AIMessage(content=turn_text_buffer, tool_calls=turn_tool_calls))
+                turn_metrics.tool_iterations += 1
 
                 # Execute Tools
                 logger.info(f"🔧 Model called {len(turn_tool_calls)} tool(s).")
                 yield json.dumps({"_type": "tool_call", "count": len(turn_tool_calls)})
 
                 # Execute tools in parallel
+                executed_calls = []
                 tool_tasks = []
                 for tc in turn_tool_calls:
                     tool_name = tc["name"]
                     tool_args = tc["args"]
+                    if tool_name in USER_SCOPED_TOOLS:
+                        tool_args = {**tool_args, "user_id": self.user_id}
                     if tool_name in self.tool_executors:
                         logger.info(f"   └─ Executing {tool_name}")
+                        executed_calls.append(tc)
                         tool_tasks.append(self.tool_executors[tool_name].ainvoke(tool_args))
                     else:
                         logger.warning(f"   └─ Unknown tool: {tool_name}")
@@ -338,15 +474,18 @@ class UnifiedCoachService(BaseLLMService):
                 # Collect results
                 if tool_tasks:
                     results = await asyncio.gather(*tool_tasks, return_exceptions=True)
-                    for tc, result in zip(turn_tool_calls, results):
+
+                    # Enrich exercise lists with the user's last tracked weights
+                    self._attach_last_weights(executed_calls, results)
+                    # Keep chart series server-side; the model gets a marker
+                    self._register_charts(executed_calls, results)
+
+                    for tc, result in zip(executed_calls, results):
                         tool_name = tc["name"]
                         if not isinstance(result, Exception):
-                            # Store in aggregate tool_results (for prompt-level injection)
-                            if tool_name not in tool_results:
-                                tool_results[tool_name] = []
-                            tool_results[tool_name].append(result)
-                            
-                            content_str = json.dumps(result) if not isinstance(result, str) else result
+                            # Compact table with a per-tool token cap - this is
+                            # re-sent on every remaining iteration
+                            content_str = encode_tool_result(tool_name, result)
                             
                             # Record this Tool message in the exchange history
                             current_exchange_turns.append(ToolMessage(content=content_str, tool_call_id=tc["id"]))
@@ -360,46 +499,108 @@ class UnifiedCoachService(BaseLLMService):
                             logger.error(f"Error in tool {tool_name}: {str(result)}")
                             current_exchange_turns.append(ToolMessage(content=f"Error: {str(result)}", tool_call_id=tc["id"]))
 
-                # Special handling for exercise lists: enrich with weights
-                if "get_strength_exercises" in tool_results:
-                    all_exercises = [ex for batch in tool_results["get_strength_exercises"] for ex in (batch if isinstance(batch, list) else [batch])]
-                    exercise_ids = [ex["id"] for ex in all_exercises if isinstance(ex, dict) and "id" in ex]
-                    if exercise_ids:
-                        last_weights = self._get_last_weights_for_exercises(exercise_ids)
-                        # Apply to tool_results so _build_prompt sees the enriched data
-                        for batch in tool_results["get_strength_exercises"]:
-                            if isinstance(batch, list):
-                                for ex in batch:
-                                    if isinstance(ex, dict) and ex.get("id") in last_weights:
-                                        ex["last_tracked"] = last_weights[ex["id"]]
-                            elif isinstance(batch, dict) and batch.get("id") in last_weights:
-                                batch["last_tracked"] = last_weights[batch["id"]]
-
                 f.write(f"\n[RE-INVOKING MODEL (Iteration {iterations+1})...]\n")
 
+            for component in component_parser.finish():
+                yield json.dumps({"_type": "component", **component})
+
             f.write(f"\n{'-'*40}\n")
 
         # Record total stream time
         telemetry.record_stream_complete()
+        turn_metrics.total_ms = round((time.time() - turn_start) * 1000, 2)
+        experiment_metrics.record_turn(turn_metrics)
 
         # Log final answer to telemetry
         telemetry.on_chain_end({"output": self.current_response})
 
         # Add assistant response to history
-        self.message_history.append(
-            {"role": "assistant", "content": self.current_response}
-        )
+        self._append_history("assistant", self.current_response)
+        if answer_key:
+            answer_cache.set(answer_key, self.answer_text)
 
         logger.info(f"✅ Response complete ({len(self.current_response)} chars)")
 
-        # Check if compaction needed (after response, async)
-        if len(self.message_history) > 30 and self.compaction_state == "idle":
-            logger.info(
-                f"🗜️ Triggering compaction: {len(self.message_history)} messages"
-            )
-            self.compaction_task = asyncio.create_task(
-                self._trigger_session_compaction()
-            )
+        # Compact between turns if history is over budget (background)
+        self._maybe_schedule_compaction()
+
+    def _emit_text(
+        self,
+        text: str,
+        glossary_linker: Optional[GlossaryLinker],
+        chart_injector: ChartRefInjector,
+        component_parser: ComponentStreamParser,
+        flush: bool = False,
+    ) -> List[str]:
+        """
+        Link glossary terms and expand chart markers in streamed answer text,
+        and return what to yield: the rewritten text, then any components
+        whose block just closed.
+        """
+        if glossary_linker:
+            text = glossary_linker.finish() if flush else glossary_linker.feed(text)
+        text = chart_injector.feed(text)
+        if flush:
+            text += chart_injector.finish()
+        if not text:
+            return []
+
+        self.current_response += text
+        self.answer_text += text
+        return [text] + [
+            json.dumps({"_type": "component", **component})
+            for component in component_parser.feed(text)
+        ]
+
+    def _answer_cache_key(self, message: str) -> Optional[Tuple]:
+        """
+        Answer cache key for an opening question, or None if not cacheable.
+
+        Only the first message of a conversation qualifies - later answers
+        depend on what was already said.
+        """
+        if len(self.message_history) != 1 or self.running_summary:
+            return None
+        bundle = self.raw_bundle
+        return answer_cache.make_key(
+            self.user_id,
+            message,
+            getattr(bundle, "id", None),
+            memory_version(getattr(bundle, "ai_memory", None)),
+        )
+
+    async def _replay_cached_answer(
+        self, answer: str, telemetry: FlightRecorderCallback
+    ) -> AsyncGenerator[str, None]:
+        """Stream a cached answer as if generated, emitting components as usual."""
+        turn_start = time.time()
+        turn_metrics = TurnMetrics(
+            arm=self.experiment_arm.name,
+            user_id=self.user_id,
+            conversation_id=self.conversation_id,
+            answer_cache_hit=True,
+        )
+        telemetry.start_stream_timer()
+        component_parser = ComponentStreamParser()
+
+        async for chunk in answer_cache.replay(answer):
+            if turn_metrics.ttft_ms is None:
+                telemetry.record_first_token()
+                turn_metrics.ttft_ms = round((time.time() - turn_start) * 1000, 2)
+            self.current_response += chunk
+            yield chunk
+            for component in component_parser.feed(chunk):
+                yield json.dumps({"_type": "component", **component})
+        for component in component_parser.finish():
+            yield json.dumps({"_type": "component", **component})
+
+        telemetry.record_stream_complete()
+        turn_metrics.total_ms = round((time.time() - turn_start) * 1000, 2)
+        experiment_metrics.record_turn(turn_metrics)
+        telemetry.on_chain_end({"output": self.current_response})
+
+        self._append_history("assistant", self.current_response)
+        logger.info(f"✅ Cached response replayed ({len(self.current_response)} chars)")
 
     def get_current_response(self) -> str:
         """Get the current partial response (for cancellation handling)"""
@@ -417,616 +618,550 @@ class UnifiedCoachService(BaseLLMService):
             role: 'user' or 'assistant'
             content: Message content
         """
-        self.message_history.append({"role": role, "content": content})
+        self._append_history(role, content)
+        self._maybe_schedule_compaction()
 
-        if len(self.message_history) > 10:
-            self.message_history = self.message_history[-10:]
-
-    def _get_last_weights_for_exercises(
-        self, exercise_ids: List[str]
-    ) -> Dict[str, Dict[str, Any]]:
+    def _append_history(self, role: str, content: str) -> None:
         """
-        Get last tracked weight for each exercise definition_id.
-
-        Location: /app/services/unified_coach_service.UnifiedCoachService._get_last_weights_for_exercises()
-
-        Args:
-            exercise_ids: List of exercise definition_ids from tool results
-
-        Returns:
-            {definition_id: {"weight": float, "reps": int, "date": str}}
+        Append to message_history and its converted LangChain form together,
+        so each message is converted exactly once.
         """
-        if not self.raw_bundle or not hasattr(self.raw_bundle, "recent_workouts"):
-            return {}
-
-        # Track most recent weight per definition_id
-        last_weights = {}
-
-        # Iterate workouts chronologically (recent_workouts already sorted newest first)
-        for workout in self.raw_bundle.recent_workouts:
-            for exercise in workout.exercises:
-                def_id = exercise.definition_id
-
-                # Skip if no definition_id or already found (we want most recent)
-                if not def_id or def_id in last_weights:
-                    continue
-
-                # Skip if not in our target list
-                if def_id not in exercise_ids:
-                    continue
-
-                # Find the heaviest set (typically the working weight)
-                if exercise.sets:
-                    heaviest_set = max(
-                        [s for s in exercise.sets if s.weight],
-                        key=lambda s: s.weight,
-                        default=None,
-                    )
-
-                    if heaviest_set and heaviest_set.weight:
-                        last_weights[def_id] = {
-                            "weight": heaviest_set.weight,
-                            "reps": heaviest_set.reps,
-                            "date": (
-                                workout.date.strftime("%b %d")
-                                if hasattr(workout.date, "strftime")
-                                else str(workout.date)
-                            ),
-                        }
+        self.message_history.append({"role": role, "content": content})
+        self.history_tokens += count_tokens(content)
+        if role == "user":
+            self.history_messages.append(HumanMessage(content=content))
+        else:
+            self.history_messages.append(AIMessage(content=content))
 
-        return last_weights
+    def _recount_history_tokens(self) -> None:
+        self.history_tokens = sum(count_tokens(m["content"]) for m in self.message_history)
 
+    def _log_prompt_tokens(self) -> None:
+        """Log estimated per-section prompt tokens for this turn."""
+        sections = ", ".join(f"{k}={v}" for k, v in self.context_section_tokens.items())
+        context_total = sum(self.context_section_tokens.values())
+        system_total = count_tokens(self.system_message.content)
+        logger.info(
+            f"📏 Prompt tokens (est): {sections} | context={context_total}/"
+            f"{self.token_budget.budget} | system={system_total} | "
+            f"memory={self.memory_tokens} | "
+            f"history={self.history_tokens}/{self.history_token_budget} "
+            f"({len(self.history_messages)} msgs) | "
+            f"summary={count_tokens(self.running_summary)} ({self.summarized_messages} msgs)"
+        )
 
-    def _format_weight(self, weight_kg: float, is_imperial: bool) -> str:
+    def _attach_last_weights(self, tool_calls: List[Dict], results: List[Any]) -> None:
         """
-        Format weight in user's preferred units.
-
-        Args:
-            weight_kg: Weight in kilograms
-            is_imperial: Whether user prefers imperial units
-
-        Returns:
-            Formatted weight string with unit (e.g., "225.0lbs" or "102.0kg")
+        Add last_tracked (heaviest set from the user's most recent session)
+        to strength and search results in place, before they are serialized.
+        """
+        exercises = [
+            ex
+            for tc, result in zip(tool_calls, results)
+            if tc["name"] in ("get_strength_exercises", "search_exercises")
+            and isinstance(result, dict)
+            for ex in result.get("results", [])
+            if isinstance(ex, dict) and "id" in ex
+        ]
+        if not exercises:
+            return
+
+        last_weights = (self.context_snapshot or {}).get("last_weights", {})
+        for ex in exercises:
+            lt = last_weights.get(ex["id"])
+            if lt:
+                ex["last_tracked"] = {
+                    **lt,
+                    "weight": format_weight(lt["weight"], self.is_imperial),
+                }
+
+    def _register_charts(self, tool_calls: List[Dict], results: List[Any]) -> None:
         """
-        if is_imperial:
-            weight_lbs = weight_kg / 0.453592
-            return f"{weight_lbs:.1f}lbs"
-        return f"{weight_kg:.1f}kg"
+        Move build_chart series into the chart registry in place, leaving
+        the model a summary and the marker to place in its answer.
+        """
+        for tc, result in zip(tool_calls, results):
+            if tc["name"] == "build_chart" and isinstance(result, dict) and "chart" in result:
+                ref = self.chart_refs.register(result.pop("chart"))
+                result["marker"] = chart_marker(ref)
 
     def _format_shared_context(self, shared_context: Dict) -> Dict[str, str]:
         """
         Format all shared context into strings ONCE at initialization.
         Returns dict of pre-formatted strings to reuse on every message.
 
+        Sections are fitted into the context token budget by priority
+        (profile > workout history > strength); lower priority sections
+        are re-rendered smaller or truncated to fit. Memory is selected
+        per message instead (see _select_memory).
+        Workout history and strength are rendered from the bundle's
+        precomputed context snapshot (set by _load_prompt_context).
+
         Args:
             shared_context: Raw context from SharedContextLoader
 
         Returns:
             Dict with formatted context strings
         """
-        bundle = shared_context.get("bundle")
         profile = shared_context.get("profile")
-
-        # Extract user's unit preference
-        is_imperial = profile.get("is_imperial", False) if profile else False
-
-        # Format user profile
-        if profile:
-            name = f"{profile.get('first_name', '')} {profile.get('last_name', '')}".strip()
-            # Calculate age from DOB
-            age = "Not provided"
-            dob_str = profile.get("dob")
-            if dob_str:
-                try:
-                    dob = datetime.strptime(dob_str, "%Y-%m-%d").date()
-                    today = date.today()
-                    age = (
-                        today.year
-                        - dob.year
-                        - ((today.month, today.day) < (dob.month, dob.day))
-                    )
-                except (ValueError, TypeError):
-                    # Fallback to age field if DOB parsing fails
-                    age = profile.get("age", "Not provided")
-            else:
-                # Fallback to age field if no DOB
-                age = profile.get("age", "Not provided")
-            units = (
-                "imperial (lb/mi)" if profile.get("is_imperial") else "metric (kg/km)"
-            )
-            user_profile_text = (
-                f"Name: {name or 'Not provided'}, Age: {age}, Units: {units}"
-            )
+        snapshot = self.context_snapshot
+
+        # Lean context variant (experiment arm) trims history depth; with the
+        # history tool bound, older workouts and less-trained exercises are
+        # one query_history call away instead of in every prompt, and with
+        # build_chart bound charts are built server-side (no raw points)
+        variant = self._context_variant()
+        is_lean = variant.startswith("lean")
+        is_short = is_lean or "+history" in variant
+        max_recent_workouts = 3 if is_short else 5
+        max_strength_exercises = 10 if is_short else 20
+        if "+charts" in variant:
+            max_series_points = 0
         else:
-            user_profile_text = "No profile available"
-
-        # Format AI memory
-        if bundle and hasattr(bundle, "ai_memory") and bundle.ai_memory:
-            memory_notes = bundle.ai_memory.get("notes", [])
-            if memory_notes:
-                memory_lines = []
-                # Group by freshness (Recent = Last 14 days)
-                recent_notes = []
-                outdated_notes = []
-
-                now = datetime.now()
-                from datetime import timedelta
-
-                for note in memory_notes:
-                    note_date_str = note.get("date", "")
-                    is_recent = False
-
-                    if note_date_str:
-                        try:
-                            # Try ISO format (YYYY-MM-DD)
-                            note_date = datetime.strptime(
-                                note_date_str.split("T")[0], "%Y-%m-%d"
-                            )
-                            if now - note_date < timedelta(days=14):
-                                is_recent = True
-                        except (ValueError, IndexError):
-                            # If parsing fails, treat as outdated/unknown
-                            pass
-
-                    if is_recent:
-                        recent_notes.append(note)
-                    else:
-                        outdated_notes.append(note)
-
-                def format_note_group(notes: List[Dict], title: str):
-                    lines = [f"\n### {title}:"]
-                    # Group by category
-                    categorized = {}
-                    for note in notes:
-                        category = note.get("category", "general")
-                        if category not in categorized:
-                            categorized[category] = []
-                        categorized[category].append(note)
-
-                    for category, cat_notes in categorized.items():
-                        lines.append(f"**{category.title()}:**")
-                        for note in cat_notes:
-                            text = note.get("text", "")
-                            date_str = note.get("date", "")
-                            lines.append(f"- {text} (noted: {date_str})")
-                    return lines
-
-                if recent_notes:
-                    memory_lines.extend(
-                        format_note_group(recent_notes, "RECENT MEMORY (Last 14 Days)")
-                    )
+            max_series_points = 10 if is_lean else 30
 
-                if outdated_notes:
-                    memory_lines.extend(
-                        format_note_group(
-                            outdated_notes, "POTENTIALLY OUTDATED MEMORY (> 14 Days)"
-                        )
-                    )
+        user_profile_text = self._format_user_profile(profile)
 
-                ai_memory_text = "\n".join(memory_lines).strip()
-            else:
-                ai_memory_text = "No memory available"
-        else:
-            ai_memory_text = "No memory available"
-
-        # Format workout history with FULL DETAILS
-        if bundle and hasattr(bundle, "recent_workouts"):
-            recent = bundle.recent_workouts[:5]
-            if recent:
-                workout_lines = []
-                for w in recent:
-                    date_str = (
-                        w.date.strftime("%b %d, %Y")
-                        if hasattr(w.date, "strftime")
-                        else str(w.date)
-                    )
-                    name = w.name or "Unnamed Workout"
-
-                    # Build exercise list with full details
-                    exercise_details = []
-                    if hasattr(w, "exercises") and w.exercises:
-                        for ex in w.exercises:
-                            # Format sets info
-                            sets_info = []
-                            if hasattr(ex, "sets") and ex.sets:
-                                for s in ex.sets:
-                                    reps = s.reps if hasattr(s, "reps") else "N/A"
-                                    weight = (
-                                        self._format_weight(s.weight, is_imperial)
-                                        if hasattr(s, "weight") and s.weight
-                                        else "bodyweight"
-                                    )
-                                    sets_info.append(f"{reps}x{weight}")
-
-                            sets_str = ", ".join(sets_info) if sets_info else "No sets"
-                            ex_name = (
-                                ex.name if hasattr(ex, "name") else "Unknown exercise"
-                            )
-                            exercise_details.append(f"    - {ex_name}: {sets_str}")
-
-                    exercises_str = (
-                        "\n".join(exercise_details)
-                        if exercise_details
-                        else "    - No exercises"
-                    )
-                    notes_str = (
-                        f"\n  Notes: {w.notes}"
-                        if hasattr(w, "notes") and w.notes
-                        else ""
-                    )
-
-                    workout_lines.append(
-                        f"- {date_str}: {name}{notes_str}\n" f"{exercises_str}"
-                    )
-
-                workout_history_text = "\n\n".join(workout_lines)
-            else:
-                workout_history_text = "No workout history available"
-        else:
-            workout_history_text = "No workout history available"
-
-        # Format strength progression
-        strength_prog_text = ""
-        if bundle and hasattr(bundle, "strength_data") and bundle.strength_data:
-            strength_data = bundle.strength_data
-            if (
-                hasattr(strength_data, "exercise_strength_progress")
-                and strength_data.exercise_strength_progress
-            ):
-                exercises_with_best = []
-                for ex_prog in strength_data.exercise_strength_progress:
-                    if (
-                        hasattr(ex_prog, "e1rm_time_series")
-                        and ex_prog.e1rm_time_series
-                    ):
-                        best_point = max(
-                            ex_prog.e1rm_time_series, key=lambda x: x.estimated_1rm
-                        )
-                        exercises_with_best.append(
-                            {
-                                "exercise": ex_prog.exercise,
-                                "best_e1rm": best_point.estimated_1rm,
-                                "time_series": ex_prog.e1rm_time_series,
-                            }
-                        )
-
-                if exercises_with_best:
-                    top_exercises = sorted(
-                        exercises_with_best, key=lambda x: x["best_e1rm"], reverse=True
-                    )[:20]
-                    strength_lines = ["**Top Exercise Strength Progression (e1RM):**"]
-
-                    for ex_data in top_exercises:
-                        if ex_data["time_series"]:
-                            first = ex_data["time_series"][0]
-                            last = ex_data["time_series"][-1]
-                            change_kg = last.estimated_1rm - first.estimated_1rm
-                            change_pct = (
-                                (change_kg / first.estimated_1rm * 100)
-                                if first.estimated_1rm > 0
-                                else 0
-                            )
-
-                            change_formatted = self._format_weight(
-                                abs(change_kg), is_imperial
-                            )
-                            change_str = (
-                                f"+{change_formatted} (+{change_pct:.1f}%)"
-                                if change_kg >= 0
-                                else f"-{change_formatted} ({change_pct:.1f}%)"
-                            )
-
-                            # Provide more points for better charts (up to 30)
-                            recent_points = ex_data["time_series"][-30:]
-                            
-                            # Summary line for quick reading
-                            summary_str = f"- {ex_data['exercise']}: Best {self._format_weight(ex_data['best_e1rm'], is_imperial)} | Change: {change_str} | Data Points: {len(recent_points)}"
-                            strength_lines.append(summary_str)
-                            
-                            # RAW DATA BLOCK for chart extraction (hidden from user but visible to LLM)
-                            # Format: [Date: e1RM]
-                            data_points = []
-                            for p in recent_points:
-                                date_str = p.date.strftime('%Y-%m-%d') if hasattr(p.date, 'strftime') else str(p.date)
-                                weight_val = round(p.estimated_1rm, 1)
-                                data_points.append(f"{date_str}: {weight_val}")
-                            
-                            raw_data_str = f"  Raw data (kg): [{', '.join(data_points)}]"
-                            strength_lines.append(raw_data_str)
-
-                    strength_prog_text = "\n".join(strength_lines)
-
-        if not strength_prog_text:
-            strength_prog_text = "No strength progression data available"
-
-        # Format glossary terms
-        glossary_terms = shared_context.get("glossary_terms", [])
-        if glossary_terms:
-            glossary_lines = [
-                f"**Available glossary terms ({len(glossary_terms)} total):**"
-            ]
-            glossary_lines.append(
-                "When mentioning these terms, link them as: [term](glossary://uuid)"
+        def reduce_workouts(target: int) -> str:
+            return first_fitting(
+                target,
+                [
+                    lambda n=n: format_workout_history(snapshot, n)
+                    for n in range(max_recent_workouts - 1, 0, -1)
+                ],
             )
-            glossary_lines.append("")
 
-            # Group by first letter for readability
-            from itertools import groupby
-
-            sorted_terms = sorted(glossary_terms, key=lambda t: t["term"].lower())
+        def reduce_strength(target: int) -> str:
+            # Fewer raw points, then summary lines only, then fewer exercises
+            candidates = [
+                lambda p=p: format_strength_progression(
+                    snapshot, max_strength_exercises, p
+                )
+                for p in (10, 5, 0)
+                if p < max_series_points
+            ]
+            candidates += [
+                lambda e=e: format_strength_progression(snapshot, e, 0)
+                for e in (10, 5)
+                if e < max_strength_exercises
+            ]
+            return first_fitting(target, candidates)
+
+        sections = [
+            PromptSection(
+                "user_profile",
+                user_profile_text,
+                priority=0,
+                min_tokens=count_tokens(user_profile_text),
+            ),
+            PromptSection(
+                "workout_history",
+                format_workout_history(snapshot, max_recent_workouts),
+                priority=2,
+                min_tokens=200,
+                reducer=reduce_workouts,
+            ),
+            PromptSection(
+                "strength_progression",
+                format_strength_progression(
+                    snapshot, max_strength_exercises, max_series_points
+                ),
+                priority=3,
+                min_tokens=100,
+                reducer=reduce_strength,
+            ),
+        ]
+
+        return self.token_budget.fit(sections)
+
+    def _format_user_profile(self, profile: Optional[Dict]) -> str:
+        """Format name, age and unit preference."""
+        if not profile:
+            return "No profile available"
+
+        name = f"{profile.get('first_name', '')} {profile.get('last_name', '')}".strip()
+        # Calculate age from DOB
+        age = "Not provided"
+        dob_str = profile.get("dob")
+        if dob_str:
+            try:
+                dob = datetime.strptime(dob_str, "%Y-%m-%d").date()
+                today = date.today()
+                age = (
+                    today.year
+                    - dob.year
+                    - ((today.month, today.day) < (dob.month, dob.day))
+                )
+            except (ValueError, TypeError):
+                # Fallback to age field if DOB parsing fails
+                age = profile.get("age", "Not provided")
+        else:
+            # Fallback to age field if no DOB
+            age = profile.get("age", "Not provided")
+        units = "imperial (lb/mi)" if profile.get("is_imperial") else "metric (kg/km)"
+        return f"Name: {name or 'Not provided'}, Age: {age}, Units: {units}"
 
-            for letter, terms in groupby(
-                sorted_terms, key=lambda t: t["term"][0].upper()
-            ):
-                glossary_lines.append(f"**{letter}:**")
-                for term in terms:
-                    glossary_lines.append(
-                        f"- [{term['term']}](glossary://{term['id']})"
-                    )
+    @staticmethod
+    def _context_version(shared_context: Dict) -> str:
+        """
+        Fingerprint of everything _format_shared_context reads.
 
-            glossary_text = "\n".join(glossary_lines)
-        else:
-            glossary_text = "No glossary terms available"
-
-        return {
-            "user_profile": user_profile_text,
-            "ai_memory": ai_memory_text,
-            "workout_history": workout_history_text,
-            "strength_progression": strength_prog_text,
-            "glossary_terms": glossary_text,
+        Bundle regeneration (new id) and profile edits change it. Memory is
+        not part of the system prompt (relevant notes are selected per turn,
+        see _select_memory), so memory updates keep the prefix cacheable.
+        Today's date is included because ages are relative to it.
+        """
+        bundle = shared_context.get("bundle")
+        metadata = getattr(bundle, "metadata", None)
+        payload = {
+            "bundle_id": getattr(bundle, "id", None),
+            "created_at": getattr(metadata, "created_at", None),
+            "profile": shared_context.get("profile"),
+            "today": date.today(),
         }
-
-    def _build_prompt(
-        self,
-        message: str,
-        message_history: List[Dict],
-        formatted_context: Dict[str, str],
-        tool_results: Dict,
-    ) -> List:
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+    def _context_variant(self) -> str:
+        """Context variant of the experiment arm, tagged with the history tools bound."""
+        variant = self.experiment_arm.context_variant
+        if "query_history" in self.tool_executors:
+            variant += "+history"
+        if "build_chart" in self.tool_executors:
+            variant += "+charts"
+        return variant
+
+    def _load_prompt_context(self, shared_context: Dict) -> None:
         """
-        Build the complete prompt with pre-formatted context and tool results.
+        Set formatted_context and system_message, reusing the memoized pair
+        when this (context version, conversation, variant) was seen before.
+        """
+        key = (
+            self._context_version(shared_context),
+            self.conversation_id,
+            self._context_variant(),
+        )
+        memo = self._prompt_memo.lookup(key)
+        if memo:
+            (
+                self.formatted_context,
+                self.system_message,
+                self.context_section_tokens,
+                self.context_snapshot,
+            ) = memo
+            logger.info(f"♻️ Reusing memoized prompt context ({key[0]})")
+            return
 
-        Location: /app/services/unified_coach_service.UnifiedCoachService._build_prompt()
+        profile = shared_context.get("profile")
+        self.context_snapshot = get_context_snapshot(
+            shared_context.get("bundle"),
+            profile.get("is_imperial", False) if profile else False,
+        )
+        self.formatted_context = self._format_shared_context(shared_context)
+        self.system_message = self._render_system_message(self.formatted_context)
+        self.context_section_tokens = TokenBudgetManager.section_tokens(self.formatted_context)
+
+        self._prompt_memo.set(
+            key,
+            (
+                self.formatted_context,
+                self.system_message,
+                self.context_section_tokens,
+                self.context_snapshot,
+            ),
+        )
+
+    def _render_system_message(self, formatted_context: Dict[str, str]) -> SystemMessage:
+        """
+        Render the system prompt with pre-formatted context.
 
         Args:
-            message: Current user message
-            message_history: List of previous messages
             formatted_context: Pre-formatted context strings
-            tool_results: Results from tool execution
 
         Returns:
-            List of LangChain message objects
+            SystemMessage holding the full static prompt prefix
         """
         # Determine user state
         is_new_user = "No workout history available" in formatted_context.get(
             "workout_history", ""
         )
 
-        # Get base prompt
-        system_prompt = get_unified_coach_prompt(is_new_user=is_new_user)
-
-        # Get user's unit preference (stored during initialization from profile)
-        is_imperial = self.is_imperial
-
-        # Format available exercises from tool results
-        available_exercises_text = ""
-
-        # Parallel exercise type formatting
-        exercise_sections = []
-
-        # Handle strength exercises (aggregated lists)
-        if "get_strength_exercises" in tool_results:
-            results = tool_results["get_strength_exercises"]
-            # Flatten results if it's a list of lists or just a list
-            all_strength = []
-            for r in results:
-                if isinstance(r, list):
-                    all_strength.extend(r)
-                else:
-                    all_strength.append(r)
-            
-            if all_strength:
-                # Deduplicate by ID
-                seen_ids = set()
-                unique_strength = []
-                for ex in all_strength:
-                    if ex["id"] not in seen_ids:
-                        unique_strength.append(ex)
-                        seen_ids.add(ex["id"])
-
-                # Group by movement_pattern for clarity
-                by_movement = {}
-                for ex in unique_strength:
-                    movement = ex.get("movement_pattern", "other")
-                    if movement not in by_movement:
-                        by_movement[movement] = []
-                    by_movement[movement].append(ex)
-
-                section_lines = [f"**{len(unique_strength)} strength exercises available:**"]
-                for movement, exs in by_movement.items():
-                    section_lines.append(f"\n**{movement.replace('_', ' ').title()}:**")
-                    for ex in exs[:15]:  # Slightly more per movement
-                        base_info = f"- {ex['standard_name']} (ID: {ex['id']}, Muscles: {', '.join(ex.get('primary_muscles', []))})"
-                        if "last_tracked" in ex:
-                            lt = ex["last_tracked"]
-                            weight_str = self._format_weight(lt["weight"], is_imperial)
-                            base_info += f" | Last: {lt['reps']}x{weight_str} ({lt['date']})"
-                        section_lines.append(base_info)
-                exercise_sections.append("\n".join(section_lines))
-
-        # Handle mobility exercises
-        if "get_mobility_exercises" in tool_results:
-            results = tool_results["get_mobility_exercises"]
-            all_mobility = []
-            for r in results:
-                if isinstance(r, list):
-                    all_mobility.extend(r)
-                else:
-                    all_mobility.append(r)
-            
-            if all_mobility:
-                seen_ids = set()
-                section_lines = [f"**{len(all_mobility)} mobility exercises available:**"]
-                for ex in all_mobility:
-                    if ex["id"] not in seen_ids:
-                        muscles = ", ".join(ex.get("primary_muscles", [])) or "general"
-                        section_lines.append(f"- {ex['standard_name']} (ID: {ex['id']}, Targets: {muscles})")
-                        seen_ids.add(ex["id"])
-                exercise_sections.append("\n".join(section_lines))
-
-        # Handle cardio exercises
-        if "get_cardio_exercises" in tool_results:
-            results = tool_results["get_cardio_exercises"]
-            all_cardio = []
-            for r in results:
-                if isinstance(r, list):
-                    all_cardio.extend(r)
-                else:
-                    all_cardio.append(r)
-            
-            if all_cardio:
-                seen_ids = set()
-                section_lines = [f"**{len(all_cardio)} cardio exercises available:**"]
-                for ex in all_cardio:
-                    if ex["id"] not in seen_ids:
-                        section_lines.append(f"- {ex['standard_name']} (ID: {ex['id']}, Type: {ex.get('base_movement', 'N/A')})")
-                        seen_ids.add(ex["id"])
-                exercise_sections.append("\n".join(section_lines))
-
-        available_exercises_text = "\n\n---\n\n".join(exercise_sections)
-
-        # Default if no exercises fetched
-        if not available_exercises_text:
-            available_exercises_text = "No exercises fetched yet. If user wants to plan a workout, ask which muscles to target."
-
         # Inject ALL context into system prompt
-        system_prompt = system_prompt.format(
+        system_prompt = get_unified_coach_prompt(is_new_user=is_new_user).format(
             user_profile=formatted_context["user_profile"],
-            ai_memory=formatted_context["ai_memory"],
             workout_history=formatted_context["workout_history"],
             strength_progression=formatted_context["strength_progression"],
             available_exercises="Tools are available to fetch exercises. Use them if you need more data to plan the workout.",
-            glossary_terms=formatted_context["glossary_terms"],
         )
+        return SystemMessage(content=system_prompt)
 
-        # Build messages list
-        messages = [SystemMessage(content=system_prompt)]
-
-        # Add message history
-        for msg in message_history:
-            if not isinstance(msg, dict):
-                logger.warning(f"Unexpected non-dict message in history: {type(msg)}")
-                continue
-            
-            role = msg.get("role")
-            content = msg.get("content", "")
-            
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            else:
-                messages.append(AIMessage(content=content))
+    def _select_memory(self, message: str) -> Optional[HumanMessage]:
+        """
+        Memory notes relevant to this message (plus pinned injury / goal
+        notes), under the memory token cap.
 
-        # Add current message
-        messages.append(HumanMessage(content=message))
+        Returns:
+            HumanMessage to place before the user's message, or None if the
+            user has no memory
+        """
+        index = self.memory_index
+        if not index.notes:
+            self.memory_tokens = 0
+            return None
+
+        start = time.perf_counter()
+        selected = index.select(message)
+        text = format_memory_notes(
+            [index.notes[i] for i in selected],
+            omitted=len(index.notes) - len(selected),
+        )
+        self.memory_tokens = count_tokens(text)
+        logger.info(
+            f"🧠 Memory: {len(selected)}/{len(index.notes)} notes, "
+            f"{self.memory_tokens} tokens ({(time.perf_counter() - start) * 1e6:.0f}µs)"
+        )
+        return HumanMessage(content=f"[Relevant memory about the user]\n{text}")
 
-        return messages
+    def _build_prompt(self, memory_message: Optional[HumanMessage] = None) -> List[BaseMessage]:
+        """
+        Build the prompt for the current turn.
 
-    def _extract_json_components(self, response: str) -> List[Dict]:
-        """Extract JSON code blocks from response (workout_template, chart_data, etc.)"""
-        components = []
+        Location: /app/services/unified_coach_service.UnifiedCoachService._build_prompt()
 
-        try:
-            json_pattern = r"```json\s*(.*?)\s*```"
-            matches = re.findall(json_pattern, response, re.DOTALL)
+        The system message is memoized and history is converted as it is
+        appended, so this only copies references - no re-rendering.
+
+        Args:
+            memory_message: Per-turn memory selection, placed right before the
+                current user message (outside the cached prefix)
+
+        Returns:
+            List of LangChain message objects (system + history incl. current message)
+        """
+        history = self.history_messages
+        if memory_message is not None and history:
+            history = [*history[:-1], memory_message, history[-1]]
+        if self.summary_message:
+            return [self.system_message, self.summary_message, *history]
+        return [self.system_message, *history]
+
+    async def _prefetch_exercises(self, message: str) -> List[BaseMessage]:
+        """
+        Run the exercise tool call the model would most likely make.
 
-            for json_str in matches:
-                try:
-                    parsed = json.loads(json_str.strip())
+        The result is injected as a completed tool call (AIMessage +
+        ToolMessage) after the user message, so the model can answer in one
+        pass - and can still call tools itself if the guess was wrong.
 
-                    if parsed.get("type") and parsed.get("data"):
-                        components.append(parsed)
-                        logger.info(f"Extracted component: {parsed['type']}")
+        Returns:
+            [AIMessage, ToolMessage] or [] if no planning intent was detected
+        """
+        if not self.experiment_arm.prefetch:
+            return []
 
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse JSON component: {e}")
-                    continue
+        intent = detect_exercise_intent(message)
+        if not intent or intent.tool_name not in self.tool_executors:
+            return []
 
+        tool_call = {
+            "name": intent.tool_name,
+            "args": intent.args,
+            "id": f"prefetch_{intent.tool_name}",
+        }
+        try:
+            result = await self.tool_executors[intent.tool_name].ainvoke(intent.args)
         except Exception as e:
-            logger.error(f"Error extracting components: {str(e)}")
+            logger.warning(f"⚠️ Exercise prefetch failed, model will call tools: {e}")
+            return []
+
+        self._attach_last_weights([tool_call], [result])
+        logger.info(
+            f"⚡ Prefetched {intent.tool_name}({intent.args}): "
+            f"{result.get('total', 0) if isinstance(result, dict) else len(result)} matches"
+        )
+        return [
+            AIMessage(content="", tool_calls=[tool_call]),
+            ToolMessage(
+                content=encode_tool_result(intent.tool_name, result),
+                tool_call_id=tool_call["id"],
+            ),
+        ]
+
+    def _resolve_prompt_cache(self, system_prompt: str) -> Optional[str]:
+        """
+        Look up the static prompt prefix in the context cache.
 
-        return components
+        The prefix is keyed by a hash of model + system prompt + tool schemas,
+        so it is reused across turns until the bundle (and so the formatted
+        context) changes. An unregistered prefix is registered in the
+        background, never before the first token - this turn sends it inline.
 
-    async def _trigger_session_compaction(self) -> None:
+        Returns:
+            Provider cache name to pass as cached_content, or None to send
+            the full prompt.
         """
-        Extract session memory from old messages (async background task).
+        if not self.experiment_arm.prompt_cache:
+            return None
+
+        context_cache = get_context_cache()
+        if not context_cache:
+            return None
+
+        cache_name = context_cache.get_or_register(
+            self.model_name,
+            system_prompt,
+            list(self.tool_executors.values()),
+            credentials=self.credentials,
+            project_id=self.project_id,
+        )
+        if not cache_name or not context_cache.sends_cached_content:
+            return None
+        return cache_name
 
-        This runs in the background after response streaming completes.
-        When done, sets state to 'ready' for the next message to apply.
+    @staticmethod
+    def _dynamic_suffix(messages: List) -> List:
         """
-        try:
-            self.compaction_state = "extracting"
-            self.compaction_cutoff = len(self.message_history) - 10  # Keep last 10
+        Strip the cached prefix from a prompt, leaving history + current turn.
 
-            messages_to_extract = self.message_history[: self.compaction_cutoff]
-            logger.info(f"🗜️ Extracting memory from {len(messages_to_extract)} messages")
+        The provider only honours a SystemMessage at position 0, so any later
+        system instructions (e.g. tool-result reinforcement) become human turns.
+        """
+        suffix = []
+        for msg in messages[1:]:
+            if isinstance(msg, SystemMessage):
+                suffix.append(HumanMessage(content=msg.content))
+            else:
+                suffix.append(msg)
+        return suffix
+
+    def _set_running_summary(self, text: str, covered_messages: int) -> None:
+        """Set the running summary and the prompt message that carries it."""
+        self.running_summary = text
+        self.summarized_messages = covered_messages
+        self.summary_message = (
+            HumanMessage(
+                content=f"[Summary of the earlier part of this conversation]\n{text}"
+            )
+            if text
+            else None
+        )
 
-            # Get bundle ID for memory storage
-            if not self.raw_bundle or not hasattr(self.raw_bundle, "id"):
-                logger.warning("No bundle available for session compaction")
-                self.compaction_state = "idle"
-                return
+    def _maybe_schedule_compaction(self) -> None:
+        """
+        Start a background compaction if history is over its token budget.
+
+        Runs as its own task after the turn has streamed, so the summarization
+        call never sits on the time-to-first-token path; the result is swapped
+        in at the start of a later turn.
+        """
+        if self.compaction_state != "idle":
+            return
+        if self.history_tokens <= self.history_token_budget:
+            return
 
-            bundle_id = self.raw_bundle.id
+        cutoff = select_compaction_slice(self.message_history, self.history_token_budget)
+        if cutoff <= 0:
+            return
+
+        logger.info(
+            f"🗜️ History {self.history_tokens}/{self.history_token_budget} tokens - "
+            f"compacting oldest {cutoff} of {len(self.message_history)} messages"
+        )
+        self.compaction_state = "extracting"
+        self.compaction_cutoff = cutoff
+        self.compaction_task = asyncio.create_task(self._compact_history(cutoff))
+
+    async def _compact_history(self, cutoff: int) -> None:
+        """
+        Fold message_history[:cutoff] into the running summary (background task).
+
+        Only the new slice and the previous summary are sent to the model. The
+        merged summary is persisted before it is applied, so a reconnect
+        resumes from it instead of re-summarizing. The same slice is mined
+        for ai_memory notes in parallel (append_session_memory), so facts
+        reach memory before the conversation closes.
+        """
+        try:
+            # Yield so the finished turn is fully flushed before we start
+            await asyncio.sleep(0)
 
-            # Run session memory extraction
             from app.services.memory.memory_service import MemoryExtractionService
+            from app.services.db.conversation_service import conversation_service
 
             memory_service = MemoryExtractionService(
                 credentials=self.credentials, project_id=self.project_id
             )
+            messages = self.message_history[:cutoff]
+            summary, _ = await asyncio.gather(
+                memory_service.summarize_conversation_slice(self.running_summary, messages),
+                self._append_session_memory(memory_service, messages),
+            )
+            if not summary:
+                logger.error("Rolling compaction failed, keeping full history")
+                self.compaction_state = "idle"
+                return
 
-            success = await memory_service.append_session_memory(
-                user_id=self.user_id, messages=messages_to_extract, bundle_id=bundle_id
+            covered = self.summarized_messages + cutoff
+            save_result = await conversation_service.save_running_summary_admin(
+                self.conversation_id,
+                {
+                    "text": summary,
+                    "covered_messages": covered,
+                    "updated_at": datetime.now().isoformat(),
+                },
             )
+            if not save_result.get("success"):
+                # Still usable for this connection; a reconnect re-summarizes
+                logger.warning(
+                    f"⚠️ Failed to persist running summary: {save_result.get('error')}"
+                )
 
-            if success:
-                self.compaction_state = "ready"
-                logger.info("✅ Session compaction ready to apply")
-            else:
-                logger.error("Session compaction failed, resetting state")
-                self.compaction_state = "idle"
+            self.pending_summary = summary
+            self.compaction_state = "ready"
+            logger.info(
+                f"✅ Rolling compaction ready: {covered} messages summarized "
+                f"({count_tokens(summary)} tokens)"
+            )
 
+        except asyncio.CancelledError:
+            self.compaction_state = "idle"
+            raise
         except Exception as e:
-            logger.error(f"Error in session compaction: {str(e)}", exc_info=True)
+            logger.error(f"Error in rolling compaction: {str(e)}", exc_info=True)
             self.compaction_state = "idle"
 
-    async def _apply_compaction(self) -> None:
-        """
-        Apply pending compaction: truncate history and reload context.
+    async def _append_session_memory(self, memory_service, messages: List[Dict]) -> None:
+        """Append notes mined from a compacted slice to the bundle's ai_memory."""
+        if not self.raw_bundle or not getattr(self.raw_bundle, "id", None):
+            logger.warning("No bundle available for session memory, skipping")
+            return
+        success = await memory_service.append_session_memory(
+            user_id=self.user_id, messages=messages, bundle_id=self.raw_bundle.id
+        )
+        if not success:
+            # The summary still covers the slice; extract_memory runs on close
+            logger.warning("⚠️ Session memory extraction failed for compacted slice")
 
-        Called at the start of process_message when compaction_state is 'ready'.
+    def _apply_compaction(self) -> None:
         """
-        try:
-            logger.info(
-                f"🗜️ Applying compaction: truncating to last {len(self.message_history) - self.compaction_cutoff} messages"
-            )
-
-            # Truncate message history
-            self.message_history = self.message_history[self.compaction_cutoff :]
+        Swap in a finished compaction: drop the summarized messages from
+        history and install the merged summary.
 
-            # Reload context to pick up new session memory
-            shared_context = await self.context_loader.load_all(self.user_id)
-            self.formatted_context = self._format_shared_context(shared_context)
-            self.raw_bundle = shared_context.get("bundle")
+        Called at the start of process_message when compaction_state is
+        'ready'. In-memory only - nothing here waits on the model or database.
+        """
+        cutoff = self.compaction_cutoff
+        self.message_history = self.message_history[cutoff:]
+        self.history_messages = self.history_messages[cutoff:]
+        self._recount_history_tokens()
+        self._set_running_summary(self.pending_summary, self.summarized_messages + cutoff)
 
-            # Reset compaction state
-            self.compaction_state = "idle"
-            self.compaction_cutoff = 0
+        self.compaction_state = "idle"
+        self.compaction_cutoff = 0
+        self.pending_summary = ""
 
-            logger.info(
-                f"✅ Compaction applied, history now {len(self.message_history)} messages"
-            )
-
-        except Exception as e:
-            logger.error(f"Error applying compaction: {str(e)}", exc_info=True)
-            self.compaction_state = "idle"
+        logger.info(
+            f"✅ Compaction applied, history now {len(self.message_history)} messages "
+            f"({self.history_tokens} tokens) + summary of {self.summarized_messages}"
+        )
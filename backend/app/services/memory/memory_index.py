@@ -0,0 +1,260 @@
+"""
+Relevance-ranked memory notes for the coach prompt
+
+ai_memory only grows, so instead of injecting every note into every prompt
+the coach selects, per message:
+
+- a small pinned set (most recent injury / goal notes - safety and intent
+  must never depend on wording), then
+- the top-k notes most relevant to the message (BM25 over note text and
+  category), then
+- if the message matches nothing, the most recent notes
+
+under a token cap. MemoryNoteIndex is built once per user and extended
+incrementally when notes are appended (session notes); a rewrite of the
+memory (extraction merge) rebuilds it. Selection is a walk over the
+postings of the message's terms - microseconds for hundreds of notes.
+
+COACH_MEMORY_TOKEN_CAP and COACH_MEMORY_TOP_K tune the selection.
+"""
+
+import logging
+import math
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.cache.async_cache import AsyncCache
+from app.services.context.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_TOKEN_CAP = 400
+DEFAULT_TOP_K = 8
+MAX_PINNED = 4
+PINNED_CATEGORIES = ("injury", "goal")
+RECENT_DAYS = 14
+MAX_CACHED_USERS = 1000
+INDEX_TTL_SECONDS = 24 * 3600
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_STOPWORDS = frozenset(
+    """a an and are as at be but by can do does for from has have how i if in is it
+    its me my of on or so that the their them they this to was what when which who
+    will with you your should would could about just any all im ive""".split()
+)
+_SUFFIXES = ("ing", "edly", "ed", "es", "s")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        _stem(word)
+        for word in re.findall(r"[a-z0-9]+", text.lower())
+        if word not in _STOPWORDS and len(word) > 1
+    ]
+
+
+def _as_note(note: Any) -> Dict[str, Any]:
+    # Legacy memory may hold bare strings
+    return note if isinstance(note, dict) else {"text": str(note)}
+
+
+def _note_key(note: Dict[str, Any]) -> Tuple[str, str]:
+    return (note.get("text", ""), note.get("date", ""))
+
+
+def memory_token_cap() -> int:
+    return int(os.environ.get("COACH_MEMORY_TOKEN_CAP", DEFAULT_MEMORY_TOKEN_CAP))
+
+
+def memory_top_k() -> int:
+    return int(os.environ.get("COACH_MEMORY_TOP_K", DEFAULT_TOP_K))
+
+
+class MemoryNoteIndex:
+    """BM25 index over one user's memory notes (append-only)."""
+
+    def __init__(self, notes: Optional[List[Any]] = None):
+        self.notes: List[Dict[str, Any]] = []
+        self.keys: List[Tuple[str, str]] = []
+        self.tokens: List[int] = []  # Rendered-line token estimate per note
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(note, tf)]
+        self.total_length = 0
+        self.add(notes or [])
+
+    def add(self, notes: List[Any]) -> None:
+        """Index appended notes."""
+        for note in notes:
+            note = _as_note(note)
+            doc = len(self.notes)
+            terms = tokenize(f"{note.get('text', '')} {note.get('category', '')}")
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc, tf))
+
+            self.notes.append(note)
+            self.keys.append(_note_key(note))
+            self.tokens.append(count_tokens(_note_line(note)))
+            self.doc_lengths.append(len(terms))
+            self.total_length += len(terms)
+
+    def matches_prefix(self, notes: List[Any]) -> bool:
+        """Whether notes starts with exactly the indexed notes (pure append)."""
+        if len(notes) < len(self.keys):
+            return False
+        return all(
+            _note_key(_as_note(note)) == key for note, key in zip(notes, self.keys)
+        )
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score per note matching any query term."""
+        n = len(self.notes)
+        if not n:
+            return {}
+        avg_length = self.total_length / n or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = K1 * (1 - B + B * self.doc_lengths[doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def select(
+        self,
+        query: str,
+        token_cap: Optional[int] = None,
+        top_k: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Indices of the notes to show for a message, in original order:
+        pinned first, then relevant, then recent fill - within token_cap.
+        """
+        token_cap = memory_token_cap() if token_cap is None else token_cap
+        top_k = memory_top_k() if top_k is None else top_k
+
+        pinned = [
+            i
+            for i in range(len(self.notes) - 1, -1, -1)
+            if self.notes[i].get("category") in PINNED_CATEGORIES
+        ][:MAX_PINNED]
+
+        scores = self.scores(query)
+        relevant = sorted(scores, key=lambda i: (-scores[i], -i))[:top_k]
+        # Nothing relevant (e.g. a greeting): most recent notes instead
+        fallback = range(len(self.notes) - 1, -1, -1) if not relevant else ()
+
+        chosen: List[int] = []
+        seen = set()
+        used = 0
+        limit = len(pinned) + max(top_k, 0)
+        for i in [*pinned, *relevant, *fallback]:
+            if len(chosen) >= limit:
+                break
+            if i in seen or used + self.tokens[i] > token_cap:
+                continue
+            seen.add(i)
+            chosen.append(i)
+            used += self.tokens[i]
+        return sorted(chosen)
+
+
+def _note_line(note: Dict[str, Any]) -> str:
+    return f"- {note.get('text', '')} (noted: {note.get('date', '')})"
+
+
+def _is_recent(note: Dict[str, Any], now: datetime) -> bool:
+    note_date_str = note.get("date", "")
+    if not note_date_str:
+        return False
+    try:
+        # ISO format (YYYY-MM-DD); unparseable dates count as outdated
+        note_date = datetime.strptime(note_date_str.split("T")[0], "%Y-%m-%d")
+    except (ValueError, IndexError):
+        return False
+    return now - note_date < timedelta(days=RECENT_DAYS)
+
+
+def format_memory_notes(notes: List[Any], omitted: int = 0) -> str:
+    """Format memory notes grouped by freshness and category."""
+    if not notes:
+        return "No memory available"
+
+    now = datetime.now()
+    recent_notes, outdated_notes = [], []
+    for note in map(_as_note, notes):
+        (recent_notes if _is_recent(note, now) else outdated_notes).append(note)
+
+    def format_note_group(group: List[Dict], title: str) -> List[str]:
+        lines = [f"\n### {title}:"]
+        categorized: Dict[str, List[Dict]] = {}
+        for note in group:
+            categorized.setdefault(note.get("category", "general"), []).append(note)
+        for category, cat_notes in categorized.items():
+            lines.append(f"**{category.title()}:**")
+            lines.extend(_note_line(note) for note in cat_notes)
+        return lines
+
+    memory_lines = []
+    if recent_notes:
+        memory_lines.extend(format_note_group(recent_notes, "RECENT MEMORY (Last 14 Days)"))
+    if outdated_notes:
+        memory_lines.extend(
+            format_note_group(outdated_notes, "POTENTIALLY OUTDATED MEMORY (> 14 Days)")
+        )
+    if omitted:
+        memory_lines.append(f"\n({omitted} other notes not shown - not relevant to this message)")
+    return "\n".join(memory_lines).strip()
+
+
+class MemoryIndexCache:
+    """
+    Per-user MemoryNoteIndex (AsyncCache LRU), extended in place when notes
+    are appended.
+    """
+
+    def __init__(self, max_users: int = MAX_CACHED_USERS):
+        # Checked against the notes on every use, so the TTL only ages out
+        # users who stopped chatting
+        self._cache: AsyncCache[str, MemoryNoteIndex] = AsyncCache(
+            "memory_index", max_entries=max_users, ttl_seconds=INDEX_TTL_SECONDS
+        )
+        self.stats = {"appends": 0, "rebuilds": 0}
+
+    def get_index(self, user_id: str, notes: List[Any]) -> MemoryNoteIndex:
+        index = self._cache.lookup(user_id)
+        if index is not None and index.matches_prefix(notes):
+            if len(notes) > len(index.notes):
+                index.add(notes[len(index.notes):])
+                self.stats["appends"] += 1
+        else:
+            index = MemoryNoteIndex(notes)
+            self.stats["rebuilds"] += 1
+            logger.info(f"🧠 Memory index built for {user_id}: {len(index.notes)} notes")
+
+        self._cache.set(user_id, index)
+        return index
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._cache.get_stats(), **self.stats}
+
+
+# Singleton instance for easy import
+memory_index_cache = MemoryIndexCache()
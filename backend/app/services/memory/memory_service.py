@@ -4,8 +4,9 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from app.services.llm.base import BaseLLMService, is_rate_limit_error
+from app.core.utils.log_writer import get_log_writer
 
 from app.services.db.message_service import MessageService
 from app.services.db.user_profile_service import UserProfileService
@@ -41,7 +42,8 @@ MEMORY_REASONING_LOG = os.path.join(
     "logs",
     "memory_reasoning.log",
 )
-os.makedirs(os.path.dirname(MEMORY_REASONING_LOG), exist_ok=True)
+# Written by a background thread - never blocks extraction
+memory_reasoning_log = get_log_writer("memory", MEMORY_REASONING_LOG)
 
 
 class MemoryExtractionService(BaseLLMService):
@@ -248,7 +250,7 @@ class MemoryExtractionService(BaseLLMService):
                 return
 
             # Log reasoning to file
-            with open(MEMORY_REASONING_LOG, "a") as f:
+            with memory_reasoning_log.entry() as f:
                 f.write(
                     f"\n[{datetime.now().isoformat()}] FULL EXTRACTION: User {user_id}, Conv {conversation_id}\n"
                 )
@@ -334,7 +336,7 @@ OUTPUT FORMAT:
             )
 
             # Log reasoning to file
-            with open(MEMORY_REASONING_LOG, "a") as f:
+            with memory_reasoning_log.entry() as f:
                 f.write(
                     f"\n[{datetime.now().isoformat()}] SESSION COMPACTION: User {user_id}, Bundle {bundle_id}\n"
                 )
@@ -377,3 +379,68 @@ OUTPUT FORMAT:
         except Exception as e:
             logger.error(f"Error in session memory extraction: {str(e)}", exc_info=True)
             return False
+
+    async def summarize_conversation_slice(
+        self, previous_summary: str, messages: list[dict], max_words: int = 250
+    ) -> Optional[str]:
+        """
+        Fold the oldest un-summarized messages into a running conversation summary.
+
+        Used by rolling compaction: only the new slice is sent, together with
+        the previous summary, so the cost of each call is bounded by the slice
+        size rather than the length of the conversation.
+
+        Args:
+            previous_summary: Current running summary ("" if none yet)
+            messages: Slice of message dicts with 'role' and 'content'
+            max_words: Target length of the merged summary
+
+        Returns:
+            The merged summary, or None if summarization failed
+        """
+        try:
+            conversation_text = "\n".join(
+                [f"{msg['role']}: {msg['content']}" for msg in messages]
+            )
+
+            summary_prompt = ChatPromptTemplate.from_template(
+                """
+You maintain a running summary of an ongoing conversation between a fitness coach and a user.
+
+SUMMARY SO FAR:
+{previous_summary}
+
+NEW MESSAGES (oldest first):
+{conversation}
+
+RULES:
+- Merge the new messages into the summary; return the full updated summary
+- Keep decisions, plans, workouts prescribed (exercises, sets, reps, weights), questions still open and anything the user corrected
+- Drop greetings, small talk and detail superseded by later messages
+- Write in third person ("The user...", "The coach..."), plain text, no headings
+- At most {max_words} words
+"""
+            )
+
+            chain = summary_prompt | self.llm | StrOutputParser()
+            summary = await self._call_with_retry(
+                chain.ainvoke,
+                {
+                    "previous_summary": previous_summary or "(none yet)",
+                    "conversation": conversation_text,
+                    "max_words": max_words,
+                },
+            )
+
+            with memory_reasoning_log.entry() as f:
+                f.write(
+                    f"\n[{datetime.now().isoformat()}] ROLLING SUMMARY: {len(messages)} messages folded\n"
+                )
+                f.write(f"SUMMARY: {summary}\n")
+                f.write(f"{'='*40}\n")
+
+            return summary.strip() or None
+
+        except Exception as e:
+            logger.error(f"Error summarizing conversation slice: {str(e)}", exc_info=True)
+            return None
@@ -0,0 +1,195 @@
+"""
+Awaitable analysis bundle completion
+
+A workout write triggers bundle regeneration in the background, and a coach
+session opened right after it must not read the old (or half-built) bundle.
+Instead of polling the database, consumers wait on this registry:
+
+    if bundle_registry.is_pending(user_id):
+        await bundle_registry.wait_for(user_id, timeout=10)
+
+- every generation gets a per-user version (BundleRequested); it settles
+  with BundleReady (bundle saved) or BundleFailed - see app.core.events
+- wait_for(user_id, version) resolves once that version (default: the
+  latest requested) has settled, or returns False at the timeout
+- the registry is driven only by events, so with a shared event backend a
+  session in one worker waits on a generation running in another
+- a generation that never settles (worker died) stops counting as pending
+  after PENDING_MAX_AGE_SECONDS; settled users nobody waits on are
+  forgotten once their last settle is that old
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.events import BundleFailed, BundleReady, BundleRequested, event_bus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 10.0
+PENDING_MAX_AGE_SECONDS = 120.0
+WAIT_SAMPLES = 256  # recent waits kept for latency stats
+
+
+class _UserBundles:
+    __slots__ = (
+        "requested",
+        "settled",
+        "bundle_id",
+        "requested_at",
+        "updated_at",
+        "waiters",
+    )
+
+    def __init__(self):
+        self.requested = 0  # latest version started
+        self.settled = 0  # latest version finished (ready or failed)
+        self.bundle_id: Optional[str] = None  # latest ready bundle
+        self.requested_at = 0.0
+        self.updated_at = time.monotonic()  # last request or settle
+        self.waiters: List[Tuple[int, asyncio.Future]] = []
+
+    def is_idle(self, now: float) -> bool:
+        """Settled, not waited on, and untouched for PENDING_MAX_AGE_SECONDS."""
+        return (
+            self.requested <= self.settled
+            and not self.waiters
+            and now - self.updated_at >= PENDING_MAX_AGE_SECONDS
+        )
+
+
+class BundleRegistry:
+    """Per-user bundle generation versions with awaitable completion."""
+
+    def __init__(self):
+        self._users: Dict[str, _UserBundles] = {}
+        self._wait_ms: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.stats = {"requested": 0, "ready": 0, "failed": 0, "waits": 0, "timeouts": 0}
+
+    async def begin(self, user_id: str) -> int:
+        """Announce a new generation for the user. Returns its version."""
+        user = self._users.get(user_id)
+        version = max(user.requested, user.settled) + 1 if user else 1
+        await event_bus.publish(BundleRequested(user_id=user_id, version=version))
+        return version
+
+    def is_pending(self, user_id: str) -> bool:
+        """True while a generation for the user is running."""
+        user = self._users.get(user_id)
+        return (
+            user is not None
+            and user.requested > user.settled
+            and time.monotonic() - user.requested_at < PENDING_MAX_AGE_SECONDS
+        )
+
+    def latest_bundle_id(self, user_id: str) -> Optional[str]:
+        user = self._users.get(user_id)
+        return user.bundle_id if user else None
+
+    async def wait_for(
+        self,
+        user_id: str,
+        version: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> bool:
+        """
+        Wait until bundle generation `version` (default: the latest
+        requested) has settled. Returns False if it did not within timeout.
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            return True
+        if version is None:
+            version = user.requested
+        if user.settled >= version:
+            return True
+
+        self.stats["waits"] += 1
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        user.waiters.append((version, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(
+                f"⏱️ Bundle v{version} for user {user_id} not ready after {timeout:g}s"
+            )
+            return False
+        finally:
+            self._wait_ms.append((time.perf_counter() - start) * 1000)
+            if (version, future) in user.waiters:
+                user.waiters.remove((version, future))
+
+    def prune(self) -> int:
+        """Forget idle users. Returns the number removed."""
+        now = time.monotonic()
+        idle = [user_id for user_id, user in self._users.items() if user.is_idle(now)]
+        for user_id in idle:
+            del self._users[user_id]
+        return len(idle)
+
+    def get_stats(self) -> Dict[str, Any]:
+        self.prune()
+        samples = sorted(self._wait_ms)
+        return {
+            "tracked_users": len(self._users),
+            "pending_users": sum(1 for user_id in self._users if self.is_pending(user_id)),
+            "waiters": sum(len(user.waiters) for user in self._users.values()),
+            **self.stats,
+            "wait_ms_avg": round(sum(samples) / len(samples), 1) if samples else None,
+            "wait_ms_max": round(samples[-1], 1) if samples else None,
+        }
+
+    # =========================
+    # EVENT HANDLERS
+    # =========================
+
+    def on_requested(self, event: BundleRequested) -> None:
+        user = self._users.setdefault(event.user_id, _UserBundles())
+        user.requested = max(user.requested, event.version)
+        user.requested_at = user.updated_at = time.monotonic()
+        self.stats["requested"] += 1
+        logger.info(f"⏳ Bundle v{event.version} requested for user {event.user_id}")
+
+    def on_ready(self, event: BundleReady) -> None:
+        user = self._users.setdefault(event.user_id, _UserBundles())
+        user.bundle_id = event.bundle_id
+        self.stats["ready"] += 1
+        self._settle(event.user_id, user, event.version)
+
+    def on_failed(self, event: BundleFailed) -> None:
+        user = self._users.setdefault(event.user_id, _UserBundles())
+        self.stats["failed"] += 1
+        self._settle(event.user_id, user, event.version)
+
+    def _settle(self, user_id: str, user: _UserBundles, version: int) -> None:
+        # Unversioned completions settle everything requested so far
+        user.settled = max(user.settled, version or user.requested)
+        user.updated_at = time.monotonic()
+        waiting = []
+        for wanted, future in user.waiters:
+            if wanted <= user.settled:
+                if not future.done():
+                    future.set_result(None)
+            else:
+                waiting.append((wanted, future))
+        if len(waiting) != len(user.waiters):
+            logger.info(
+                f"🔔 Bundle v{user.settled} settled for user {user_id}, "
+                f"woke {len(user.waiters) - len(waiting)} waiters"
+            )
+        user.waiters = waiting
+        self.prune()
+
+
+# Singleton instance for easy import
+bundle_registry = BundleRegistry()
+
+event_bus.subscribe(BundleRequested, bundle_registry.on_requested)
+event_bus.subscribe(BundleReady, bundle_registry.on_ready)
+event_bus.subscribe(BundleFailed, bundle_registry.on_failed)
@@ -0,0 +1,89 @@
+from typing import Callable, List, Sequence, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Points kept per series in a bundle (prompt, chart and dashboard consumers)
+DEFAULT_SERIES_POINTS = 30
+
+
+class SeriesDownsampler:
+    """
+    Shape-preserving downsampling of time series (Largest-Triangle-Three-Buckets).
+
+    LTTB keeps the first and last point and, for each bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    next bucket's average - so peaks, drops and plateaus survive while the
+    series shrinks to a fixed size. The series maximum (the PR) is always kept:
+    if LTTB picked another point in its bucket, the PR replaces it.
+    """
+
+    @staticmethod
+    def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+        """Indices of the points to keep, in order (all of them if already small)."""
+        n = len(xs)
+        if threshold >= n:
+            return list(range(n))
+        if threshold < 3:
+            return [0, n - 1][: max(threshold, 0)]
+
+        selected = [0]
+        bucket_size = (n - 2) / (threshold - 2)
+        a = 0
+        for i in range(threshold - 2):
+            start = int(i * bucket_size) + 1
+            end = int((i + 1) * bucket_size) + 1
+
+            # Average of the next bucket (the last point for the final bucket)
+            next_start = end
+            next_end = min(int((i + 2) * bucket_size) + 1, n)
+            if next_start >= next_end:
+                avg_x, avg_y = xs[n - 1], ys[n - 1]
+            else:
+                count = next_end - next_start
+                avg_x = sum(xs[next_start:next_end]) / count
+                avg_y = sum(ys[next_start:next_end]) / count
+
+            ax, ay = xs[a], ys[a]
+            best, best_area = start, -1.0
+            for j in range(start, end):
+                area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+                if area > best_area:
+                    best, best_area = j, area
+            selected.append(best)
+            a = best
+        selected.append(n - 1)
+
+        # Never hide the PR
+        peak = max(range(n), key=lambda k: ys[k])
+        if peak not in selected:
+            for i in range(threshold - 2):
+                if int(i * bucket_size) + 1 <= peak < int((i + 1) * bucket_size) + 1:
+                    selected[i + 1] = peak
+                    break
+        return selected
+
+    @staticmethod
+    def downsample(
+        points: Sequence[T],
+        threshold: int,
+        x: Callable[[T], float],
+        y: Callable[[T], float],
+    ) -> List[T]:
+        """
+        Reduce points (sorted by x) to at most threshold points.
+
+        Args:
+            points: Chronologically sorted series items
+            threshold: Maximum points to keep
+            x: Numeric x of an item (e.g. timestamp or date ordinal)
+            y: Value of an item
+        """
+        if len(points) <= threshold:
+            return list(points)
+        indices = SeriesDownsampler.lttb_indices(
+            [x(p) for p in points], [y(p) for p in points], threshold
+        )
+        return [points[i] for i in indices]
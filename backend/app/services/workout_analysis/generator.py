@@ -6,11 +6,16 @@ Bundles are regenerated after each workout creation/deletion to ensure data fres
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+from app.core.events import BundleFailed, BundleReady, event_bus
+from app.services.context.context_formatter import build_context_snapshot
 from app.services.db.workout_service import WorkoutService
 from app.services.db.context_service import ContextBundleService
+from app.services.db.user_profile_service import UserProfileService
+from app.services.workout_analysis.bundle_registry import bundle_registry
 from app.services.workout_analysis.processor import AnalysisBundleProcessor
+from app.services.workout_analysis.schemas import UserContextBundle
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +38,51 @@ class AnalysisBundleGenerator:
         self.workout_service = WorkoutService()
         self.analysis_service = ContextBundleService()
         self.processor = AnalysisBundleProcessor()
+        self.profile_service = UserProfileService()
 
     async def generate_analysis_bundle(
         self, user_id: str, jwt_token: str
     ) -> Dict[str, Any]:
         """
         Generate a complete analysis bundle for a user.
+
+        Announces the generation (BundleRequested) and its outcome
+        (BundleReady / BundleFailed), so sessions opened meanwhile can await
+        the new bundle through bundle_registry instead of polling.
+
+        Args:
+            user_id: User's ID
+            jwt_token: JWT for authentication
+
+        Returns:
+            {'success': bool, 'bundle_id': str, 'error': str}
+        """
+        version = await bundle_registry.begin(user_id)
+        result = {"success": False, "error": "Bundle generation interrupted"}
+        try:
+            result = await self._generate_analysis_bundle(user_id, jwt_token)
+            return result
+        finally:
+            if result.get("success"):
+                # Shared context, history index and answer caches invalidate
+                # themselves; waiting sessions resume
+                await event_bus.publish(
+                    BundleReady(
+                        user_id=user_id, bundle_id=result["bundle_id"], version=version
+                    )
+                )
+            else:
+                await event_bus.publish(
+                    BundleFailed(
+                        user_id=user_id, version=version, bundle_id=result.get("bundle_id")
+                    )
+                )
+
+    async def _generate_analysis_bundle(
+        self, user_id: str, jwt_token: str
+    ) -> Dict[str, Any]:
+        """
+        Generate and save the bundle (see generate_analysis_bundle).
         
         Flow:
         1. Create empty bundle (status='pending')
@@ -46,15 +90,9 @@ class AnalysisBundleGenerator:
         3. Fetch last 30 days of workouts
         4. Fetch exercise definitions from cache
         5. Process data through AnalysisBundleProcessor
+        5b. Render the coach context snapshot (once per generation)
         6. Save complete bundle (status='complete')
         7. Cleanup old bundles
-        
-        Args:
-            user_id: User's ID
-            jwt_token: JWT for authentication
-        
-        Returns:
-            {'success': bool, 'bundle_id': str, 'error': str}
         """
         bundle_id = None
         
@@ -170,6 +208,12 @@ class AnalysisBundleGenerator:
                 f"✅ Processing complete. Bundle status: {complete_bundle.status}"
             )
 
+            # 5b. Render prompt-ready coach context so sessions don't re-format the bundle
+            if complete_bundle.status == "complete":
+                complete_bundle.metadata.context_snapshot = (
+                    await self._build_context_snapshot(user_id, complete_bundle)
+                )
+
             # 6. Save complete bundle
             logger.info(f"💾 Saving complete bundle: {bundle_id}")
             save_result = await self.analysis_service.save_context_bundle(
@@ -198,11 +242,6 @@ class AnalysisBundleGenerator:
             deleted_count = cleanup_result.get("data", {}).get("deleted_count", 0)
             logger.info(f"🧹 Deleted {deleted_count} old bundles")
 
-            # 8. Invalidate SharedContextLoader cache to ensure fresh data in next chat
-            from app.services.context.shared_context_loader import SharedContextLoader
-
-            SharedContextLoader.invalidate_bundle_cache(user_id)
-
             # Success!
             logger.info(f"🎉 Analysis bundle generation complete for user {user_id}")
             return {
@@ -230,6 +269,30 @@ class AnalysisBundleGenerator:
 
             return {"success": False, "error": str(e), "bundle_id": bundle_id}
 
+    async def _build_context_snapshot(
+        self, user_id: str, bundle: UserContextBundle
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Render the coach context snapshot in the user's preferred units.
+
+        Failure is not fatal - coach sessions build the snapshot themselves
+        when the bundle has none.
+        """
+        try:
+            profile_result = await self.profile_service.get_user_profile_admin(user_id)
+            profile = profile_result.get("data") if profile_result.get("success") else None
+            is_imperial = bool(profile and profile.get("is_imperial"))
+
+            snapshot = build_context_snapshot(bundle, is_imperial)
+            logger.info(
+                f"📸 Context snapshot rendered: {len(snapshot['workouts'])} workouts, "
+                f"{len(snapshot['strength'])} exercises, {snapshot['tokens']} tokens"
+            )
+            return snapshot
+        except Exception as e:
+            logger.error(f"❌ Failed to render context snapshot: {str(e)}", exc_info=True)
+            return None
+
     def _format_workout_data(self, workouts: list) -> Dict[str, Any]:
         """
         Prepare workout data for the processor.
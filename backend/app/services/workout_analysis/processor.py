@@ -20,6 +20,7 @@ from .schemas import (
     MuscleGroupBalance,
     MuscleGroupDistribution,
 )
+from .calc.downsample import DEFAULT_SERIES_POINTS, SeriesDownsampler
 
 logger = logging.getLogger(__name__)
 
@@ -363,11 +364,22 @@ class AnalysisBundleProcessor:
                     )
                     for date, volume in date_volumes.items()
                 ]
-                # Sort chronologically
+                # Sort chronologically, then cap the size (keeps shape and peaks)
                 time_series.sort(key=lambda x: x.date)
+                total_points = len(time_series)
+                time_series = SeriesDownsampler.downsample(
+                    time_series,
+                    DEFAULT_SERIES_POINTS,
+                    x=lambda p: p.date.timestamp(),
+                    y=lambda p: p.volume_kg,
+                )
 
                 volume_by_exercise_over_time.append(
-                    ExerciseVolumeData(exercise=exercise_name, time_series=time_series)
+                    ExerciseVolumeData(
+                        exercise=exercise_name,
+                        time_series=time_series,
+                        total_points=total_points,
+                    )
                 )
 
             # Sort by exercise name for consistency
@@ -443,12 +455,21 @@ class AnalysisBundleProcessor:
                     )
                     for date, e1rm in date_e1rms.items()
                 ]
-                # Sort chronologically
+                # Sort chronologically, then cap the size (keeps shape and the PR)
                 time_series.sort(key=lambda x: x.date)
+                total_points = len(time_series)
+                time_series = SeriesDownsampler.downsample(
+                    time_series,
+                    DEFAULT_SERIES_POINTS,
+                    x=lambda p: p.date.timestamp(),
+                    y=lambda p: p.estimated_1rm,
+                )
 
                 exercise_strength_progress.append(
                     ExerciseStrengthProgress(
-                        exercise=exercise_name, e1rm_time_series=time_series
+                        exercise=exercise_name,
+                        e1rm_time_series=time_series,
+                        total_points=total_points,
                     )
                 )
 
@@ -34,6 +34,10 @@ class BundleMetadata(BaseModel):
         default_factory=list,
         description="Any errors encountered during bundle generation",
     )
+    context_snapshot: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Prompt-ready coach context rendered at generation time (see context_formatter)",
+    )
 
 
 # ==================== GENERAL WORKOUT DATA ====================
@@ -149,7 +153,11 @@ class ExerciseVolumeData(BaseModel):
     exercise: str = Field(..., description="Exercise name")
     time_series: List[ExerciseVolumeTimeSeries] = Field(
         default_factory=list,
-        description="Volume over time for this exercise, ordered chronologically",
+        description="Volume over time for this exercise, ordered chronologically "
+        "(shape-preserving downsample, see calc/downsample.py)",
+    )
+    total_points: Optional[int] = Field(
+        None, description="Number of sessions before downsampling"
     )
 
 
@@ -187,13 +195,18 @@ class ExerciseStrengthProgress(BaseModel):
     """
     Strength progression time series for a single exercise.
 
-    Contains full historical e1RM data for tracking strength progression over time.
+    Contains e1RM data for tracking strength progression over time, downsampled
+    to a fixed size with first, last and best sessions always kept.
     """
 
     exercise: str = Field(..., description="Exercise name")
     e1rm_time_series: List[E1RMTimeSeries] = Field(
         default_factory=list,
-        description="All e1RM performances for this exercise over time, ordered chronologically",
+        description="e1RM performances for this exercise over time, ordered chronologically "
+        "(shape-preserving downsample, see calc/downsample.py)",
+    )
+    total_points: Optional[int] = Field(
+        None, description="Number of sessions before downsampling"
     )
 
 
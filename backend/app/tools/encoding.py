@@ -0,0 +1,309 @@
+"""
+Compact encoding for tool results fed back to the coach model
+
+Exercise tools return lists of flat dicts with the same keys on every row and
+a small vocabulary of muscles/equipment/patterns repeated across rows. Sent as
+JSON, most of the ToolMessage is keys and repeated values, and it is re-sent
+on every remaining tool iteration.
+
+The compact format is a pipe-separated table: one header row, one row per
+item, and a legend that replaces repeated categorical values with short refs:
+
+    get_strength_exercises: 24 rows
+    legend: M1=chest M2=triceps | E1=barbell E2=dumbbell | P1=push
+    id|standard_name|primary_muscles|equipment|movement_pattern
+    3f2a...|Barbell Bench Press|M1+M2|E1|P1
+
+IDs and exercise names are always written verbatim so the model can copy
+them into workout templates. Each tool has an output token cap; rows past the
+cap are dropped with an "N more omitted" note, or - for paged results - the
+continuation cursor resumes at the first dropped row.
+
+Set COACH_TOOL_RESULT_FORMAT=json to fall back to plain JSON.
+"""
+
+import base64
+import json
+import logging
+import os
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from app.services.context.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOOL_OUTPUT_TOKEN_CAP = 1500
+
+# Columns per tool, in output order. Columns absent from every row are skipped.
+TOOL_COLUMNS: Dict[str, List[str]] = {
+    "get_strength_exercises": [
+        "id",
+        "standard_name",
+        "primary_muscles",
+        "secondary_muscles",
+        "equipment",
+        "movement_pattern",
+        "base_movement",
+        "last_tracked",
+    ],
+    "get_cardio_exercises": [
+        "id",
+        "standard_name",
+        "equipment",
+        "base_movement",
+        "major_variation",
+    ],
+    "get_mobility_exercises": [
+        "id",
+        "standard_name",
+        "primary_muscles",
+        "equipment",
+        "base_movement",
+    ],
+    "search_exercises": [
+        "id",
+        "standard_name",
+        "primary_muscles",
+        "secondary_muscles",
+        "equipment",
+        "movement_pattern",
+        "base_movement",
+        "major_variation",
+        "last_tracked",
+    ],
+}
+
+# Categorical columns encoded through the legend; columns sharing a prefix
+# share a vocabulary (primary and secondary muscles use the same refs)
+REF_COLUMNS: Dict[str, str] = {
+    "primary_muscles": "M",
+    "secondary_muscles": "M",
+    "equipment": "E",
+    "movement_pattern": "P",
+    "base_movement": "B",
+}
+
+TOOL_OUTPUT_TOKEN_CAPS: Dict[str, int] = {}
+
+
+def compact_encoding_enabled() -> bool:
+    return os.environ.get("COACH_TOOL_RESULT_FORMAT", "compact").lower() != "json"
+
+
+def tool_token_cap(tool_name: str) -> int:
+    """Output token cap for a tool (COACH_TOOL_OUTPUT_TOKEN_CAP sets the default)."""
+    if tool_name in TOOL_OUTPUT_TOKEN_CAPS:
+        return TOOL_OUTPUT_TOKEN_CAPS[tool_name]
+    return int(os.environ.get("COACH_TOOL_OUTPUT_TOKEN_CAP", DEFAULT_TOOL_OUTPUT_TOKEN_CAP))
+
+
+def encode_cursor(offset: int, query_hash: str) -> str:
+    raw = json.dumps({"o": offset, "q": query_hash}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_payload(cursor: str) -> Dict[str, Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(data, dict):
+        raise ValueError("cursor payload is not an object")
+    return data
+
+
+def decode_cursor(cursor: Optional[str], query_hash: str) -> int:
+    """Offset encoded in a cursor; 0 if missing, malformed or from another query."""
+    if not cursor:
+        return 0
+    try:
+        data = _cursor_payload(cursor)
+        if data.get("q") != query_hash:
+            logger.warning("  └─ Cursor belongs to a different query, starting from top")
+            return 0
+        return max(0, int(data.get("o", 0)))
+    except (ValueError, TypeError):
+        logger.warning(f"  └─ Invalid cursor {cursor!r}, starting from top")
+        return 0
+
+
+def advance_cursor(cursor: str, rows: int) -> str:
+    """Cursor for the same query, `rows` further down the ranking."""
+    data = _cursor_payload(cursor)
+    return encode_cursor(int(data.get("o", 0)) + rows, data.get("q", ""))
+
+
+def _clean(value: Any) -> str:
+    """Render a scalar cell, keeping the table delimiters out of values."""
+    if value is None:
+        return ""
+    return str(value).replace("|", "/").replace("\n", " ").replace("+", "&")
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _format_last_tracked(value: Any) -> str:
+    if not isinstance(value, dict):
+        return _clean(value)
+    return f"{value.get('reps')}x{value.get('weight')}@{value.get('date')}"
+
+
+def encode_table(
+    title: str,
+    rows: List[Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    total: Optional[int] = None,
+    footer: Optional[str] = None,
+) -> str:
+    """
+    Encode rows as a legend + header + pipe-separated value rows.
+
+    Args:
+        title: Label for the first line (usually the tool name)
+        rows: Flat dicts
+        columns: Column order (defaults to keys of the first row)
+        total: Total matches if rows is a truncated page
+        footer: Extra trailing line (e.g. continuation hint)
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+    columns = [c for c in columns if any(row.get(c) not in (None, [], "") for row in rows)]
+
+    # Values repeated across rows get a legend ref; singletons stay inline
+    counts: Dict[str, Counter] = {}
+    for col in columns:
+        prefix = REF_COLUMNS.get(col)
+        if prefix:
+            counter = counts.setdefault(prefix, Counter())
+            for row in rows:
+                counter.update(_clean(v) for v in _as_list(row.get(col)))
+
+    refs: Dict[str, Dict[str, str]] = {}
+    for prefix, counter in counts.items():
+        vocab = [value for value, n in counter.most_common() if n > 1 and value]
+        refs[prefix] = {value: f"{prefix}{i}" for i, value in enumerate(vocab, 1)}
+
+    def cell(col: str, value: Any) -> str:
+        if col == "last_tracked":
+            return _format_last_tracked(value)
+        prefix = REF_COLUMNS.get(col)
+        if prefix:
+            vocab = refs[prefix]
+            return "+".join(vocab.get(_clean(v), _clean(v)) for v in _as_list(value))
+        return _clean(value)
+
+    shown = len(rows)
+    total = shown if total is None else total
+    header = f"{title}: {total} rows" if total == shown else f"{title}: {total} rows (showing {shown})"
+
+    lines = [header]
+    legend = [
+        " ".join(f"{ref}={value}" for value, ref in vocab.items())
+        for vocab in refs.values()
+        if vocab
+    ]
+    if legend:
+        lines.append("legend: " + " | ".join(legend))
+    lines.append("|".join(columns))
+    for row in rows:
+        lines.append("|".join(cell(col, row.get(col)) for col in columns))
+    if footer:
+        lines.append(footer)
+    return "\n".join(lines)
+
+
+def encode_capped(
+    title: str,
+    rows: List[Dict[str, Any]],
+    max_tokens: int,
+    columns: Optional[List[str]] = None,
+    total: Optional[int] = None,
+    footer: Union[str, Callable[[int], Optional[str]], None] = None,
+) -> str:
+    """
+    Encode the longest prefix of rows that fits max_tokens.
+
+    Rows are assumed to be in priority order; dropped rows are summarized in
+    an omitted note. A callable footer gets the number of rows shown and
+    replaces the note (paged results point their cursor at the first
+    dropped row instead).
+    """
+    total = len(rows) if total is None else total
+
+    def render(k: int) -> str:
+        if callable(footer):
+            return encode_table(title, rows[:k], columns, total=total, footer=footer(k))
+        omitted = total - k
+        note = footer
+        if omitted > 0 and k < len(rows):
+            note = f"... {omitted} more omitted (output cap) - narrow the query for others"
+            if footer:
+                note = f"{note}\n{footer}"
+        return encode_table(title, rows[:k], columns, total=total, footer=note)
+
+    text = render(len(rows))
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Binary search the largest row count that fits
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(render(mid)) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return render(lo)
+
+
+def encode_tool_result(tool_name: str, result: Any) -> str:
+    """
+    Serialize a tool result for a ToolMessage.
+
+    Lists of dicts (or paged {"results", "total", "cursor", "next_cursor"}
+    dicts) use the compact capped table; anything else is JSON.
+    """
+    if isinstance(result, str):
+        return result
+
+    if (
+        compact_encoding_enabled()
+        and isinstance(result, dict)
+        and isinstance(result.get("results"), list)
+    ):
+        rows = result["results"]
+
+        def continuation(shown: int) -> Optional[str]:
+            # Rows cut by the token cap come first on the next page
+            cursor = result.get("next_cursor")
+            if shown < len(rows) and result.get("cursor"):
+                cursor = advance_cursor(result["cursor"], shown)
+            return f'more: call {tool_name} again with cursor="{cursor}"' if cursor else None
+
+        return encode_capped(
+            tool_name,
+            rows,
+            tool_token_cap(tool_name),
+            columns=TOOL_COLUMNS.get(tool_name),
+            total=result.get("total", len(rows)),
+            footer=continuation,
+        )
+
+    if (
+        compact_encoding_enabled()
+        and isinstance(result, list)
+        and all(isinstance(row, dict) for row in result)
+    ):
+        if not result:
+            return f"{tool_name}: 0 rows"
+        return encode_capped(
+            tool_name,
+            result,
+            tool_token_cap(tool_name),
+            columns=TOOL_COLUMNS.get(tool_name),
+        )
+
+    return json.dumps(result)
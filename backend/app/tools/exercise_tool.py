@@ -1,19 +1,124 @@
 from langchain.tools import tool
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+import hashlib
+import heapq
+import json
 import logging
 
+from app.services.cache.exercise_index import (
+    ExerciseCatalogIndex,
+    IndexedExercise,
+    expand_muscles,
+    normalize,
+)
+from app.tools.encoding import decode_cursor, encode_cursor
+
 logger = logging.getLogger(__name__)
 
 
-# Muscle group expansion mapping
-MUSCLE_EXPANSIONS = {
-    "back": ["back", "lats", "traps", "upper_back", "lower_back", "erector_spinae"],
-    "legs": ["quadriceps", "hamstrings", "glutes", "calves", "quads", "hams", "abductors", "adductors"],
-    "core": ["abs", "obliques", "lower_back", "core", "rectus_abdominis"],
-    "arms": ["biceps", "triceps", "forearms", "brachialis"],
-    "shoulders": ["shoulders", "deltoids", "traps", "anterior_deltoid", "lateral_deltoid", "posterior_deltoid"],
-    "chest": ["chest", "pectorals", "pectoralis_major", "pectoralis_minor"]
-}
+# Page size bounds - keeps tool output size independent of catalog size
+DEFAULT_PAGE_SIZE = 15
+MAX_PAGE_SIZE = 30
+
+# Ranking weights
+EXACT_PRIMARY_WEIGHT = 3.0  # requested muscle is a primary mover
+EXPANDED_PRIMARY_WEIGHT = 2.0  # primary mover via MUSCLE_EXPANSIONS
+SECONDARY_WEIGHT = 0.5  # requested muscle only worked secondarily
+EQUIPMENT_FIT_WEIGHT = 1.5
+POPULARITY_WEIGHT = 2.0
+
+
+def _muscle_score(entry: IndexedExercise, requested: set, expanded: set) -> float:
+    """How strongly an exercise targets the requested muscles (0 = no primary match)."""
+    exact = len(entry.primary & requested)
+    via_expansion = len(entry.primary & expanded) - exact
+    if exact + via_expansion == 0:
+        return 0.0
+    secondary = len(entry.secondary & expanded)
+    return (
+        exact * EXACT_PRIMARY_WEIGHT
+        + via_expansion * EXPANDED_PRIMARY_WEIGHT
+        + secondary * SECONDARY_WEIGHT
+    )
+
+
+def _score_matches(
+    index: ExerciseCatalogIndex,
+    matches: FrozenSet[int],
+    requested: set,
+    expanded: set,
+    equipment: Optional[List[str]],
+    popularity: Dict[str, float],
+) -> List[Tuple[float, int]]:
+    """(score, position) for matched positions: muscle fit + equipment fit + popularity."""
+    preferred = index.equipment_matches(equipment)
+    scored = []
+    # Catalog order keeps ties (and so cursor pages) stable
+    for pos in sorted(matches):
+        entry = index.entries[pos]
+        score = _muscle_score(entry, requested, expanded) if expanded else 0.0
+        if pos in preferred:
+            score += EQUIPMENT_FIT_WEIGHT
+        score += POPULARITY_WEIGHT * popularity.get(entry.exercise.get("id"), 0.0)
+        scored.append((score, pos))
+    return scored
+
+
+def _query_hash(tool_name: str, **query: Any) -> str:
+    payload = json.dumps({"tool": tool_name, **query}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:10]
+
+
+def _ranked_page(
+    index: ExerciseCatalogIndex,
+    scored: List[Tuple[float, int]],
+    fields: Tuple[str, ...],
+    query_hash: str,
+    cursor: Optional[str],
+    limit: int,
+) -> Dict[str, Any]:
+    """
+    Select one page of the ranking.
+
+    Uses a bounded heap (O(n log k)) rather than sorting every match.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    offset = decode_cursor(cursor, query_hash)
+
+    entries = index.entries
+    top = heapq.nsmallest(
+        offset + limit,
+        scored,
+        key=lambda item: (-item[0], entries[item[1]].exercise.get("standard_name", "")),
+    )
+    page = top[offset : offset + limit]
+    next_offset = offset + len(page)
+
+    # Copies - results are annotated in place downstream (e.g. last_tracked)
+    rows = index.condensed(fields)
+    return {
+        "results": [dict(rows[pos]) for _, pos in page],
+        "total": len(scored),
+        # This page's position - the encoder resumes from it if the output
+        # cap drops rows
+        "cursor": encode_cursor(offset, query_hash),
+        "next_cursor": (
+            encode_cursor(next_offset, query_hash) if next_offset < len(scored) else None
+        ),
+    }
+
+
+STRENGTH_FIELDS = (
+    "id",
+    "standard_name",
+    "primary_muscles",
+    "secondary_muscles",
+    "equipment",
+    "movement_pattern",
+    "base_movement",
+)
+CARDIO_FIELDS = STRENGTH_FIELDS + ("major_variation",)
+MOBILITY_FIELDS = STRENGTH_FIELDS
 
 
 @tool
@@ -21,12 +126,15 @@ async def get_strength_exercises(
     muscle_groups: List[str],
     equipment: Optional[List[str]] = None,
     experience_level: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Fetch resistance training and muscle-building exercises (e.g. weightlifting, calisthenics, powerlifting).
 
     Use this tool as the PRIMARY source for creating the main 'working' part of a workout plan.
-    It returns exercises that target specific muscles with load.
+    It returns the best-matching exercises that target specific muscles with load,
+    ranked by how directly they train those muscles, equipment fit and popularity.
 
     Args:
         muscle_groups: Target muscle groups (e.g. ['chest', 'triceps']).
@@ -34,76 +142,60 @@ async def get_strength_exercises(
                       quadriceps, hamstrings, glutes, abs, obliques, forearms,
                       abductors, adductors, hip_flexors, lower_back
 
-        equipment: (Optional) Equipment filtering is currently DISABLED to ensure broad availability.
-                   All matching muscle-group exercises will be returned with their equipment metadata.
+        equipment: (Optional) Preferred equipment (e.g. ['dumbbell']). Matching exercises
+                   rank higher; others are still returned.
 
         experience_level: (Optional) Filter by difficulty - 'beginner', 'intermediate', 'advanced'
 
+        limit: (Optional) Number of exercises to return (default 15, max 30).
+
+        cursor: (Optional) next_cursor from a previous call with the same arguments,
+                to fetch the next page.
+
     Returns:
-        List of strength exercises with: id, standard_name, primary_muscles,
-        secondary_muscles, equipment, movement_pattern.
+        {"results": [...], "total": int, "cursor": str, "next_cursor": str | None}.
+        Each result has:
+        id, standard_name, primary_muscles, secondary_muscles, equipment, movement_pattern.
     """
     from app.services.cache.exercise_definitions import exercise_cache
+    from app.services.cache.exercise_popularity import exercise_popularity
 
-    # Get all cached exercises
-    all_exercises = await exercise_cache.get_all_exercises()
+    # Get the indexed catalog
+    index = await exercise_cache.get_index()
+    popularity = await exercise_popularity.get_scores()
 
     # Expand muscle groups (e.g. 'back' -> ['back', 'lats', 'traps', ...])
-    expanded_groups = set()
-    for mg in muscle_groups:
-        mg_lower = mg.lower().strip()
-        expanded_groups.add(mg_lower)
-        if mg_lower in MUSCLE_EXPANSIONS:
-            expanded_groups.update(MUSCLE_EXPANSIONS[mg_lower])
-    
+    requested, expanded = expand_muscles(muscle_groups)
+
     logger.info(
-        f"💪 Strength tool called: muscle_groups={muscle_groups} (expanded: {expanded_groups})"
+        f"💪 Strength tool called: muscle_groups={muscle_groups} (expanded: {expanded})"
     )
 
-    # Exclusivity: Exclude mobility and cardio
-    base_filtered = [
-        ex
-        for ex in all_exercises
-        if ex.get("base_movement") != "mobility"
-        and "cardiovascular_system"
-        not in [m.lower().strip() for m in ex.get("primary_muscles", [])]
-    ]
-
-    # Filter by expanded muscle groups
-    filtered = []
-    for exercise in base_filtered:
-        primary_muscles = exercise.get("primary_muscles", [])
-        normalized_primary = [m.lower().strip() for m in primary_muscles]
-        if any(muscle in normalized_primary for muscle in expanded_groups):
-            filtered.append(exercise)
+    # Exclusivity: Exclude mobility and cardio; require a primary muscle match
+    matches = index.by_type["strength"] & index.muscle_matches(requested)
+    scored = _score_matches(index, matches, requested, expanded, equipment, popularity)
 
-    logger.info(
-        f"  └─ Filtered to muscles: {len(filtered)} exercises (ignoring equipment filter)"
+    query_hash = _query_hash(
+        "get_strength_exercises",
+        muscle_groups=sorted(requested),
+        equipment=sorted(normalize(e) for e in equipment or []),
     )
+    page = _ranked_page(index, scored, STRENGTH_FIELDS, query_hash, cursor, limit)
 
-    # Return condensed version
-    condensed = []
-    for ex in filtered:
-        condensed.append(
-            {
-                "id": ex["id"],
-                "standard_name": ex["standard_name"],
-                "primary_muscles": ex.get("primary_muscles"),
-                "secondary_muscles": ex.get("secondary_muscles"),
-                "equipment": ex.get("equipment"),
-                "movement_pattern": ex.get("movement_pattern"),
-                "base_movement": ex.get("base_movement"),
-            }
-        )
-
-    return condensed
+    logger.info(
+        f"  └─ {page['total']} matches, returning {len(page['results'])} "
+        f"(more: {page['next_cursor'] is not None})"
+    )
+    return page
 
 
 @tool
 async def get_cardio_exercises(
     base_movement: Optional[str] = None,
     equipment: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Fetch cardiovascular endurance exercises (e.g. running, cycling, swimming, rowing).
 
@@ -111,61 +203,50 @@ async def get_cardio_exercises(
 
     Args:
         base_movement: (Optional) Filter by cardio type (e.g. running, cycling).
-        equipment: (Optional) Equipment filtering is currently DISABLED.
+        equipment: (Optional) Preferred equipment - matching exercises rank higher.
+        limit: (Optional) Number of exercises to return (default 15, max 30).
+        cursor: (Optional) next_cursor from a previous call with the same arguments.
 
     Returns:
-        List of cardio exercises with: id, standard_name, equipment, base_movement, major_variation.
+        {"results": [...], "total": int, "cursor": str, "next_cursor": str | None}.
+        Each result has:
+        id, standard_name, equipment, base_movement, major_variation.
     """
     from app.services.cache.exercise_definitions import exercise_cache
+    from app.services.cache.exercise_popularity import exercise_popularity
 
-    # Get all cached exercises
-    all_exercises = await exercise_cache.get_all_exercises()
+    # Get the indexed catalog
+    index = await exercise_cache.get_index()
+    popularity = await exercise_popularity.get_scores()
 
     logger.info(
         f"🏃 Cardio tool called: base_movement={base_movement}"
     )
 
-    # Filter for cardiovascular exercises (exclusive check)
-    filtered = [
-        ex
-        for ex in all_exercises
-        if "cardiovascular_system"
-        in [m.lower().strip() for m in ex.get("primary_muscles", [])]
-    ]
-
-    # Filter by base_movement
-    if base_movement:
-        base_movement_normalized = base_movement.lower().strip()
-        filtered = [
-            ex
-            for ex in filtered
-            if ex.get("base_movement", "").lower().strip() == base_movement_normalized
-        ]
-
-    # Return condensed version
-    condensed = []
-    for ex in filtered:
-        condensed.append(
-            {
-                "id": ex["id"],
-                "standard_name": ex["standard_name"],
-                "primary_muscles": ex.get("primary_muscles"),
-                "secondary_muscles": ex.get("secondary_muscles"),
-                "equipment": ex.get("equipment"),
-                "movement_pattern": ex.get("movement_pattern"),
-                "base_movement": ex.get("base_movement"),
-                "major_variation": ex.get("major_variation"),
-            }
-        )
-
-    return condensed
+    # Filter for cardiovascular exercises (exclusive check) and base_movement
+    base_movement_normalized = normalize(base_movement)
+    preferred_equipment = [equipment] if equipment else None
+
+    matches = index.by_type["cardio"]
+    if base_movement_normalized:
+        matches = matches & index.by_base_movement.get(base_movement_normalized, frozenset())
+    scored = _score_matches(index, matches, set(), set(), preferred_equipment, popularity)
+
+    query_hash = _query_hash(
+        "get_cardio_exercises",
+        base_movement=base_movement_normalized,
+        equipment=normalize(equipment),
+    )
+    return _ranked_page(index, scored, CARDIO_FIELDS, query_hash, cursor, limit)
 
 
 @tool
 async def get_mobility_exercises(
     muscle_groups: Optional[List[str]] = None,
     equipment: Optional[List[str]] = None,
-) -> List[Dict[str, Any]]:
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Fetch stretching, mobility, and recovery exercises (e.g. 90/90 stretch, foam rolling).
 
@@ -173,56 +254,80 @@ async def get_mobility_exercises(
 
     Args:
         muscle_groups: (Optional) Target muscle groups for stretching (e.g. ['glutes', 'hips']).
-        equipment: (Optional) Equipment filtering is currently DISABLED.
+        equipment: (Optional) Preferred equipment - matching exercises rank higher.
+        limit: (Optional) Number of exercises to return (default 15, max 30).
+        cursor: (Optional) next_cursor from a previous call with the same arguments.
 
     Returns:
-        List of mobility exercises with: id, standard_name, primary_muscles, equipment, base_movement.
+        {"results": [...], "total": int, "cursor": str, "next_cursor": str | None}.
+        Each result has:
+        id, standard_name, primary_muscles, equipment, base_movement.
     """
     from app.services.cache.exercise_definitions import exercise_cache
+    from app.services.cache.exercise_popularity import exercise_popularity
 
-    # Get all cached exercises
-    all_exercises = await exercise_cache.get_all_exercises()
+    # Get the indexed catalog
+    index = await exercise_cache.get_index()
+    popularity = await exercise_popularity.get_scores()
 
     # Expand muscle groups
-    expanded_groups = set()
-    if muscle_groups:
-        for mg in muscle_groups:
-            mg_lower = mg.lower().strip()
-            expanded_groups.add(mg_lower)
-            if mg_lower in MUSCLE_EXPANSIONS:
-                expanded_groups.update(MUSCLE_EXPANSIONS[mg_lower])
+    requested, expanded = expand_muscles(muscle_groups)
 
     logger.info(
-        f"🧘 Mobility tool called: muscle_groups={muscle_groups} (expanded: {expanded_groups})"
+        f"🧘 Mobility tool called: muscle_groups={muscle_groups} (expanded: {expanded})"
     )
 
-    # Filter for mobility exercises (exclusive check)
-    filtered = [ex for ex in all_exercises if ex.get("base_movement") == "mobility"]
-
-    # Filter by muscle groups
-    if expanded_groups:
-        filtered = [
-            ex
-            for ex in filtered
-            if any(
-                m.lower().strip() in expanded_groups
-                for m in ex.get("primary_muscles", [])
-            )
-        ]
-
-    # Return condensed version
-    condensed = []
-    for ex in filtered:
-        condensed.append(
-            {
-                "id": ex["id"],
-                "standard_name": ex["standard_name"],
-                "primary_muscles": ex.get("primary_muscles"),
-                "secondary_muscles": ex.get("secondary_muscles"),
-                "equipment": ex.get("equipment"),
-                "movement_pattern": ex.get("movement_pattern"),
-                "base_movement": ex.get("base_movement"),
-            }
-        )
-
-    return condensed
+    # Filter for mobility exercises (exclusive check), then by muscle groups
+    matches = index.by_type["mobility"]
+    if expanded:
+        matches = matches & index.muscle_matches(requested)
+    scored = _score_matches(index, matches, requested, expanded, equipment, popularity)
+
+    query_hash = _query_hash(
+        "get_mobility_exercises",
+        muscle_groups=sorted(requested),
+        equipment=sorted(normalize(e) for e in equipment or []),
+    )
+    return _ranked_page(index, scored, MOBILITY_FIELDS, query_hash, cursor, limit)
+
+
+SEARCH_FIELDS = CARDIO_FIELDS
+DEFAULT_SEARCH_LIMIT = 10
+
+
+@tool
+async def search_exercises(
+    query: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> Dict[str, Any]:
+    """
+    Find specific exercises by name - tolerant of typos, partial names and abbreviations
+    (e.g. "benh pres", "rdl", "db shoulder press").
+
+    Use this tool when the user names a particular exercise (to swap it in, log it or
+    look it up), instead of fetching a whole muscle group.
+
+    Args:
+        query: The exercise name as the user wrote it.
+        limit: (Optional) Number of exercises to return (default 10, max 30).
+
+    Returns:
+        {"results": [...], "total": int}, best match first. Each result has:
+        id, standard_name, primary_muscles, secondary_muscles, equipment,
+        movement_pattern, base_movement, major_variation.
+    """
+    from app.services.cache.exercise_definitions import exercise_cache
+    from app.services.cache.exercise_popularity import exercise_popularity
+
+    search_index = await exercise_cache.get_search_index()
+    popularity = await exercise_popularity.get_scores()
+
+    logger.info(f"🔎 Exercise search tool called: query={query!r}")
+
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_PAGE_SIZE))
+    hits, total = search_index.search(query, limit, popularity)
+
+    # Copies - results are annotated in place downstream (e.g. last_tracked)
+    rows = search_index.index.condensed(SEARCH_FIELDS)
+    logger.info(f"  └─ {total} matches, returning {len(hits)}")
+    return {"results": [dict(rows[pos]) for _, pos in hits], "total": total}
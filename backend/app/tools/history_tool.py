@@ -0,0 +1,141 @@
+from langchain.tools import tool
+from langchain_core.tools import InjectedToolArg
+from typing import Any, Dict, Optional
+from typing_extensions import Annotated
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tools whose executors need the connected user's id injected by the coach
+# (the argument is hidden from the model's tool schema)
+USER_SCOPED_TOOLS = {"query_history", "build_chart"}
+
+METRIC_LABELS = {
+    "e1rm": "e1RM (kg)",
+    "top_set": "Top set (kg)",
+    "volume": "Volume (kg)",
+    "sets": "Sets",
+    "frequency": "Sessions",
+}
+CHART_COLOR = "#3b82f6"
+
+
+@tool
+async def query_history(
+    exercise: Optional[str] = None,
+    metric: str = "e1rm",
+    window: str = "12w",
+    user_id: Annotated[str, InjectedToolArg] = "",
+) -> Dict[str, Any]:
+    """
+    Look up aggregated numbers from the user's full workout history.
+
+    Use this for progress, volume or frequency questions that the Strength
+    Progression / Workout History context does not answer (other exercises,
+    longer windows, muscle groups, "how often", "how much volume").
+
+    Args:
+        exercise: (Optional) Exercise name (e.g. 'bench press'), or a muscle group
+                  (e.g. 'legs', 'chest', 'hamstrings') for a per-exercise breakdown.
+                  Omit for overall training frequency.
+
+        metric: 'e1rm' (estimated 1RM trend), 'top_set' (heaviest set),
+                'volume' (weight x reps, sets, per-week rates) or 'frequency'.
+
+        window: Time window, e.g. '4w', '90d', '6m', '1y' or 'all' (default '12w').
+
+    Returns:
+        Small summary dict (weights in kg), e.g. first/last/best e1RM with change,
+        or total volume with the previous window for comparison.
+    """
+    from app.services.cache.workout_history import workout_history_cache
+
+    logger.info(f"📚 History tool called: exercise={exercise}, metric={metric}, window={window}")
+
+    if not user_id:
+        return {"error": "No user context for history lookup"}
+
+    index = await workout_history_cache.get_index(user_id)
+    if index is None:
+        return {"error": "Workout history is unavailable right now"}
+
+    start = time.perf_counter()
+    result = index.query(exercise=exercise, metric=metric, window=window)
+    logger.info(f"  └─ Answered in {(time.perf_counter() - start) * 1e6:.0f}µs")
+    return result
+
+
+@tool
+async def build_chart(
+    metric: str = "e1rm",
+    exercise: Optional[str] = None,
+    window: str = "12w",
+    resolution: str = "auto",
+    user_id: Annotated[str, InjectedToolArg] = "",
+) -> Dict[str, Any]:
+    """
+    Build a chart from the user's workout history on the server.
+
+    Call this whenever a chart would help (progress over time, volume trend,
+    training frequency). You get back a short summary and a `marker` such as
+    [[chart:chart_1]] - put the marker on its own line where the chart should
+    appear. NEVER write chart data points yourself.
+
+    Args:
+        metric: 'e1rm', 'top_set', 'volume', 'sets' or 'frequency'.
+
+        exercise: (Optional) Exercise name (e.g. 'back squat'). Volume, sets and
+                  frequency also accept a muscle group (e.g. 'legs'); omit for
+                  frequency across all workouts.
+
+        window: Time window, e.g. '8w', '6m', '1y' or 'all' (default '12w').
+
+        resolution: (Optional) 'session', 'week', 'month' or 'auto' (default).
+
+    Returns:
+        {"marker", "title", "points", "first", "last", "best"} - values in kg.
+    """
+    from app.services.cache.workout_history import workout_history_cache
+
+    logger.info(
+        f"📈 Chart tool called: metric={metric}, exercise={exercise}, "
+        f"window={window}, resolution={resolution}"
+    )
+
+    if not user_id:
+        return {"error": "No user context for chart"}
+
+    index = await workout_history_cache.get_index(user_id)
+    if index is None:
+        return {"error": "Workout history is unavailable right now"}
+
+    series = index.series(exercise=exercise, metric=metric, window=window, resolution=resolution)
+    if "error" in series:
+        return series
+
+    values = series["values"]
+    label = METRIC_LABELS[series["metric"]]
+    is_trend = series["metric"] in ("e1rm", "top_set")
+    per = "" if is_trend or series["resolution"] == "session" else f" per {series['resolution']}"
+    chart = {
+        "title": f"{series['subject']} {label.split(' (')[0]}{per}",
+        "chart_type": "line" if is_trend else "bar",
+        "labels": series["labels"],
+        "datasets": [{"label": label, "data": values, "color": CHART_COLOR}],
+    }
+    logger.info(f"  └─ {len(values)} points ({series['resolution']})")
+
+    # The coach registers the chart and replaces "chart" with its marker
+    return {
+        "chart": chart,
+        "title": chart["title"],
+        "resolution": series["resolution"],
+        "points": len(values),
+        "downsampled_from": series["total_points"] if series["total_points"] > len(values) else None,
+        "first": values[0],
+        "last": values[-1],
+        "best": max(values) if is_trend else None,
+        "from": series["labels"][0],
+        "to": series["labels"][-1],
+    }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Answer Cache Round-Trip Check
+Verifies that a cached coach answer replays exactly the answer content the
+user saw the first time - including turns where the model called a tool and
+narrated its plan (streamed as thinking) before answering.
+
+Runs fully offline - the model stream is scripted, no model calls are made.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from google.auth.credentials import AnonymousCredentials
+from langchain_core.messages import AIMessageChunk
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ["COACH_CONTEXT_CACHE"] = "off"
+os.environ["COACH_ANSWER_CACHE_CLASSES"] = "daily_plan"
+
+from app.services.cache.answer_cache import answer_cache
+from app.services.llm.unified_coach_service import UnifiedCoachService
+from prompt_assembly_benchmark import make_shared_context
+
+QUESTION = "What should I train today?"
+NARRATION = "Let me look up some leg exercises first. "
+ANSWER = [
+    "Today is a leg day.\n",
+    '```json\n{"type":"workout_template","data":{"name":"Legs"}}\n```\n',
+    "Enjoy!",
+]
+
+# Scripted turns: 1) narration + tool call, 2) the answer
+SCRIPT = [
+    [
+        AIMessageChunk(
+            content="",
+            tool_calls=[
+                {"name": "unknown_tool", "args": {}, "id": "t1"},
+            ],
+        ),
+        AIMessageChunk(content=NARRATION),
+    ],
+    [AIMessageChunk(content=text) for text in ANSWER],
+]
+
+
+def make_service(shared_context, script):
+    service = UnifiedCoachService(credentials=AnonymousCredentials(), project_id="check")
+    service.conversation_id = "answer-cache-check"
+    service.user_id = "answer-cache-check-user"
+    service._load_prompt_context(shared_context)
+    service.raw_bundle = shared_context["bundle"]
+    service.initialized = True
+
+    async def scripted_stream(messages, runnable=None, **kwargs):
+        for chunk in script.pop(0) if script else []:
+            yield chunk
+
+    service.stream = scripted_stream
+    return service
+
+
+def answer_content(chunks):
+    """What the client renders as answer text (plain chunks, not _type events)."""
+    content = []
+    for chunk in chunks:
+        try:
+            event = json.loads(chunk)
+        except ValueError:
+            event = None
+        if isinstance(event, dict) and "_type" in event:
+            continue
+        content.append(chunk)
+    return "".join(content)
+
+
+async def main():
+    shared_context = make_shared_context()
+
+    live = make_service(shared_context, [list(turn) for turn in SCRIPT])
+    live_chunks = [chunk async for chunk in live.process_message(QUESTION)]
+
+    replay = make_service(shared_context, [])
+    replay_chunks = [chunk async for chunk in replay.process_message(QUESTION)]
+
+    live_answer = answer_content(live_chunks)
+    replayed_answer = answer_content(replay_chunks)
+    hit = answer_cache.get_stats()["hits"] == 1
+
+    print(f"Live answer:     {live_answer!r}")
+    print(f"Replayed answer: {replayed_answer!r}")
+    print(f"Cache hit: {hit}")
+
+    ok = hit and replayed_answer == live_answer == "".join(ANSWER)
+    ok = ok and NARRATION not in replayed_answer
+    print("✅ PASS" if ok else "❌ FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Bundle Memory Benchmark
+Measures memory per cached user in SharedContextLoader on a synthetic 2-year
+history:
+- Full UserContextBundle (deserialized as from the database) vs BundleView
+- Build time of the projection
+- Whether both render the same prompt sections
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.context.bundle_view import BundleView
+from app.services.context.context_formatter import (
+    MAX_EXERCISES,
+    MAX_POINTS,
+    MAX_WORKOUTS,
+    format_strength_progression,
+    format_workout_history,
+    get_context_snapshot,
+)
+from app.services.workout_analysis.processor import AnalysisBundleProcessor
+from app.services.workout_analysis.schemas import UserContextBundle
+
+# Configuration
+HISTORY_DAYS = 730
+EXERCISES = [
+    "Back Squat", "Barbell Bench Press", "Deadlift", "Overhead Press",
+    "Barbell Row", "Pull Up", "Romanian Deadlift", "Incline Dumbbell Press",
+    "Leg Press", "Lat Pulldown", "Dumbbell Curl", "Tricep Pushdown",
+    "Lateral Raise", "Leg Curl", "Calf Raise", "Hip Thrust",
+    "Front Squat", "Face Pull", "Cable Fly", "Bulgarian Split Squat",
+    "Hammer Curl", "Skull Crusher", "Seated Row", "Goblet Squat",
+]
+MEMORY_NOTES = 60
+NUM_USERS = 50
+
+
+def make_raw_workouts(seed=3):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    workouts = []
+    day = HISTORY_DAYS
+    while day > 0:
+        created = now - timedelta(days=day, hours=rng.random())
+        progress = (HISTORY_DAYS - day) / HISTORY_DAYS
+        exercises = []
+        for name in rng.sample(EXERCISES, 6):
+            base = 40 + (hash(name) % 80)
+            sets = []
+            for n in range(1, 5):
+                weight = round(base * (1 + 0.3 * progress) + rng.uniform(-5, 5), 1)
+                reps = rng.randint(4, 10)
+                sets.append(
+                    {
+                        "set_number": n,
+                        "weight": weight,
+                        "reps": reps,
+                        "rpe": rng.choice([None, 7, 8, 9]),
+                        "estimated_1rm": round(weight * (1 + reps / 30), 1),
+                    }
+                )
+            exercises.append(
+                {
+                    "name": name,
+                    "definition_id": f"def-{EXERCISES.index(name)}",
+                    "workout_exercise_sets": sets,
+                }
+            )
+        workouts.append(
+            {
+                "id": str(uuid.uuid4()),
+                "name": rng.choice(["Push", "Pull", "Legs", "Upper", "Lower"]),
+                "created_at": created.isoformat(),
+                "workout_exercises": exercises,
+            }
+        )
+        day -= rng.choice([1, 2, 2])  # ~4 sessions a week
+    workouts.sort(key=lambda w: w["created_at"], reverse=True)
+    return workouts
+
+
+def make_bundle_json():
+    """A bundle as stored (JSON) - each load deserializes its own copy."""
+    ai_memory = {
+        "notes": [
+            {"text": f"Memory note {i} about training", "category": "general", "date": "2025-01-01"}
+            for i in range(MEMORY_NOTES)
+        ]
+    }
+    bundle = AnalysisBundleProcessor().process(
+        str(uuid.uuid4()), "benchmark-user", {"workouts": make_raw_workouts()},
+        existing_ai_memory=ai_memory,
+    )
+    return bundle.model_dump(mode="json")
+
+
+def retained_per_user(build):
+    """Bytes still allocated per user after building NUM_USERS cache values."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cached = [build() for _ in range(NUM_USERS)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cached
+    return (after - before) / NUM_USERS
+
+
+def render(bundle):
+    snapshot = get_context_snapshot(bundle, False)
+    return (
+        format_workout_history(snapshot, MAX_WORKOUTS),
+        format_strength_progression(snapshot, MAX_EXERCISES, MAX_POINTS),
+        format_strength_progression(snapshot, 10, 10),
+    )
+
+
+def run_benchmark():
+    payload = make_bundle_json()
+
+    full_bytes = retained_per_user(lambda: UserContextBundle.model_validate(payload))
+    view_bytes = retained_per_user(
+        lambda: BundleView.from_bundle(UserContextBundle.model_validate(payload), False)
+    )
+
+    bundle = UserContextBundle.model_validate(payload)
+    start = time.perf_counter()
+    for _ in range(NUM_USERS):
+        view = BundleView.from_bundle(bundle, False)
+    build_ms = (time.perf_counter() - start) * 1000 / NUM_USERS
+
+    print("=" * 72)
+    print("BUNDLE MEMORY BENCHMARK")
+    print("=" * 72)
+    print(f"Workouts in history:        {len(make_raw_workouts()):,} ({HISTORY_DAYS} days)")
+    print(f"Recent workouts in bundle:  {len(bundle.recent_workouts)}")
+    print(f"Strength series:            {len(bundle.strength_data.exercise_strength_progress)}")
+    print(f"Volume series:              {len(bundle.volume_data.volume_by_exercise_over_time)}")
+    print(f"Memory notes:               {MEMORY_NOTES}")
+    print("-" * 72)
+    print(f"UserContextBundle per user: {full_bytes / 1024:>8.1f} KiB")
+    print(f"BundleView per user:        {view_bytes / 1024:>8.1f} KiB "
+          f"({view_bytes / full_bytes:.0%}, incl. ai_memory)")
+    print(f"Projection build:           {build_ms:>8.2f} ms")
+    print(f"Same prompt sections:       {render(bundle) == render(view)}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    run_benchmark()
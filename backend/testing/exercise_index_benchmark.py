@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Exercise Index Benchmark
+Compares exercise lookups over a synthetic 5k-exercise catalog:
+- Linear scan of the normalized catalog (previous tool implementation)
+- ExerciseCatalogIndex set intersections + condensed result rows
+- Dashboard muscle mapping: per-call {id: primary_muscles} build vs index
+Checks that both return the same pages.
+"""
+
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.cache.exercise_index import ExerciseCatalogIndex, expand_muscles
+from app.tools.exercise_tool import (
+    CARDIO_FIELDS,
+    EQUIPMENT_FIT_WEIGHT,
+    STRENGTH_FIELDS,
+    _muscle_score,
+    _ranked_page,
+    _score_matches,
+)
+
+# Configuration
+CATALOG_SIZE = 5000
+NUM_RUNS = 200
+
+MUSCLES = [
+    "chest", "triceps", "shoulders", "anterior_deltoid", "lats", "traps", "biceps",
+    "quadriceps", "hamstrings", "glutes", "calves", "abs", "obliques", "forearms",
+    "lower_back", "hip_flexors", "adductors", "abductors",
+]
+EQUIPMENT = ["barbell", "dumbbell", "cable", "machine", "bodyweight", "kettlebell", "bands"]
+STRENGTH_MOVEMENTS = ["bench_press", "row", "squat", "deadlift", "curl", "press", "fly", "raise"]
+CARDIO_MOVEMENTS = ["running", "cycling", "rowing", "swimming"]
+
+QUERIES = [
+    ("strength", ["chest", "triceps"], ["dumbbell"]),
+    ("strength", ["back"], None),
+    ("strength", ["legs"], ["barbell", "machine"]),
+    ("mobility", ["hamstrings"], None),
+    ("cardio", "running", "bodyweight"),
+]
+
+
+def make_catalog(size, seed=11):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        kind = rng.random()
+        if kind < 0.1:
+            primary, base = ["cardiovascular_system"], rng.choice(CARDIO_MOVEMENTS)
+        elif kind < 0.25:
+            primary, base = rng.sample(MUSCLES, 1), "mobility"
+        else:
+            primary, base = rng.sample(MUSCLES, rng.randint(1, 3)), rng.choice(STRENGTH_MOVEMENTS)
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "standard_name": f"{base.replace('_', ' ').title()} Variation {i}",
+                "primary_muscles": primary,
+                "secondary_muscles": rng.sample(MUSCLES, rng.randint(0, 2)),
+                "equipment": rng.choice(EQUIPMENT),
+                "movement_pattern": rng.choice(["push", "pull", "squat", "hinge"]),
+                "base_movement": base,
+                "major_variation": None,
+                "is_bodyweight": rng.random() < 0.2,
+            }
+        )
+    return rows
+
+
+def linear_page(index, kind, arg, equipment):
+    """The pre-index tool loop: scan every normalized entry."""
+    if kind == "cardio":
+        preferred = {equipment} if equipment else set()
+        scored = [
+            (EQUIPMENT_FIT_WEIGHT if e.equipment in preferred else 0.0, pos)
+            for pos, e in enumerate(index.entries)
+            if e.is_cardio and e.base_movement == arg
+        ]
+        fields = CARDIO_FIELDS
+    else:
+        requested, expanded = expand_muscles(arg)
+        preferred = set(equipment or [])
+        scored = []
+        for pos, e in enumerate(index.entries):
+            if kind == "strength" and (e.is_mobility or e.is_cardio):
+                continue
+            if kind == "mobility" and not e.is_mobility:
+                continue
+            muscle = _muscle_score(e, requested, expanded)
+            if muscle <= 0:
+                continue
+            scored.append((muscle + (EQUIPMENT_FIT_WEIGHT if e.equipment in preferred else 0.0), pos))
+        fields = STRENGTH_FIELDS
+    return _ranked_page(index, scored, fields, "q", None, 15)
+
+
+def indexed_page(index, kind, arg, equipment):
+    """What the tools do now."""
+    if kind == "cardio":
+        matches = index.by_type["cardio"] & index.by_base_movement.get(arg, frozenset())
+        scored = _score_matches(index, matches, set(), set(), [equipment], {})
+        return _ranked_page(index, scored, CARDIO_FIELDS, "q", None, 15)
+    requested, expanded = expand_muscles(arg)
+    matches = index.by_type[kind] & index.muscle_matches(requested)
+    scored = _score_matches(index, matches, requested, expanded, equipment, {})
+    return _ranked_page(index, scored, STRENGTH_FIELDS, "q", None, 15)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = fn(*args)
+    return (time.perf_counter() - start) * 1e6 / NUM_RUNS, result
+
+
+def run_benchmark():
+    catalog = make_catalog(CATALOG_SIZE)
+    start = time.perf_counter()
+    index = ExerciseCatalogIndex(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+    index.condensed(STRENGTH_FIELDS)
+    index.condensed(CARDIO_FIELDS)
+
+    print("=" * 84)
+    print(f"EXERCISE INDEX BENCHMARK ({CATALOG_SIZE:,} exercises, index build {build_ms:.1f}ms)")
+    print("=" * 84)
+    print(f"{'Query':<42} | {'Matches':>7} | {'Linear µs':>9} | {'Index µs':>8} | {'Same':>5}")
+    print("-" * 84)
+    for kind, arg, equipment in QUERIES:
+        linear_us, expected = timed(linear_page, index, kind, arg, equipment)
+        indexed_us, actual = timed(indexed_page, index, kind, arg, equipment)
+        label = f"{kind} {arg} {equipment or ''}".strip()
+        print(
+            f"{label:<42} | {actual['total']:>7,} | {linear_us:>9.0f} | {indexed_us:>8.0f} | "
+            f"{str(expected == actual):>5}"
+        )
+
+    rebuild_us, _ = timed(
+        lambda: {ex["id"]: ex.get("primary_muscles") or [] for ex in catalog}
+    )
+    lookup_us, _ = timed(lambda: index.primary_muscles)
+    print("-" * 84)
+    print(f"{'dashboard muscle map (per request)':<42} | {'':>7} | {rebuild_us:>9.0f} | {lookup_us:>8.1f} |")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Exercise Search Benchmark
+Fuzzy name search over a synthetic ~5k-exercise catalog with realistic names:
+- Index build time (ExerciseCatalogIndex + ExerciseSearchIndex)
+- Top result for partial, misspelled and abbreviated queries (and one
+  with no match in the catalog)
+- p50 / p99 latency, cold (first query per catalog) and warm
+"""
+
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.cache.exercise_index import ExerciseCatalogIndex
+from app.services.cache.exercise_search import ExerciseSearchIndex
+
+# Configuration
+NUM_RUNS = 200
+TOP_K = 20
+
+EQUIPMENT = ["Barbell", "Dumbbell", "Cable", "Machine", "Kettlebell", "Smith Machine", "Band"]
+MOVEMENTS = [
+    ("Bench Press", ["chest", "triceps"], ["BP"]),
+    ("Incline Bench Press", ["chest", "shoulders"], []),
+    ("Romanian Deadlift", ["hamstrings", "glutes"], ["RDL"]),
+    ("Deadlift", ["hamstrings", "glutes", "lower_back"], []),
+    ("Back Squat", ["quadriceps", "glutes"], []),
+    ("Front Squat", ["quadriceps"], []),
+    ("Bulgarian Split Squat", ["quadriceps", "glutes"], []),
+    ("Overhead Press", ["shoulders", "triceps"], ["OHP", "Military Press"]),
+    ("Lateral Raise", ["shoulders"], ["Side Raise"]),
+    ("Bicep Curl", ["biceps"], []),
+    ("Hammer Curl", ["biceps", "forearms"], []),
+    ("Triceps Extension", ["triceps"], []),
+    ("Bent Over Row", ["lats", "traps"], []),
+    ("Pull-Up", ["lats", "biceps"], ["Pullup"]),
+    ("Chin-Up", ["lats", "biceps"], []),
+    ("Hip Thrust", ["glutes"], []),
+    ("Calf Raise", ["calves"], []),
+    ("Lunge", ["quadriceps", "glutes"], []),
+    ("Face Pull", ["shoulders", "traps"], []),
+    ("Chest Fly", ["chest"], []),
+]
+VARIATIONS = ["", "Paused", "Tempo", "Single Arm", "Single Leg", "Close Grip", "Wide Grip",
+              "Deficit", "Seated", "Standing", "Kneeling", "Reverse Grip", "Half Kneeling"]
+
+QUERIES = [
+    ("bench press", "Bench Press"),
+    ("benh pres", "Bench Press"),
+    ("bnech", "Bench Press"),
+    ("rdl", "Romanian Deadlift"),
+    ("db rdl", "Dumbbell Romanian Deadlift"),
+    ("ohp", "Overhead Press"),
+    ("bulgarain split", "Bulgarian Split Squat"),
+    ("pullup", "Pull-Up"),
+    ("hamer curl", "Hammer Curl"),
+    ("lat raise", "Lateral Raise"),
+    ("squat", "Back Squat"),
+    ("kb swing", None),
+    ("cable face pul", "Cable Face Pull"),
+]
+
+
+def make_catalog(target_size=5000, seed=7):
+    rng = random.Random(seed)
+    rows, seen = [], set()
+
+    def add(name, muscles, aliases, equipment):
+        if name in seen:
+            return
+        seen.add(name)
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "standard_name": name,
+                "aliases": aliases or None,
+                "primary_muscles": muscles,
+                "secondary_muscles": [],
+                "equipment": equipment.lower() if equipment else "bodyweight",
+                "movement_pattern": "push",
+                "base_movement": name.lower().replace(" ", "_"),
+                "major_variation": None,
+            }
+        )
+
+    # The canonical variants the queries expect
+    for movement, muscles, aliases in MOVEMENTS:
+        add(movement, muscles, aliases, None)
+        for equipment in EQUIPMENT:
+            add(f"{equipment} {movement}", muscles, [f"{equipment[0]}{a}" for a in aliases], equipment)
+
+    # Long tail of variations (popular catalogs are mostly variations)
+    while len(rows) < target_size:
+        movement, muscles, _ = rng.choice(MOVEMENTS)
+        parts = [rng.choice(EQUIPMENT), rng.choice(VARIATIONS), rng.choice(VARIATIONS), movement]
+        name = " ".join(p for p in parts if p)
+        add(f"{name} {rng.randint(1, 400)}" if name in seen else name, muscles, [], parts[0])
+    return rows
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_benchmark():
+    catalog = make_catalog()
+    start = time.perf_counter()
+    index = ExerciseCatalogIndex(catalog)
+    index_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    search = ExerciseSearchIndex(index)
+    search_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 96)
+    print(
+        f"EXERCISE SEARCH BENCHMARK ({len(catalog):,} exercises, {len(search.vocabulary):,} words; "
+        f"build: catalog {index_ms:.0f}ms + search {search_ms:.0f}ms)"
+    )
+    print("=" * 96)
+    print(f"{'Query':<18} | {'Top result':<34} | {'Total':>5} | {'Cold µs':>7} | {'p50 µs':>6} | {'p99 µs':>6} | OK")
+    print("-" * 96)
+
+    all_warm = []
+    for query, expected in QUERIES:
+        start = time.perf_counter()
+        hits, total = search.search(query, TOP_K)
+        cold_us = (time.perf_counter() - start) * 1e6
+
+        samples = []
+        for _ in range(NUM_RUNS):
+            start = time.perf_counter()
+            search.search(query, TOP_K)
+            samples.append((time.perf_counter() - start) * 1e6)
+        all_warm.extend(samples)
+
+        top = index.entries[hits[0][1]].exercise["standard_name"] if hits else "-"
+        print(
+            f"{query:<18} | {top:<34} | {total:>5} | {cold_us:>7.0f} | "
+            f"{statistics.median(samples):>6.0f} | {percentile(samples, 0.99):>6.0f} | "
+            f"{'-' if expected is None else '✓' if top == expected else '✗ ' + expected}"
+        )
+
+    print("-" * 96)
+    print(
+        f"All queries (warm): p50 {statistics.median(all_warm):.0f}µs, "
+        f"p99 {percentile(all_warm, 0.99):.0f}µs"
+    )
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Glossary Linking Benchmark
+Measures moving glossary links from the prompt to the server:
+- Prompt tokens of the glossary section that is no longer sent (per catalog size)
+- Linker throughput and hold-back over a chunked answer stream
+"""
+
+import sys
+import time
+import random
+import uuid
+from itertools import groupby
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.context.token_budget import count_tokens
+from app.services.llm.glossary_linker import GlossaryLinker, build_automaton
+
+# Configuration
+CATALOG_SIZES = [50, 150, 400, 1000]
+ANSWER_CHARS = 2000
+CHUNK_CHARS = (8, 40)
+NUM_RUNS = 200
+
+WORDS = [
+    "your", "squat", "is", "moving", "well", "keep", "the", "load", "steady", "and",
+    "focus", "on", "depth", "this", "week", "add", "a", "set", "if", "bar", "speed",
+    "stays", "fast", "rest", "two", "minutes", "between", "sets",
+]
+
+
+def make_terms(size, seed=3):
+    rng = random.Random(seed)
+    base = ["RPE", "RIR", "1RM", "e1RM", "Deload", "Progressive Overload", "Hypertrophy", "AMRAP", "Tempo", "Volume"]
+    terms = [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "term": t} for t in base]
+    for i in range(size - len(base)):
+        terms.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "term": f"Glossary Term {i}"})
+    return terms
+
+
+def legacy_glossary_section(terms):
+    """The glossary block previously rendered into every coach prompt."""
+    lines = [f"**Available glossary terms ({len(terms)} total):**"]
+    lines.append("When mentioning these terms, link them as: [term](glossary://uuid)")
+    lines.append("")
+    for letter, group in groupby(sorted(terms, key=lambda t: t["term"].lower()), key=lambda t: t["term"][0].upper()):
+        lines.append(f"**{letter}:**")
+        for term in group:
+            lines.append(f"- [{term['term']}](glossary://{term['id']})")
+    return "\n".join(lines)
+
+
+def make_answer(terms, seed=11):
+    rng = random.Random(seed)
+    words = []
+    while sum(len(w) + 1 for w in words) < ANSWER_CHARS:
+        words.append(rng.choice(terms)["term"] if rng.random() < 0.08 else rng.choice(WORDS))
+    return " ".join(words)
+
+
+def chunked(text, rng):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(*CHUNK_CHARS)
+        yield text[pos : pos + size]
+        pos += size
+
+
+def run_benchmark():
+    print("=" * 84)
+    print("GLOSSARY LINKING BENCHMARK")
+    print("=" * 84)
+    print(
+        f"{'Terms':>6} | {'Prompt tokens saved':>19} | {'Build ms':>8} | "
+        f"{'µs/chunk':>8} | {'Max held chars':>14} | {'Links':>5}"
+    )
+    print("-" * 84)
+
+    for size in CATALOG_SIZES:
+        terms = make_terms(size)
+        saved = count_tokens(legacy_glossary_section(terms))
+
+        start = time.perf_counter()
+        automaton = build_automaton(terms)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        answer = make_answer(terms)
+        rng = random.Random(5)
+        chunks = 0
+        max_held = 0
+        links = 0
+        start = time.perf_counter()
+        for _ in range(NUM_RUNS):
+            linker = GlossaryLinker(automaton)
+            for chunk in chunked(answer, rng):
+                chunks += 1
+                linker.feed(chunk)
+                # Held-back text is whatever the linker still buffers
+                max_held = max(max_held, len(linker._buf))
+            linker.finish()
+            links = linker.links_added
+        per_chunk_us = (time.perf_counter() - start) * 1e6 / chunks
+
+        print(
+            f"{size:>6} | {saved:>19,} | {build_ms:>8.2f} | "
+            f"{per_chunk_us:>8.2f} | {max_held:>14} | {links:>5}"
+        )
+
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Exercise Intent Detector Check
+Table of messages and the exercise tool call the coach should prefetch for
+them (None: no prefetch - the model decides). Covers planning requests and
+look-alikes that must not trigger: history/review questions, "I'm back",
+and workout words used without a request.
+
+Runs fully offline.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm.intent_detector import detect_exercise_intent
+
+CASES = [
+    # Planning requests
+    ("give me a chest workout", ("get_strength_exercises", {"muscle_groups": ["chest"]})),
+    (
+        "can you build me a leg day with dumbbells",
+        ("get_strength_exercises", {"muscle_groups": ["legs"], "equipment": ["dumbbell"]}),
+    ),
+    ("plan me a push session", ("get_strength_exercises", {"muscle_groups": ["chest", "shoulders", "triceps"]})),
+    ("what should I train today, maybe back?", ("get_strength_exercises", {"muscle_groups": ["back"]})),
+    ("I'd like some exercises for my glutes", ("get_strength_exercises", {"muscle_groups": ["glutes"]})),
+    ("suggest some stretches for my hamstrings", ("get_mobility_exercises", {"muscle_groups": ["hamstrings"]})),
+    ("I want a mobility routine", ("get_mobility_exercises", {})),
+    ("recommend a running session", ("get_cardio_exercises", {"base_movement": "running"})),
+    ("I'm back! give me a quick arm workout", ("get_strength_exercises", {"muscle_groups": ["arms"]})),
+    # History / review questions
+    ("what day did I last train legs?", None),
+    ("Im back! how was my last workout?", None),
+    ("my run today felt slow, was my workout too hard?", None),
+    ("how's my bench progressing?", None),
+    ("I hit chest yesterday", None),
+    ("have I trained shoulders this week?", None),
+    # Workout words without a request
+    ("my back hurts after deadlifts", None),
+    ("leg day done!", None),
+    ("I'm back", None),
+    ("the workout session for legs was brutal", None),
+]
+
+
+def main():
+    failures = 0
+    for message, expected in CASES:
+        intent = detect_exercise_intent(message)
+        got = (intent.tool_name, intent.args) if intent else None
+        ok = got == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {message!r:55} -> {got}" + ("" if ok else f" (expected {expected})"))
+
+    print(f"\n{len(CASES) - failures}/{len(CASES)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Prompt Assembly Micro-Benchmark
+Compares the coach's memoized/incremental prompt assembly against the previous
+approach (re-render system prompt + re-convert full history on every build).
+
+Runs fully offline - no model calls are made.
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from google.auth.credentials import AnonymousCredentials
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from app.services.llm.unified_coach_service import UnifiedCoachService
+from app.services.workout_analysis.schemas import (
+    BundleMetadata,
+    ConsistencyData,
+    DateRange,
+    E1RMTimeSeries,
+    ExerciseStrengthProgress,
+    GeneralWorkoutData,
+    RecentWorkout,
+    StrengthData,
+    UserContextBundle,
+    VolumeData,
+    WorkoutExercise,
+    WorkoutSet,
+)
+
+# Configuration
+HISTORY_LENGTHS = [10, 50, 200]
+TURNS = 20
+# Builds per turn in the old flow: 2 before the tool loop + 1 per iteration
+LEGACY_BUILDS_PER_TURN = 3
+
+
+def make_shared_context():
+    """Synthetic shared context roughly the size of an active account."""
+    now = datetime.now()
+    exercises = [f"Exercise {i}" for i in range(20)]
+
+    recent = [
+        RecentWorkout(
+            date=now - timedelta(days=d * 2),
+            name=f"Workout {d}",
+            exercises=[
+                WorkoutExercise(
+                    name=name,
+                    definition_id=str(uuid.uuid4()),
+                    sets=[
+                        WorkoutSet(set_number=s, weight=60 + s * 5, reps=8)
+                        for s in range(1, 5)
+                    ],
+                )
+                for name in exercises[:6]
+            ],
+        )
+        for d in range(7)
+    ]
+
+    strength = StrengthData(
+        exercise_strength_progress=[
+            ExerciseStrengthProgress(
+                exercise=name,
+                e1rm_time_series=[
+                    E1RMTimeSeries(date=now - timedelta(days=p), estimated_1rm=80 + p)
+                    for p in range(60, 0, -1)
+                ],
+            )
+            for name in exercises
+        ]
+    )
+
+    bundle = UserContextBundle(
+        id=str(uuid.uuid4()),
+        user_id="benchmark-user",
+        ai_memory={
+            "notes": [
+                {"text": f"Memory note {i}", "category": "goals", "date": "2025-01-01"}
+                for i in range(30)
+            ]
+        },
+        metadata=BundleMetadata(created_at=now, data_window="Last 60 days"),
+        general_workout_data=GeneralWorkoutData(
+            total_workouts=30,
+            total_exercises_unique=20,
+            date_range=DateRange(earliest=now - timedelta(days=60), latest=now),
+        ),
+        recent_workouts=recent,
+        volume_data=VolumeData(total_volume_kg=100000, today_volume_kg=5000),
+        strength_data=strength,
+        consistency_data=ConsistencyData(avg_days_between=2.0),
+    )
+
+    return {
+        "bundle": bundle,
+        "profile": {"first_name": "Bench", "last_name": "User", "is_imperial": False},
+        "glossary_terms": [
+            {"id": str(uuid.uuid4()), "term": f"Term {i}"} for i in range(150)
+        ],
+    }
+
+
+def make_history(length):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} " * 40}
+        for i in range(length)
+    ]
+
+
+def legacy_build(service, history):
+    """Previous behaviour: render the prompt and convert all history each build."""
+    messages = [service._render_system_message(service.formatted_context)]
+    for msg in history:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+    return messages
+
+
+def run_benchmark():
+    service = UnifiedCoachService(
+        credentials=AnonymousCredentials(), project_id="benchmark"
+    )
+    service.conversation_id = "benchmark-conversation"
+    shared_context = make_shared_context()
+
+    start = time.perf_counter()
+    service._load_prompt_context(shared_context)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    service._load_prompt_context(shared_context)
+    warm_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 72)
+    print("PROMPT ASSEMBLY BENCHMARK")
+    print("=" * 72)
+    print(f"System prompt: {len(service.system_message.content):,} chars")
+    print(f"Context load: cold {cold_ms:.2f}ms | memoized {warm_ms:.3f}ms\n")
+    print(f"{'History':>8} | {'Legacy ms/turn':>15} | {'Incremental ms/turn':>20} | {'Speedup':>8}")
+    print("-" * 72)
+
+    for length in HISTORY_LENGTHS:
+        history = make_history(length)
+
+        # Legacy: full rebuild several times per turn
+        legacy_history = list(history)
+        start = time.perf_counter()
+        for turn in range(TURNS):
+            legacy_history.append({"role": "user", "content": f"Turn {turn}"})
+            for _ in range(LEGACY_BUILDS_PER_TURN):
+                legacy_build(service, legacy_history)
+            legacy_history.append({"role": "assistant", "content": "Reply " * 50})
+        legacy_ms = (time.perf_counter() - start) * 1000 / TURNS
+
+        # Incremental: convert on append, build once per turn
+        service.message_history = []
+        service.history_messages = []
+        for msg in history:
+            service._append_history(msg["role"], msg["content"])
+        start = time.perf_counter()
+        for turn in range(TURNS):
+            service._append_history("user", f"Turn {turn}")
+            service._build_prompt()
+            service._append_history("assistant", "Reply " * 50)
+        incremental_ms = (time.perf_counter() - start) * 1000 / TURNS
+
+        speedup = legacy_ms / incremental_ms if incremental_ms else float("inf")
+        print(
+            f"{length:>8} | {legacy_ms:>15.3f} | {incremental_ms:>20.3f} | {speedup:>7.1f}x"
+        )
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Series Downsampling Benchmark
+Measures LTTB downsampling of e1RM series as history grows:
+- Prompt tokens of the strength section (raw points) - latest-N vs LTTB
+- Bundle strength payload size
+- Whether the PR and the plateau survive
+"""
+
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.context.token_budget import count_tokens
+from app.services.workout_analysis.calc.downsample import (
+    DEFAULT_SERIES_POINTS,
+    SeriesDownsampler,
+)
+
+# Configuration
+SESSION_COUNTS = [30, 90, 250, 500, 1000]
+NUM_RUNS = 200
+
+
+def make_series(sessions, seed=7):
+    """Progress, a PR spike early on, then a long plateau."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=sessions * 2)
+    points = []
+    for i in range(sessions):
+        trend = 100 + min(i, sessions * 0.6) * 0.15 + 3 * math.sin(i / 9)
+        value = trend + rng.random() * 2
+        if i == sessions // 4:
+            value += 25  # PR
+        points.append((start + timedelta(days=i * 2), round(value, 1)))
+    return points
+
+
+def render(points):
+    return "Raw data (kg): [" + ", ".join(f"{d:%Y-%m-%d}: {v}" for d, v in points) + "]"
+
+
+def run_benchmark():
+    print("=" * 92)
+    print("SERIES DOWNSAMPLING BENCHMARK")
+    print("=" * 92)
+    print(
+        f"{'Sessions':>8} | {'All pts tok':>11} | {'LTTB tok':>8} | {'Payload B':>9} | "
+        f"{'µs/series':>9} | {'PR kept':>7} | {'PR kept (last N)':>16}"
+    )
+    print("-" * 92)
+
+    for sessions in SESSION_COUNTS:
+        series = make_series(sessions)
+        pr = max(series, key=lambda p: p[1])
+
+        start = time.perf_counter()
+        for _ in range(NUM_RUNS):
+            reduced = SeriesDownsampler.downsample(
+                series,
+                DEFAULT_SERIES_POINTS,
+                x=lambda p: p[0].timestamp(),
+                y=lambda p: p[1],
+            )
+        per_series_us = (time.perf_counter() - start) * 1e6 / NUM_RUNS
+
+        payload = len(json.dumps([[d.isoformat(), v] for d, v in reduced]))
+        latest = series[-DEFAULT_SERIES_POINTS:]
+        print(
+            f"{sessions:>8} | {count_tokens(render(series)):>11,} | "
+            f"{count_tokens(render(reduced)):>8,} | {payload:>9,} | {per_series_us:>9.1f} | "
+            f"{str(pr in reduced):>7} | {str(pr in latest):>16}"
+        )
+
+    print("=" * 92)
+
+
+if __name__ == "__main__":
+    run_benchmark()
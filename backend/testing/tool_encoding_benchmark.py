@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tool Result Encoding Benchmark
+Compares JSON vs compact tabular encoding of exercise tool results:
+- Token size of the ToolMessage (offline, synthetic catalog)
+- Second round-trip TTFT with each encoding (live, needs credentials in .env)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.services.context.token_budget import count_tokens
+from app.tools.encoding import TOOL_COLUMNS, encode_capped, encode_table, tool_token_cap
+
+# Configuration
+CATALOG_SIZE = 800
+NUM_RUNS = 5
+RESULT_SIZES = [10, 50, 150, 400]
+
+MUSCLES = [
+    "chest", "triceps", "shoulders", "anterior_deltoid", "lats", "traps", "biceps",
+    "quadriceps", "hamstrings", "glutes", "calves", "abs", "obliques", "forearms",
+]
+EQUIPMENT = ["barbell", "dumbbell", "cable", "machine", "bodyweight", "kettlebell", "bands"]
+PATTERNS = ["push", "pull", "squat", "hinge", "lunge", "carry", "rotation"]
+BASE_MOVEMENTS = ["bench_press", "row", "squat", "deadlift", "curl", "press", "fly", "raise"]
+
+
+def make_catalog(size, seed=7):
+    """Synthetic exercise rows shaped like get_strength_exercises output."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        equipment = rng.choice(EQUIPMENT)
+        base = rng.choice(BASE_MOVEMENTS)
+        row = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "standard_name": f"{equipment.title()} {base.replace('_', ' ').title()} Variation {i}",
+            "primary_muscles": rng.sample(MUSCLES, 2),
+            "secondary_muscles": rng.sample(MUSCLES, rng.randint(0, 3)),
+            "equipment": equipment,
+            "movement_pattern": rng.choice(PATTERNS),
+            "base_movement": base,
+        }
+        if rng.random() < 0.2:
+            row["last_tracked"] = {"weight": "100.0kg", "reps": 8, "date": "Jan 05"}
+        rows.append(row)
+    return rows
+
+
+def token_report():
+    catalog = make_catalog(CATALOG_SIZE)
+    columns = TOOL_COLUMNS["get_strength_exercises"]
+    cap = tool_token_cap("get_strength_exercises")
+
+    print("=" * 80)
+    print("TOOL RESULT TOKENS (get_strength_exercises)")
+    print("=" * 80)
+    print(f"{'Rows':>6} | {'JSON':>8} | {'Compact':>8} | {'Saved':>6} | {f'Capped ({cap})':>14}")
+    print("-" * 80)
+
+    for n in RESULT_SIZES:
+        rows = catalog[:n]
+        json_tokens = count_tokens(json.dumps(rows))
+        compact_tokens = count_tokens(encode_table("get_strength_exercises", rows, columns))
+        capped_tokens = count_tokens(encode_capped("get_strength_exercises", rows, cap, columns))
+        saved = 1 - compact_tokens / json_tokens
+        print(
+            f"{n:>6} | {json_tokens:>8} | {compact_tokens:>8} | {saved:>5.0%} | {capped_tokens:>14}"
+        )
+    print()
+    return catalog
+
+
+def get_credentials():
+    """Initialize Google Cloud credentials from environment"""
+    credentials_json = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON")
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
+    if not credentials_json or not project_id:
+        return None, None
+
+    from google.oauth2 import service_account
+
+    info = json.loads(credentials_json)
+    credentials = service_account.Credentials.from_service_account_info(info).with_scopes(
+        ["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    return credentials, project_id
+
+
+async def measure_second_round_ttft(service, tool_content):
+    """TTFT of the round trip that follows a tool call."""
+    messages = [
+        SystemMessage(content="You are a strength coach. Use exercise IDs and names exactly as given."),
+        HumanMessage(content="Plan a 4-exercise chest day."),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "get_strength_exercises", "args": {"muscle_groups": ["chest"]}, "id": "call_1"}
+            ],
+        ),
+        ToolMessage(content=tool_content, tool_call_id="call_1"),
+    ]
+    start = time.time()
+    async for chunk in service.stream(messages):
+        if chunk.content:
+            return (time.time() - start) * 1000
+    return None
+
+
+async def ttft_report(catalog):
+    credentials, project_id = get_credentials()
+    if not credentials:
+        print("Skipping live TTFT comparison (no credentials in .env)")
+        return
+
+    from app.services.llm.base import BaseLLMService
+
+    service = BaseLLMService(
+        model_name="gemini-2.5-flash",
+        temperature=1.0,
+        streaming=True,
+        credentials=credentials,
+        project_id=project_id,
+        thinking_budget=0,
+    )
+
+    rows = catalog[:150]
+    columns = TOOL_COLUMNS["get_strength_exercises"]
+    variants = {
+        "json": json.dumps(rows),
+        "compact": encode_capped(
+            "get_strength_exercises", rows, tool_token_cap("get_strength_exercises"), columns
+        ),
+    }
+
+    print("=" * 80)
+    print("SECOND ROUND-TRIP TTFT (150 rows)")
+    print("=" * 80)
+    for name, content in variants.items():
+        ttfts = []
+        for _ in range(NUM_RUNS):
+            ttft = await measure_second_round_ttft(service, content)
+            if ttft is not None:
+                ttfts.append(ttft)
+            await asyncio.sleep(1)
+        if ttfts:
+            ttfts.sort()
+            print(
+                f"{name:>8}: avg {sum(ttfts) / len(ttfts):.0f}ms | "
+                f"p50 {ttfts[len(ttfts) // 2]:.0f}ms | tokens≈{count_tokens(content)}"
+            )
+
+
+if __name__ == "__main__":
+    catalog = token_report()
+    asyncio.run(ttft_report(catalog))
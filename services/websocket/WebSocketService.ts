@@ -36,6 +36,7 @@ export type EndpointConfig = {
 
 export type WorkoutTemplateApprovedCallback = (templateData: any) => void;
 export type ChartDataCallback = (chartData: any) => void;
+export type WorkoutTemplateCallback = (templateData: any) => void;
 
 /**
  * Persistent WebSocket service - maintains single active connection per endpoint
@@ -430,6 +431,12 @@ export class WebSocketService {
           this.events.emit("workoutTemplateApproved", message.data);
           break;
 
+        // Emitted as soon as the template's JSON block closes mid-stream
+        case "workout_template":
+          console.log("[WSService] Workout template received:", message.data);
+          this.events.emit("workoutTemplate", message.data);
+          break;
+
         case "chart_data":
           console.log("[WSService] Chart data received:", message.data);
           this.events.emit("chartData", message.data);
@@ -730,6 +737,11 @@ export class WebSocketService {
     return () => this.events.off("thinking", callback);
   }
 
+  onWorkoutTemplate(callback: WorkoutTemplateCallback): () => void {
+    this.events.on("workoutTemplate", callback);
+    return () => this.events.off("workoutTemplate", callback);
+  }
+
   onChartData(callback: ChartDataCallback): () => void {
     this.events.on("chartData", callback);
     return () => this.events.off("chartData", callback);